@@ -60,6 +60,10 @@ from prime_agent.ui.components import (
 from prime_agent.tools.user_profile import get_session_history
 from prime_agent.logging_config import setup_logging
 from prime_agent.tools.list_models import list_and_log_models
+from prime_agent.storage import registry
+from prime_agent.storage.llm_cache import get_llm_cache
+from prime_agent.llm.client import warm_up_llm
+import atexit
 
 setup_logging()
 list_and_log_models()
@@ -71,6 +75,23 @@ st.set_page_config(
     initial_sidebar_state="auto"
 )
 
+@st.cache_resource(show_spinner="Loading embedding model...")
+def _warm_up_storage():
+    # Once per server process: load the embedding model and Chroma client
+    # before the first research run, and release them on exit
+    registry.warm_up()
+    atexit.register(registry.shutdown)
+    return True
+
+_warm_up_storage()
+
+@st.cache_resource(show_spinner=False)
+def _warm_up_llm():
+    # Open the shared Gemini channel once per server process
+    return warm_up_llm()
+
+_warm_up_llm()
+
 # ============================================================================
 # INJECT MATERIAL SYMBOLS ROUNDED FONT
 # ============================================================================
@@ -420,6 +441,20 @@ def main():
         else:
             st.markdown("<p style='font-size: 12px; color: #6F737A; opacity: 0.6;'>No recent projects</p>", unsafe_allow_html=True)
 
+        index_status = registry.status()
+        st.markdown(
+            f"<p style='font-size: 11px; color: #6F737A; margin-top: 24px;'>Index memory: "
+            f"{index_status['total_memory_bytes'] / 2**20:.1f} / {index_status['budget_bytes'] / 2**20:.0f} MB "
+            f"across {len(index_status['collections'])} collection(s)</p>",
+            unsafe_allow_html=True
+        )
+        llm_cache_stats = get_llm_cache().stats()
+        st.markdown(
+            f"<p style='font-size: 11px; color: #6F737A;'>LLM cache: {llm_cache_stats['hits']} hits, "
+            f"{llm_cache_stats['misses']} misses ({llm_cache_stats['entries']} stored)</p>",
+            unsafe_allow_html=True
+        )
+
     # Header
     st.markdown("""
         <div style='text-align: center; margin-bottom: 32px; margin-top: -20px;'>
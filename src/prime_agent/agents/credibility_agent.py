@@ -2,10 +2,9 @@
 Credibility agent.
 """
 from prime_agent.agents.state import AgentState
-from prime_agent.tools.credibility import assess_credibility
-from prime_agent.storage.vector_store import VectorStore
+from prime_agent.tools.credibility import assess_credibility_batch
+from prime_agent.storage.registry import pinned, session_collection
 from loguru import logger
-import time # <--- NEW: Import time module for throttling
 
 def credibility_node(state: AgentState) -> AgentState:
     """
@@ -25,27 +24,21 @@ def credibility_node(state: AgentState) -> AgentState:
             unique_sources[source] = doc
             
     # Assess each unique source
-    vs = VectorStore()
-    
+    with pinned(session_collection(state.get("session_id"))) as vs:
+        # First chunk of each source, read straight from the source index (no embedding)
+        samples = vs.sample_by_source(list(unique_sources), n=1)
+
+    texts = {source: results[0]["content"] for source, results in samples.items() if results}
+
+    # Several sources per LLM call instead of one call per source
+    assessments = assess_credibility_batch(texts)
+
     for source, doc_meta in unique_sources.items():
-        
-        # CRITICAL FIX: Throttle the API call burst
-        # If the scores list is not empty, we made at least one call, so we must wait.
-        if scores:
-            logger.info("Throttling: Waiting 2 seconds before next source assessment...")
-            time.sleep(2) 
-            
-        # Find a chunk from this source
-        results = vs.search(source, k=1, filter={"source": source})
-        if results:
-            text_sample = results[0]["content"]
-            
-            # This is the call that hits the LLM
-            assessment = assess_credibility(text_sample, source) 
-            
+        assessment = assessments.get(source)
+        if assessment:
             assessment["source"] = source
             assessment["title"] = doc_meta.get("title", source)
             scores.append(assessment)
-            
+
     state["credibility_scores"] = scores
     return state
\ No newline at end of file
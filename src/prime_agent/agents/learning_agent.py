@@ -3,7 +3,7 @@ Learning agent.
 """
 from prime_agent.agents.state import AgentState
 from prime_agent.tools.quiz_generator import generate_quiz
-from prime_agent.storage.vector_store import VectorStore
+from prime_agent.storage.registry import pinned, session_collection
 from loguru import logger
 
 def learning_node(state: AgentState) -> AgentState:
@@ -29,8 +29,8 @@ def learning_node(state: AgentState) -> AgentState:
     
     if not context or len(context) < 100:
         logger.warning("Context too short, fetching from VectorStore...")
-        vs = VectorStore()
-        results = vs.search(topic, k=5)
+        with pinned(session_collection(state.get("session_id"))) as vs:
+            results = vs.search(topic, k=5)
         context = "\n\n".join([r["content"] for r in results])
         logger.info(f"Context length after VS search: {len(context)}")
         
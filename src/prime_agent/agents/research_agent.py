@@ -2,78 +2,159 @@
 Research agent.
 """
 from prime_agent.agents.state import AgentState
+from prime_agent.config import FETCH_CONCURRENCY, EMBED_BATCH, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
 from prime_agent.tools.web_search import web_search
-from prime_agent.tools.html_loader import load_html
-from prime_agent.tools.pdf_loader import load_pdf
+from prime_agent.tools.html_loader import load_page
+from prime_agent.tools.pdf_loader import iter_pdfs_pages
 from prime_agent.utils.text_utils import clean_text, chunk_text
-from prime_agent.storage.vector_store import VectorStore
+from prime_agent.utils.dedup import NearDuplicateFilter
+from prime_agent.utils.pipeline import Pipeline
+from prime_agent.storage.registry import enforce_budget, pinned, session_collection
 from loguru import logger
 import uuid
 
 def research_node(state: AgentState) -> AgentState:
     """
     Perform research: Web Search, Load Content, Chunk, Store.
+    Documents stream through fetch -> clean -> chunk -> embed -> upsert stages
+    connected by bounded queues, so embedding starts with the first page.
     """
     logger.info("Starting research phase...")
     topic = state["topic"]
     depth = state.get("depth", 1)
     urls = state.get("urls", [])
-    pdf_files = state.get("pdf_files", [])
-    
-    raw_docs = []
-    
-    # 1. Web Search (if depth > 0)
+    pdf_files = [p for p in state.get("pdf_files", []) if p]
+
+    # 1. Collect sources: web search hits (if depth > 0) and provided URLs
+    targets = []
     if depth > 0:
         logger.info(f"Searching web for: {topic}")
         search_results = web_search(topic, num_results=depth * 3)
         for res in search_results:
             link = res.get("link")
             if link:
-                logger.info(f"Fetching: {link}")
-                content = load_html(link)
-                if content:
-                    raw_docs.append({"content": content, "source": link, "title": res.get("title", topic)})
-    
-    # 2. Process provided URLs
+                targets.append({"source": link, "title": res.get("title", topic)})
+
     for url in urls:
         if url:
-            logger.info(f"Fetching provided URL: {url}")
-            content = load_html(url)
-            if content:
-                raw_docs.append({"content": content, "source": url, "title": url})
-            
-    # 3. Process PDFs
-    for pdf_path in pdf_files:
-        logger.info(f"Processing PDF: {pdf_path}")
-        content = load_pdf(pdf_path)
-        if content:
-            raw_docs.append({"content": content, "source": pdf_path, "title": pdf_path})
-            
-    # 4. Clean, Chunk, and Store
-    vs = VectorStore()
-    all_chunks = []
-    all_metadatas = []
-    all_ids = []
-    
-    processed_docs_metadata = []
-    
-    for doc in raw_docs:
-        cleaned = clean_text(doc["content"])
-        chunks = chunk_text(cleaned)
-        
-        for i, chunk in enumerate(chunks):
-            chunk_id = str(uuid.uuid4())
-            all_chunks.append(chunk)
-            meta = {"source": doc["source"], "title": doc["title"], "chunk_index": i}
-            all_metadatas.append(meta)
-            all_ids.append(chunk_id)
-            
-        processed_docs_metadata.append({"source": doc["source"], "title": doc["title"]})
-            
-    if all_chunks:
-        vs.add_documents(all_chunks, all_metadatas, all_ids)
-        
-    state["documents"] = processed_docs_metadata
-    logger.info(f"Research complete. Stored {len(all_chunks)} chunks.")
-    
+            targets.append({"source": url, "title": url})
+
+    # The same page can come from search and from the user; fetch it once
+    unique_targets = {}
+    for target in targets:
+        unique_targets.setdefault(target["source"], target)
+    targets = list(unique_targets.values())
+
+    # 2. Source stream: web pages to fetch, then PDF pages as they are extracted
+    def sources():
+        for order, target in enumerate(targets):
+            yield {"kind": "url", "order": order, **target}
+        pdf_order = {path: len(targets) + i for i, path in enumerate(pdf_files)}
+        for pdf_path, page, text in iter_pdfs_pages(pdf_files):
+            yield {"kind": "pdf", "order": pdf_order[pdf_path], "page": page, "source": pdf_path, "title": pdf_path, "content": text}
+
+    # 3. Stages
+    collection = session_collection(state.get("session_id"))
+    with pinned(collection) as vs:
+        dedup = NearDuplicateFilter()
+        chunk_counts = {}
+        documents = {}
+        unchanged = [0]
+        early_pages = {}  # pdf path -> {page number: item} waiting for an earlier page
+        next_page = {}
+
+        def fetch(item):
+            if item["kind"] == "url":
+                page = load_page(item["source"])
+                logger.info(f"Fetched {page['url']} in {page['elapsed']:.2f}s")
+                if not page["content"]:
+                    return
+                item = {**item, "content": page["content"]}
+            yield item
+
+        def clean(item):
+            yield {**item, "content": clean_text(item["content"])}
+
+        def in_page_order(item):
+            # Parallel fetch workers can pass a PDF's pages on out of order; hold
+            # pages back until every earlier page of the file has gone through
+            if item["kind"] != "pdf":
+                yield item
+                return
+            source = item["source"]
+            waiting = early_pages.setdefault(source, {})
+            waiting[item["page"]] = item
+            while next_page.get(source, 0) in waiting:
+                ready = waiting.pop(next_page.get(source, 0))
+                next_page[source] = ready["page"] + 1
+                yield ready
+
+        def chunk(item):
+            for ready in in_page_order(item):
+                yield from chunk_page(ready)
+
+        def chunk_page(item):
+            # Single worker, so chunk indexes stay sequential per source
+            source = item["source"]
+            for text in chunk_text(item["content"], CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, unit="tokens"):
+                # Mirrored / syndicated text is not worth another embedding
+                if dedup.is_duplicate(text):
+                    continue
+                index = chunk_counts.get(source, 0)
+                chunk_counts[source] = index + 1
+                documents.setdefault(item["order"], {"source": source, "title": item["title"]})
+                yield {
+                    # Stable per (source, position), so re-ingesting a source upserts in place
+                    "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{index}")),
+                    "text": text,
+                    "meta": {"source": source, "title": item["title"], "chunk_index": index},
+                }
+
+        def embed(batch):
+            # Chunks already stored with identical text (e.g. from a previous run) need no new embedding
+            stored = vs.existing([c["id"] for c in batch])
+            fresh = [c for c in batch if stored.get(c["id"]) != c["text"]]
+            unchanged[0] += len(batch) - len(fresh)
+            if not fresh:
+                return
+            embeddings = vs.embed_documents([c["text"] for c in fresh])
+            for c, embedding in zip(fresh, embeddings):
+                yield {**c, "embedding": embedding}
+
+        def upsert(batch):
+            vs.add_embeddings(
+                [c["text"] for c in batch],
+                [c["embedding"] for c in batch],
+                [c["meta"] for c in batch],
+                [c["id"] for c in batch],
+            )
+            return batch
+
+        pipeline = (
+            Pipeline()
+            .add_stage("fetch", fetch, workers=FETCH_CONCURRENCY)
+            .add_stage("clean", clean)
+            .add_stage("chunk", chunk)
+            .add_stage("embed", embed, batch_size=EMBED_BATCH)
+            .add_stage("upsert", upsert, batch_size=EMBED_BATCH)
+        )
+        stats = pipeline.run(sources())
+
+        for name, counters in stats.items():
+            logger.info(f"Stage {name}: {counters['items_in']} in, {counters['items_out']} out, {counters['items_per_second']}/s")
+        # Re-ingested sources that got shorter leave stale trailing chunks behind
+        stale = 0
+        for source, count in chunk_counts.items():
+            stale += vs.delete(where={"$and": [{"source": source}, {"chunk_index": {"$gte": count}}]})
+        if unchanged[0] or stale:
+            logger.info(f"Skipped {unchanged[0]} unchanged chunks, deleted {stale} stale chunks")
+        if dedup.dropped:
+            logger.info(f"Dropped {dedup.dropped}/{dedup.seen} near-duplicate chunks (embeddings saved)")
+
+        # The new chunks may push other (idle) sessions' collections over the memory budget
+        enforce_budget(keep=collection)
+
+    state["documents"] = [documents[order] for order in sorted(documents)]
+    logger.info(f"Research complete. Stored {stats['upsert']['items_out']} chunks in {pipeline.wall_seconds:.1f}s.")
+
     return state
@@ -2,7 +2,8 @@
 Summarization agent.
 """
 from prime_agent.agents.state import AgentState
-from prime_agent.storage.vector_store import VectorStore
+from prime_agent.storage.registry import get_retriever, pinned, session_collection
+from prime_agent.storage.context import prune_context
 from prime_agent.tools.summarizer import generate_learning_content
 from loguru import logger
 import time
@@ -11,9 +12,15 @@ def summarization_node(state: AgentState) -> AgentState:
     logger.info("Starting summarization phase...")
     topic = state["topic"]
     
-    vs = VectorStore()
-    # INCREASED CONTEXT: Fetch 25 chunks to ensure we get the Lifecycle and Roles tables
-    results = vs.search(topic, k=25)
+    collection = session_collection(state.get("session_id"))
+    with pinned(collection):
+        retriever = get_retriever(collection)
+        # Hybrid (BM25 + dense) retrieval catches exact terms such as the Lifecycle and
+        # Roles tables by name, so fewer chunks are needed than with dense search alone
+        results = retriever.search(topic, k=20)
+        # Keep a diverse subset and drop text repeated by overlapping chunks
+        results, stats = prune_context(retriever.store, topic, results, k=12)
+    logger.info(f"Context pruning: {stats['chunks_in']} -> {stats['chunks_out']} chunks, removed {stats['tokens_removed']} of {stats['tokens_before']} tokens")
     context = "\n\n".join([r["content"] for r in results])
     
     if not context:
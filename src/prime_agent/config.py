@@ -12,10 +12,101 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DB_PATH = os.getenv("DB_PATH", str(BASE_DIR / "prime_data.db"))
 CHROMA_PATH = os.getenv("CHROMA_PATH", str(BASE_DIR / "chroma_db_v3"))
 
+# Vector store backend: "chroma", or "numpy" (memory-mapped matrix, see storage/numpy_store.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", os.path.expanduser("~/.prime_agent_vectors"))
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float16")  # "float32", "float16" or "int8"
+# Per-session collections: idle ones are evicted after VECTOR_SESSION_IDLE_SECONDS, and
+# least recently used ones whenever the estimated index memory exceeds VECTOR_RAM_BUDGET.
+# In-memory Chroma collections are spilled to VECTOR_SPILL_DIR and restored on next use.
+VECTOR_RAM_BUDGET = int(os.getenv("VECTOR_RAM_BUDGET", str(512 * 1024 * 1024)))
+VECTOR_SESSION_IDLE_SECONDS = float(os.getenv("VECTOR_SESSION_IDLE_SECONDS", "3600"))
+VECTOR_SPILL_DIR = os.getenv("VECTOR_SPILL_DIR", os.path.expanduser("~/.prime_agent_vector_spill"))
+# Hybrid retrieval: candidates taken from each of the dense and BM25 rankings, and the RRF constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Chroma backend: keep the index on disk at CHROMA_PATH instead of in RAM
+CHROMA_PERSIST = os.getenv("CHROMA_PERSIST", "0") == "1"
+# Physically remove tombstoned chunks once this many have accumulated
+VECTOR_COMPACT_THRESHOLD = int(os.getenv("VECTOR_COMPACT_THRESHOLD", "500"))
+
 # LLM Config
 # Switch to 1.5-flash for better Rate Limits (RPM)
 DEFAULT_MODEL = "gemini-flash-latest"
 FAST_MODEL = "gemini-flash-latest"
 
+# Web fetching
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+
+# Web search result cache
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "1800"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+
+# Crawling
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0.5"))  # seconds between requests to one domain
+
+# HTML extraction backend: "auto", "selectolax", "lxml" or "html.parser"
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+# HTTP response cache
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.expanduser("~/.prime_agent_http_cache"))
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", str(24 * 3600)))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Gemini text-generation quota, shared by every LLM call in the process
+LLM_RPM = float(os.getenv("LLM_RPM", "60"))
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+
+# Circuit breaker per API endpoint: open after N consecutive failures, retry after the timeout
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Async LLM calls: concurrent requests per event loop and seconds per call
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Sources scored per credibility LLM call
+CREDIBILITY_BATCH_SIZE = int(os.getenv("CREDIBILITY_BATCH_SIZE", "8"))
+
+# LLM response cache (keyed by model, messages, schema and temperature)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.expanduser("~/.prime_agent_llm_cache.sqlite"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# PDF ingestion
+PDF_CACHE_PATH = os.getenv("PDF_CACHE_PATH", os.path.expanduser("~/.prime_agent_pdf_cache.sqlite"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+
+# Near-duplicate chunk filtering (estimated Jaccard similarity, 0-1)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+# Gemini embedding cache (SQLite, float32 blobs, LRU-evicted above the size limit)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.expanduser("~/.prime_agent_embedding_cache.sqlite"))
+EMBED_CACHE_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Gemini embedding API quota; batch size and concurrency adapt up to the maximums
+EMBED_RPM = float(os.getenv("EMBED_RPM", "1500"))
+EMBED_TPM = float(os.getenv("EMBED_TPM", "1000000"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "100"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "8"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+# Local embedding worker processes for large add_documents jobs (1 disables the pool)
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMBED_POOL_MIN_TEXTS = int(os.getenv("EMBED_POOL_MIN_TEXTS", "512"))
+
+# Research ingestion pipeline
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+EMBED_BATCH = int(os.getenv("EMBED_BATCH", "32"))
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
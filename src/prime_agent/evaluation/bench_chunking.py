@@ -0,0 +1,82 @@
+"""
+Microbenchmark for text chunking.
+
+Compares the legacy chunker (a fresh LangChain RecursiveCharacterTextSplitter
+per call, run on clean_text output) with the offset-based chunker in
+text_utils, in both character and token units.
+
+Usage:
+    python -m prime_agent.evaluation.bench_chunking [--mb 4] [--repeat 3] [FILE]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from prime_agent.utils.text_utils import chunk_spans, clean_text
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        separators=["\n\n", "\n", ".", " ", ""]
+    )
+    return splitter.split_text(text)
+
+
+def synthetic_text(megabytes: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(5000)] + ["the", "of", "and", "a", "to", "in", "is"]
+    sentences = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        sentence = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 30))).capitalize() + "."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def _time(fn: Callable[[], List], repeat: int) -> Dict:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "chunks": count}
+
+
+def run(text: str, repeat: int = 3) -> Dict[str, Dict]:
+    text = clean_text(text)
+    megabytes = len(text) / (1024 * 1024)
+    print(f"Input: {megabytes:.2f} MB, best of {repeat}")
+
+    candidates = {
+        "legacy RecursiveCharacterTextSplitter (1000/100 chars)": lambda: legacy_chunk_text(text),
+        "chunk_spans (1000/100 chars)": lambda: chunk_spans(text, 1000, 100, unit="chars"),
+        "chunk_spans (256/32 tokens)": lambda: chunk_spans(text, 256, 32, unit="tokens"),
+    }
+    results = {}
+    for name, fn in candidates.items():
+        results[name] = _time(fn, repeat)
+        r = results[name]
+        print(f"{name:<56} {r['seconds']:7.3f} s  {megabytes / r['seconds']:7.2f} MB/s  {r['chunks']} chunks")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", default=None)
+    parser.add_argument("--mb", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8", errors="replace") as f:
+            source = f.read()
+    else:
+        source = synthetic_text(args.mb)
+    run(source, args.repeat)
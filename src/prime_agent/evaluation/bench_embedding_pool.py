@@ -0,0 +1,63 @@
+"""
+Benchmark for the multi-process embedding pool.
+
+Embeds N synthetic chunks of varied length with the single-process
+HuggingFaceEmbeddings baseline and with EmbeddingPool at each worker count,
+and reports throughput in chunks per second.
+
+Usage:
+    python -m prime_agent.evaluation.bench_embedding_pool [--n 4000] [--workers 1 2 4 8] [--skip-baseline]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from prime_agent.storage.embedding_pool import EmbeddingPool
+from prime_agent.storage.registry import EMBEDDING_MODEL
+
+_WORDS = (
+    "retrieval model learning agent source vector index chunk summary evidence "
+    "credible research quiz graph concept token budget latency memory process"
+).split()
+
+
+def _chunks(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    # Mostly full chunks plus a tail of short ones, like a chunked PDF set
+    return [" ".join(rng.choices(_WORDS, k=rng.choice([12, 40, 120, 200, 200]))) for _ in range(n)]
+
+
+def run(n: int = 4000, workers=(1, 2, 4, 8), skip_baseline: bool = False) -> Dict[str, float]:
+    texts = _chunks(n)
+    results = {}
+
+    if not skip_baseline:
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        embeddings.embed_documents(texts[:32])
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        results["baseline (1 process)"] = n / (time.perf_counter() - start)
+
+    for count in workers:
+        with EmbeddingPool(EMBEDDING_MODEL, count) as pool:
+            pool.warm_up()
+            pool.embed(texts)
+            results[f"pool, {count} workers"] = pool.last_stats["chunks_per_second"]
+
+    print(f"{n} chunks, model {EMBEDDING_MODEL}")
+    print(f"{'engine':<22} {'chunks/s':>10}")
+    for name, rate in results.items():
+        print(f"{name:<22} {rate:10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+    run(args.n, args.workers, args.skip_baseline)
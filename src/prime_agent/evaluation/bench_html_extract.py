@@ -0,0 +1,79 @@
+"""
+Benchmark for HTML extraction backends.
+
+Reports parse time per MB of HTML for each installed backend on a corpus of
+saved pages, next to the legacy path (html.parser, parsed twice: once for text
+and once for link discovery).
+
+Usage:
+    python -m prime_agent.evaluation.bench_html_extract [CORPUS_DIR] [--repeat N]
+
+CORPUS_DIR holds *.html files; by default the bodies stored in the HTTP
+response cache are used.
+"""
+import argparse
+import glob
+import os
+import time
+from typing import Callable, Dict, List
+
+from prime_agent.config import HTTP_CACHE_DIR
+from prime_agent.tools.html_extract import available_backends, extract_html
+
+
+def load_corpus(corpus_dir: str | None) -> List[bytes]:
+    if corpus_dir:
+        paths = glob.glob(os.path.join(corpus_dir, "**", "*.htm*"), recursive=True)
+    else:
+        paths = glob.glob(os.path.join(HTTP_CACHE_DIR, "objects", "*", "*.body"))
+    pages = []
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def _legacy(html: bytes) -> Dict:
+    from bs4 import BeautifulSoup
+
+    extracted = extract_html(html, backend="html.parser")
+    BeautifulSoup(html, "html.parser").find_all("a", href=True)
+    return extracted
+
+
+def time_backend(fn: Callable[[bytes], Dict], pages: List[bytes], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    return (time.perf_counter() - start) / repeat
+
+
+def run(corpus_dir: str | None = None, repeat: int = 3) -> Dict[str, float]:
+    """
+    Returns milliseconds per MB for each backend.
+    """
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        raise SystemExit("No pages found; pass a directory of saved .html files.")
+    megabytes = sum(len(p) for p in pages) / (1024 * 1024)
+    print(f"Corpus: {len(pages)} pages, {megabytes:.2f} MB, {repeat} repeats")
+
+    candidates = {"legacy (html.parser x2)": _legacy}
+    for name in available_backends():
+        candidates[name] = lambda html, name=name: extract_html(html, backend=name)
+
+    results = {}
+    for name, fn in candidates.items():
+        seconds = time_backend(fn, pages, repeat)
+        results[name] = seconds * 1000 / megabytes
+        print(f"{name:<26} {seconds:8.3f} s/pass  {results[name]:10.1f} ms/MB")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.corpus_dir, args.repeat)
@@ -0,0 +1,130 @@
+"""
+Benchmark for vector store backends.
+
+Loads N random unit vectors (the size of all-MiniLM-L6-v2 embeddings by
+default) into the Chroma-backed VectorStore and into the memory-mapped numpy
+index at each dtype, then reports index size, ingest time, search latency
+(with and without a metadata filter) and top-10 recall against exact search.
+
+Usage:
+    python -m prime_agent.evaluation.bench_vector_store [--n 100000] [--dim 384] [--queries 200] [--skip-chroma]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+from prime_agent.storage.numpy_store import NumpyVectorStore
+
+
+class _NoEmbeddings:
+    """
+    Queries are passed as vectors; nothing should be embedded.
+    """
+    def embed_documents(self, texts):
+        raise RuntimeError("benchmark should not embed")
+
+    embed_query = embed_documents
+
+
+def _dataset(n: int, dim: int, queries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Queries near stored vectors, like real questions near their answers
+    picks = rng.integers(0, n, size=queries)
+    qs = vectors[picks] + rng.normal(scale=0.05, size=(queries, dim)).astype(np.float32)
+    qs /= np.linalg.norm(qs, axis=1, keepdims=True)
+    return vectors, qs
+
+
+def _latency(search, qs) -> Dict:
+    times = []
+    for q in qs:
+        start = time.perf_counter()
+        search(q)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    return {"p50_ms": float(np.percentile(times, 50)), "p95_ms": float(np.percentile(times, 95))}
+
+
+def _recall(search, qs, exact) -> float:
+    hits = 0
+    for q, truth in zip(qs, exact):
+        hits += len({int(r) for r in search(q)} & set(truth.tolist()))
+    return hits / exact.size
+
+
+def run(n: int = 100000, dim: int = 384, queries: int = 200, skip_chroma: bool = False) -> Dict[str, Dict]:
+    vectors, qs = _dataset(n, dim, queries)
+    ids = [str(i) for i in range(n)]
+    documents = [f"chunk {i}" for i in range(n)]
+    metadata = [{"source": f"s{i % 50}"} for i in range(n)]
+    exact = np.argsort(-(qs @ vectors.T), axis=1)[:, :10]
+    print(f"{n} vectors x {dim} dims, {queries} queries (float32 matrix: {vectors.nbytes / 2**20:.1f} MB)")
+
+    results = {}
+    for dtype in ("float32", "float16", "int8"):
+        directory = tempfile.mkdtemp()
+        try:
+            store = NumpyVectorStore(embeddings=_NoEmbeddings(), directory=directory, dtype=dtype)
+            start = time.perf_counter()
+            for i in range(0, n, 4096):
+                store.add_embeddings(documents[i:i+4096], vectors[i:i+4096], metadata[i:i+4096], ids[i:i+4096])
+            ingest = time.perf_counter() - start
+
+            search = lambda q: [r["id"] for r in store.search_by_vector(q, k=10)]
+            filtered = lambda q: store.search_by_vector(q, k=10, filter={"source": "s7"})
+            filtered(qs[0])  # build the cached mask
+            results[f"numpy {dtype}"] = {
+                "index_mb": store.nbytes() / 2**20,
+                "ingest_s": ingest,
+                **_latency(search, qs),
+                "filtered_p50_ms": _latency(filtered, qs)["p50_ms"],
+                "recall@10": _recall(search, qs, exact),
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if not skip_chroma:
+        from prime_agent.storage.vector_store import VectorStore
+
+        directory = tempfile.mkdtemp()
+        try:
+            store = VectorStore(collection_name="bench_vectors", embeddings=_NoEmbeddings(), persist_directory=directory)
+            start = time.perf_counter()
+            for i in range(0, n, 4096):
+                store.add_embeddings(documents[i:i+4096], vectors[i:i+4096].tolist(), metadata[i:i+4096], ids[i:i+4096])
+            ingest = time.perf_counter() - start
+
+            collection = store.vector_store._collection
+            search = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=10, include=["documents", "metadatas"])["ids"][0]
+            filtered = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=10, where={"source": "s7"})
+            results["chroma (hnsw)"] = {
+                # HNSW graph and vectors are both float32; count the vectors as a lower bound
+                "index_mb": vectors.nbytes / 2**20,
+                "ingest_s": ingest,
+                **_latency(search, qs),
+                "filtered_p50_ms": _latency(filtered, qs)["p50_ms"],
+                "recall@10": _recall(search, qs, exact),
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{'backend':<16} {'index MB':>9} {'ingest s':>9} {'p50 ms':>8} {'p95 ms':>8} {'filt ms':>8} {'recall':>7}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['index_mb']:9.1f} {r['ingest_s']:9.2f} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} {r['filtered_p50_ms']:8.3f} {r['recall@10']:7.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+    run(args.n, args.dim, args.queries, args.skip_chroma)
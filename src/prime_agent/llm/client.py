@@ -1,9 +1,17 @@
 import os
 import json
+import ast
+import asyncio
+import threading
+import weakref
+from typing import Optional
 import google.generativeai as genai
 from loguru import logger
 from langchain_core.messages import HumanMessage, SystemMessage
-from prime_agent.config import DEFAULT_MODEL
+from prime_agent.config import DEFAULT_MODEL, LLM_CACHE_ENABLED, LLM_MAX_CONCURRENCY, LLM_TIMEOUT
+from prime_agent.storage.llm_cache import get_llm_cache, llm_cache_key
+from prime_agent.utils.rate_limit import acall_with_retry, call_with_retry, get_limiter
+from prime_agent.utils.text_utils import count_tokens
 
 # --- HOTFIX: Inject missing MediaResolution feature ---
 try:
@@ -21,10 +29,21 @@ except Exception as e:
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 class LLMClient:
-    def __init__(self, model_name: str = DEFAULT_MODEL):
+    def __init__(self, model_name: str = DEFAULT_MODEL, llm=None, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT, limiter=None):
         # FIX: Accepted 'model_name' as an argument again to match summarizer.py
         self.model_name = model_name
-        
+        # Quota, retries and circuit breaker, shared by every LLM call in the process
+        self.limiter = limiter or get_limiter("llm")
+        # Limits for the async methods: concurrent requests per event loop, seconds per call
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphores = weakref.WeakKeyDictionary()
+
+        if llm is not None:
+            # Any LangChain chat model (e.g. a fake one in tests)
+            self.llm = llm
+            return
+
         # Check both possible names for the API key
         api_key = os.getenv("OPENAI_API_KEY") or os.getenv("GEMINI_API_KEY")
         
@@ -38,81 +57,174 @@ class LLMClient:
             google_api_key=api_key
         )
 
-    def generate_text(self, prompt: str, system_prompt: str = None) -> str:
+    def _cache_key(self, messages, schema: dict = None) -> str:
+        return llm_cache_key(
+            self.model_name,
+            [(m.type, m.content) for m in messages],
+            schema,
+            getattr(self.llm, "temperature", None),
+        )
+
+    @staticmethod
+    def _tokens(messages) -> int:
+        return sum(count_tokens(m.content) for m in messages)
+
+    def _invoke(self, messages):
         """
-        Simple text generation wrapper.
+        `invoke` under the shared limiter, retrying rate limits and transient
+        errors (see utils.rate_limit.call_with_retry).
         """
+        return call_with_retry(lambda: self.llm.invoke(messages), self.limiter, tokens=self._tokens(messages))
+
+    def _cache(self, use_cache: bool):
+        return get_llm_cache() if use_cache and LLM_CACHE_ENABLED else None
+
+    @staticmethod
+    def _text_messages(prompt: str, system_prompt: str = None):
         messages = []
-import os
-import json
-import ast
-import google.generativeai as genai
-from loguru import logger
-from langchain_core.messages import HumanMessage, SystemMessage
-from prime_agent.config import DEFAULT_MODEL
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+        messages.append(HumanMessage(content=prompt))
+        return messages
 
-# --- HOTFIX: Inject missing MediaResolution feature ---
-try:
-    if not hasattr(genai.GenerationConfig, "MediaResolution"):
-        class FakeMediaResolution:
-            AUTO = "auto"
-            LOW = "low"
-            MEDIUM = "medium"
-            HIGH = "high"
-        genai.GenerationConfig.MediaResolution = FakeMediaResolution
-except Exception as e:
-    logger.warning(f"Hotfix warning: {e}")
-# ------------------------------------------------------
+    @staticmethod
+    def _structured_messages(prompt: str, schema: dict):
+        return [
+            SystemMessage(content="You are a helpful assistant. Output ONLY valid JSON."),
+            HumanMessage(content=f"{prompt}\n\nRespond using this JSON schema:\n{json.dumps(schema, indent=2)}")
+        ]
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+    def generate_text(self, prompt: str, system_prompt: str = None, use_cache: bool = True) -> str:
+        """
+        Simple text generation wrapper. Identical requests are answered from
+        the response cache unless `use_cache` is False.
+        """
+        messages = self._text_messages(prompt, system_prompt)
 
-class LLMClient:
-    def __init__(self, model_name: str = DEFAULT_MODEL):
-        # FIX: Accepted 'model_name' as an argument again to match summarizer.py
-        self.model_name = model_name
-        
-        # Check both possible names for the API key
-        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("GEMINI_API_KEY")
-        
-        if not api_key:
-            logger.error("❌ NO API KEY FOUND! Check your .env file.")
-            raise ValueError("API Key missing. Please set OPENAI_API_KEY in .env")
+        cache = self._cache(use_cache)
+        if cache:
+            key = self._cache_key(messages)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
 
-        self.llm = ChatGoogleGenerativeAI(
-            model=self.model_name,
-            temperature=0.3,
-            google_api_key=api_key
-        )
+        try:
+            response = self._invoke(messages)
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            return "Error generating response."
+        if cache and isinstance(response.content, str) and response.content:
+            cache.put(key, self.model_name, response.content)
+        return response.content
 
-    def generate_text(self, prompt: str, system_prompt: str = None) -> str:
+    def generate_structured(self, prompt: str, schema: dict, use_cache: bool = True) -> dict:
         """
-        Simple text generation wrapper.
+        Generates JSON output. Parsed results are cached like generate_text's;
+        failed or empty results are not.
         """
-        messages = []
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-        messages.append(HumanMessage(content=prompt))
+        messages = self._structured_messages(prompt, schema)
+
+        cache = self._cache(use_cache)
+        if cache:
+            key = self._cache_key(messages, schema)
+            cached = cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+
+        try:
+            response = self._invoke(messages)
+        except Exception as e:
+            logger.error(f"LLM structured generation failed: {e}")
+            return {}
+        result = self._parse_structured(response.content)
+        if cache and result:
+            cache.put(key, self.model_name, json.dumps(result))
+        return result
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # One per event loop: asyncio primitives cannot be shared between loops
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _ainvoke(self, messages, timeout: Optional[float]):
+        """
+        `ainvoke` under the concurrency limit, the shared limiter (with its
+        retries) and a timeout covering all attempts. Cancelling the calling
+        task cancels the request.
+        """
+        async with self._semaphore():
+            return await asyncio.wait_for(
+                acall_with_retry(lambda: self.llm.ainvoke(messages), self.limiter, tokens=self._tokens(messages)),
+                timeout or self.timeout,
+            )
+
+    async def agenerate_text(self, prompt: str, system_prompt: str = None, use_cache: bool = True, timeout: Optional[float] = None) -> str:
+        """
+        Async generate_text. At most `max_concurrency` requests run at once
+        per event loop; a call taking longer than `timeout` seconds (default
+        LLM_TIMEOUT) fails like any other error.
+        """
+        messages = self._text_messages(prompt, system_prompt)
+
+        cache = self._cache(use_cache)
+        if cache:
+            key = self._cache_key(messages)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
 
         try:
-            response = self.llm.invoke(messages)
-            return response.content
+            response = await self._ainvoke(messages, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LLM generation timed out after {timeout or self.timeout}s")
+            return "Error generating response."
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
             return "Error generating response."
+        if cache and isinstance(response.content, str) and response.content:
+            await asyncio.to_thread(cache.put, key, self.model_name, response.content)
+        return response.content
 
-    def generate_structured(self, prompt: str, schema: dict) -> dict:
+    async def agenerate_structured(self, prompt: str, schema: dict, use_cache: bool = True, timeout: Optional[float] = None) -> dict:
         """
-        Generates JSON output.
+        Async generate_structured, with the same limits as agenerate_text.
         """
-        messages = [
-            SystemMessage(content="You are a helpful assistant. Output ONLY valid JSON."),
-            HumanMessage(content=f"{prompt}\n\nRespond using this JSON schema:\n{json.dumps(schema, indent=2)}")
-        ]
-        
+        messages = self._structured_messages(prompt, schema)
+
+        cache = self._cache(use_cache)
+        if cache:
+            key = self._cache_key(messages, schema)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return json.loads(cached)
+
+        try:
+            response = await self._ainvoke(messages, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LLM structured generation timed out after {timeout or self.timeout}s")
+            return {}
+        except Exception as e:
+            logger.error(f"LLM structured generation failed: {e}")
+            return {}
+        result = self._parse_structured(response.content)
+        if cache and result:
+            await asyncio.to_thread(cache.put, key, self.model_name, json.dumps(result))
+        return result
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_structured(content) -> dict:
         try:
-            response = self.llm.invoke(messages)
-            content = response.content
-            
             if not content:
                 logger.error("LLM returned empty content.")
                 return {}
@@ -149,4 +261,38 @@ class LLMClient:
             return {}
         except Exception as e:
             logger.error(f"LLM structured generation failed: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_name: str = DEFAULT_MODEL) -> LLMClient:
+    """
+    Shared client for `model_name`. Each LLMClient owns a gRPC channel; sharing
+    one per model lets every tool and thread reuse its connection instead of
+    paying client setup and a TLS handshake per call.
+    """
+    client = _clients.get(model_name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(model_name)
+            if client is None:
+                client = _clients[model_name] = LLMClient(model_name=model_name)
+    return client
+
+
+def warm_up_llm(model_name: str = DEFAULT_MODEL) -> bool:
+    """
+    Create the shared client and open its channel with a token-count request
+    (no generation quota is used), so the first real call skips connection
+    setup. Returns False if the model is unreachable.
+    """
+    try:
+        get_llm_client(model_name).llm.get_num_tokens("warm up")
+        logger.info(f"LLM client for {model_name} warmed up")
+        return True
+    except Exception as e:
+        logger.warning(f"LLM warm-up failed for {model_name}: {e}")
+        return False
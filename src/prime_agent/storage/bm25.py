@@ -0,0 +1,167 @@
+"""
+Incremental BM25 inverted index.
+
+Postings are stored per term as two typed arrays (document numbers and term
+frequencies) that grow by appending, instead of dicts of lists, so memory stays
+at a few bytes per posting. Queries score every posting of the query terms with
+vectorised NumPy arithmetic and take the top-k with `argpartition`. Removed
+documents are masked out and purged by `compact`.
+"""
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prime_agent.storage.metadata_filter import MetadataMasks
+
+# Words, keeping joined forms like "gpt-4", "v1.2" or "covid_19" as one token
+_TOKEN = re.compile(r"\w+(?:[-.]\w+)*")
+
+# Rough Python object overheads per term (key, dict slot, two arrays) and per
+# document (id string, id map slot, metadata dict) for `memory_bytes`
+_TERM_BYTES = 240
+_DOC_BYTES = 400
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._term_of: Dict[str, int] = {}
+            self._postings: List[Tuple[array, array]] = []  # per term: (doc numbers, term frequencies)
+            self._ids: List[str] = []
+            self._doc_of: Dict[str, int] = {}
+            self._metadata: List[Dict] = []
+            self._lengths = array("I")
+            self._alive = bytearray()
+            self._total_length = 0
+            self._masks = MetadataMasks(self._metadata)
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def add(self, ids: List[str], texts: List[str], metadata: Optional[List[Dict]] = None):
+        """
+        Index documents; an id that is already indexed is replaced.
+        """
+        metadata = metadata or [{}] * len(ids)
+        with self._lock:
+            self.remove([id for id in ids if id in self._doc_of])
+            for id, text, meta in zip(ids, texts, metadata):
+                doc = len(self._ids)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    t = self._term_of.get(term)
+                    if t is None:
+                        t = self._term_of[term] = len(self._postings)
+                        self._postings.append((array("I"), array("H")))
+                    docs, tfs = self._postings[t]
+                    docs.append(doc)
+                    tfs.append(min(tf, 65535))
+                length = sum(counts.values())
+                self._ids.append(id)
+                self._doc_of[id] = doc
+                self._metadata.append(meta or {})
+                self._lengths.append(length)
+                self._alive.append(1)
+                self._total_length += length
+
+    def remove(self, ids: List[str]) -> int:
+        """
+        Mask documents out of results. Returns how many were indexed.
+        """
+        removed = 0
+        with self._lock:
+            for id in ids:
+                doc = self._doc_of.pop(id, None)
+                if doc is None:
+                    continue
+                self._alive[doc] = 0
+                self._total_length -= self._lengths[doc]
+                removed += 1
+            if len(self._ids) > 1000 and len(self._ids) > 2 * len(self._doc_of):
+                self.compact()
+        return removed
+
+    def compact(self):
+        """
+        Drop postings of removed documents and renumber the rest.
+        """
+        with self._lock:
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            postings = []
+            term_of = {}
+            for term, t in self._term_of.items():
+                docs = np.frombuffer(self._postings[t][0], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings[t][1], dtype=np.uint16)
+                keep = alive[docs]
+                if keep.any():
+                    term_of[term] = len(postings)
+                    postings.append((array("I", renumber[docs[keep]].astype(np.uint32).tobytes()), array("H", tfs[keep].tobytes())))
+
+            rows = np.flatnonzero(alive)
+            self._term_of = term_of
+            self._postings = postings
+            self._ids = [self._ids[r] for r in rows]
+            self._doc_of = {id: i for i, id in enumerate(self._ids)}
+            self._metadata = [self._metadata[r] for r in rows]
+            self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[rows].tobytes())
+            self._alive = bytearray(b"\x01" * len(rows))
+            self._masks = MetadataMasks(self._metadata)
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated memory: posting arrays plus per-term and per-document overhead.
+        """
+        with self._lock:
+            postings = sum(len(docs) * docs.itemsize + len(tfs) * tfs.itemsize for docs, tfs in self._postings)
+            return postings + len(self._postings) * _TERM_BYTES + len(self._ids) * (_DOC_BYTES + self._lengths.itemsize + 1)
+
+    def search(self, query: str, k: int = 10, filter: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (id, score) pairs for a query, best first. Documents that share
+        no term with the query are not returned.
+        """
+        with self._lock:
+            n_live = len(self._doc_of)
+            if n_live == 0 or k <= 0:
+                return []
+            avg_length = self._total_length / n_live
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            allowed = alive & self._masks.mask(filter) if filter else alive
+            norm = self.k1 * (1 - self.b + self.b * np.frombuffer(self._lengths, dtype=np.uint32) / avg_length)
+
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in set(tokenize(query)):
+                t = self._term_of.get(term)
+                if t is None:
+                    continue
+                docs = np.frombuffer(self._postings[t][0], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings[t][1], dtype=np.uint16).astype(np.float32)
+                df = int(alive[docs].sum())
+                if df == 0:
+                    continue
+                idf = math.log(1 + (n_live - df + 0.5) / (df + 0.5))
+                # Each document appears once per term, so fancy-index += is safe
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+            scores[~allowed] = 0
+
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > k:
+                hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            hits = hits[np.argsort(-scores[hits])]
+            return [(self._ids[d], float(scores[d])) for d in hits]
@@ -0,0 +1,108 @@
+"""
+Post-processing of retrieved chunks before they go into a prompt.
+
+`prune_context` re-selects chunks with maximal marginal relevance, using the
+embeddings already in the store, so near-identical passages from different
+sources are not all kept. It then strips the overlap that adjacent chunks of
+the same source share (the chunker repeats the tail of each chunk at the start
+of the next) and reports how many tokens were removed.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from prime_agent.utils.text_utils import count_tokens
+
+
+def mmr_select(query_vector, vectors, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Indexes of `k` vectors chosen greedily to maximise
+    lambda * sim(query, v) - (1 - lambda) * max sim(v, already chosen).
+    """
+    if len(vectors) == 0 or k <= 0:
+        return []
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    chosen: List[int] = []
+    available = np.ones(len(matrix), dtype=bool)
+    for _ in range(min(k, len(matrix))):
+        penalty = np.where(np.isinf(redundancy), 0.0, redundancy)
+        score = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        chosen.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return chosen
+
+
+def overlap_length(previous: str, current: str, min_overlap: int = 20) -> int:
+    """
+    Length of the longest suffix of `previous` that is also a prefix of
+    `current` (0 if shorter than `min_overlap`).
+    """
+    if len(previous) < min_overlap or len(current) < min_overlap:
+        return 0
+    probe = current[:min_overlap]
+    start = max(0, len(previous) - len(current))
+    pos = previous.find(probe, start)
+    while pos != -1:
+        if current.startswith(previous[pos:]):
+            return len(previous) - pos
+        pos = previous.find(probe, pos + 1)
+    return 0
+
+
+def strip_overlaps(results: List[Dict]) -> List[Dict]:
+    """
+    Remove from each chunk the text it repeats from the preceding chunk of the
+    same source, when that chunk is also in `results`. Order is preserved.
+    """
+    by_position = {
+        (r["metadata"].get("source"), r["metadata"].get("chunk_index")): r
+        for r in results
+        if isinstance(r.get("metadata", {}).get("chunk_index"), int)
+    }
+    stripped = []
+    for r in results:
+        meta = r.get("metadata", {})
+        previous = by_position.get((meta.get("source"), meta["chunk_index"] - 1)) if isinstance(meta.get("chunk_index"), int) else None
+        if previous is not None:
+            cut = overlap_length(previous["content"], r["content"])
+            if cut:
+                r = {**r, "content": r["content"][cut:].lstrip()}
+        if r["content"]:
+            stripped.append(r)
+    return stripped
+
+
+def prune_context(store, query: str, results: List[Dict], k: int, lambda_mult: float = 0.5) -> Tuple[List[Dict], Dict]:
+    """
+    Select `k` diverse chunks from `results` (MMR over stored embeddings) and
+    strip overlaps between them. Returns the chunks and token statistics.
+    """
+    tokens_before = sum(count_tokens(r["content"]) for r in results)
+
+    vectors = store.embeddings_for([r["id"] for r in results])
+    candidates = [r for r in results if r["id"] in vectors]
+    if len(candidates) > k:
+        picked = mmr_select(store.embeddings.embed_query(query), [vectors[r["id"]] for r in candidates], k, lambda_mult)
+        selected = [candidates[i] for i in picked]
+    else:
+        selected = candidates or results[:k]
+
+    pruned = strip_overlaps(selected)
+    tokens_after = sum(count_tokens(r["content"]) for r in pruned)
+    stats = {
+        "chunks_in": len(results),
+        "chunks_out": len(pruned),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_removed": tokens_before - tokens_after,
+    }
+    return pruned, stats
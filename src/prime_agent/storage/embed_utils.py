@@ -1,8 +1,8 @@
 import time
-import json
 import os
-import hashlib
 import logging
+import threading
+from collections import deque
 from typing import List
 
 # --- HOTFIX START: Patch missing Google API attributes ---
@@ -24,38 +24,14 @@ except Exception as e:
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
+from prime_agent.config import EMBED_MAX_CONCURRENCY, EMBED_MAX_RETRIES
+from prime_agent.storage.embedding_cache import get_embedding_cache
+from prime_agent.utils.rate_limit import call_with_retry, get_limiter
+from prime_agent.utils.text_utils import count_tokens
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
-EMBED_CACHE_PATH = os.path.expanduser("~/.prime_agent_embedding_cache.json")
-
-# Initialize cache file if it doesn't exist
-if not os.path.exists(EMBED_CACHE_PATH):
-    try:
-        with open(EMBED_CACHE_PATH, "w") as f:
-            json.dump({}, f)
-    except Exception as e:
-        logger.warning(f"Failed to create embedding cache at {EMBED_CACHE_PATH}: {e}")
-
-def _cache_load():
-    if not os.path.exists(EMBED_CACHE_PATH):
-        return {}
-    try:
-        with open(EMBED_CACHE_PATH, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.warning(f"Failed to load embedding cache: {e}")
-        return {}
-
-def _cache_save(cache):
-    try:
-        with open(EMBED_CACHE_PATH, "w") as f:
-            json.dump(cache, f)
-    except Exception as e:
-        logger.warning(f"Failed to save embedding cache: {e}")
-
-def _text_key(text: str):
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 def call_embedding_api(texts: List[str]) -> List[List[float]]:
     """
@@ -76,85 +52,83 @@ def embed_texts_with_retry(texts: List[str]) -> List[List[float]]:
     """
     Returns list of embeddings for input texts with proper rate limiting.
     - Uses cache to avoid duplicate embeddings.
-    - Implements batching with delays to respect API rate limits.
-    - Retries with exponential backoff on 429 errors.
+    - Sends batches concurrently, sized and paced by the shared "embeddings"
+      limiter (RPM/TPM buckets; rate, batch size and concurrency grow while
+      requests succeed; rate and concurrency halve on 429s).
+    - Failed batches are retried by the shared policy (call_with_retry):
+      jittered backoff honoring Retry-After, up to EMBED_MAX_RETRIES times,
+      behind the endpoint's circuit breaker.
     """
     if not texts:
         return []
 
-    cache = _cache_load()
+    cache = get_embedding_cache()
     results = [None] * len(texts)
     to_request = []
     request_idxs = []
 
-    # Prepare results and list which to request
+    # Prepare results and list which to request (one cache lookup for the batch)
+    cached = cache.get_many(texts)
     for i, t in enumerate(texts):
-        k = _text_key(t)
-        if k in cache:
-            results[i] = cache[k]
+        if i in cached:
+            results[i] = cached[i]
         else:
             to_request.append(t)
             request_idxs.append(i)
 
     logger.info(f"Embedding: {len(texts)-len(to_request)} cached, {len(to_request)} to request")
-    
+
     if to_request:
-        # Ultra-safe: Process 1 at a time with longer delays
-        BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "1"))
-        SLEEP_TIME = float(os.getenv("EMBED_BATCH_SLEEP", "3.0"))
-        
-        embeddings_response = []
-        total_batches = (len(to_request) + BATCH_SIZE - 1) // BATCH_SIZE
-        
-        for batch_num, i in enumerate(range(0, len(to_request), BATCH_SIZE), 1):
-            batch = to_request[i:i+BATCH_SIZE]
-            logger.info(f"Processing embedding batch {batch_num}/{total_batches} (size={len(batch)})")
-            
-            # Retry logic for this specific batch
-            max_retries = 3
-            for retry_attempt in range(max_retries):
+        limiter = get_limiter("embeddings")
+        embedded = [None] * len(to_request)
+        pending = deque(range(len(to_request)))
+        errors = []
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def worker():
+            while not errors:
+                with lock:
+                    batch = [pending.popleft() for _ in range(min(limiter.batch_size, len(pending)))]
+                if not batch:
+                    return
+                batch_texts = [to_request[i] for i in batch]
                 try:
-                    resp = call_embedding_api(batch)
-                    if not isinstance(resp, list):
+                    resp = call_with_retry(
+                        lambda: call_embedding_api(batch_texts),
+                        limiter,
+                        tokens=sum(count_tokens(t) for t in batch_texts),
+                        max_retries=EMBED_MAX_RETRIES,
+                    )
+                    if not isinstance(resp, list) or len(resp) != len(batch):
                         raise RuntimeError("Unexpected embedding response type")
-                    embeddings_response.extend(resp)
-                    break  # Success, move to next batch
-                    
                 except Exception as e:
-                    error_msg = str(e)
-                    
-                    # Check if it's a rate limit error (429)
-                    if "429" in error_msg or "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-                        if retry_attempt < max_retries - 1:
-                            # Exponential backoff for rate limits
-                            backoff_time = SLEEP_TIME * (2 ** retry_attempt)
-                            logger.warning(f"Rate limit hit. Waiting {backoff_time}s before retry {retry_attempt + 1}/{max_retries}")
-                            time.sleep(backoff_time)
-                        else:
-                            logger.error(f"Failed to embed batch after {max_retries} retries due to rate limits: {e}")
-                            raise
-                    else:
-                        # Non-rate-limit error, log and re-raise
-                        logger.error(f"Error embedding batch: {e}")
-                        raise
-                
-            # Pause between batches to respect rate limits
-            if batch_num < total_batches:  # Don't sleep after the last batch
-                logger.debug(f"Waiting {SLEEP_TIME}s before next batch...")
-                time.sleep(SLEEP_TIME)
-            
-        # store in cache and fill results
+                    logger.error(f"Error embedding batch: {e}")
+                    errors.append(e)
+                    return
+                for i, emb in zip(batch, resp):
+                    embedded[i] = emb
+
+        threads = [threading.Thread(target=worker, name=f"embed-{n}", daemon=True) for n in range(EMBED_MAX_CONCURRENCY)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Cache whatever succeeded, even if a batch ultimately failed
+        done = [i for i, emb in enumerate(embedded) if emb is not None]
+        cache.put_many([to_request[i] for i in done], [embedded[i] for i in done])
+        if errors:
+            raise errors[0]
+
         for i, idx in enumerate(request_idxs):
-            if i < len(embeddings_response):
-                emb = embeddings_response[i]
-                k = _text_key(texts[idx])
-                cache[k] = emb
-                results[idx] = emb
-            else:
-                logger.error(f"Missing embedding for index {idx}")
-                
-        _cache_save(cache)
-        logger.info(f"Successfully embedded {len(embeddings_response)} new texts")
-        
+            results[idx] = embedded[i]
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Successfully embedded {len(done)} new texts in {elapsed:.1f}s "
+            f"({limiter.rate_limited} rate limits so far, batch={limiter.batch_size}, concurrency={limiter.concurrency})"
+        )
+
     # Filter out any Nones if something went wrong
     return [r for r in results if r is not None]
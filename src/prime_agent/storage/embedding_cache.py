@@ -0,0 +1,198 @@
+"""
+SQLite cache of text embeddings, keyed by (model, SHA-256 of the text).
+
+Vectors are stored as packed float32 blobs. The database runs in WAL mode, so
+any number of readers proceed while a writer commits, and several processes can
+share one file. Lookups and inserts for a whole batch each take one round trip,
+and a running byte total (kept by triggers) drives least-recently-used eviction
+without scanning the table.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from prime_agent.config import EMBED_CACHE_PATH, EMBED_CACHE_MAX_BYTES
+
+DEFAULT_MODEL = "models/text-embedding-004"
+# The JSON file used before this cache; imported once if present
+LEGACY_JSON_PATH = os.path.expanduser("~/.prime_agent_embedding_cache.json")
+
+# Only refresh last_used on reads when it is older than this, to keep reads write-free
+_TOUCH_INTERVAL = 3600
+# SQLite's default limit on bound parameters is 999
+_MAX_PARAMS = 900
+
+
+def embedding_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: str = EMBED_CACHE_PATH, max_bytes: int = EMBED_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.init_db()
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_db(self):
+        conn = self.get_connection()
+        try:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+            CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_stats (id, total_bytes) VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS embeddings_added AFTER INSERT ON embeddings BEGIN
+                UPDATE cache_stats SET total_bytes = total_bytes + length(NEW.vector) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_removed AFTER DELETE ON embeddings BEGIN
+                UPDATE cache_stats SET total_bytes = total_bytes - length(OLD.vector) WHERE id = 0;
+            END;
+            """)
+            conn.commit()
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM embeddings)").fetchone()[0]
+        finally:
+            conn.close()
+        if empty and os.path.exists(LEGACY_JSON_PATH):
+            self._import_json(LEGACY_JSON_PATH)
+
+    def _import_json(self, path: str):
+        """
+        Import the legacy {sha256(text): [floats]} JSON cache (DEFAULT_MODEL vectors).
+        """
+        try:
+            with open(path, "r") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not import legacy embedding cache {path}: {e}")
+            return
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                ((DEFAULT_MODEL, key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in legacy.items()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Imported {len(legacy)} embeddings from {path}")
+
+    def get_many(self, texts: Sequence[str], model: str = DEFAULT_MODEL) -> Dict[int, List[float]]:
+        """
+        Cached embeddings for `texts`, as {position in texts: vector}.
+        """
+        keys = [embedding_key(t) for t in texts]
+        found: Dict[str, tuple] = {}
+        conn = self.get_connection()
+        try:
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _MAX_PARAMS):
+                part = unique[i:i + _MAX_PARAMS]
+                rows = conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(part))})",
+                    [model, *part],
+                ).fetchall()
+                found.update((key, (vector, last_used)) for key, vector, last_used in rows)
+
+            now = time.time()
+            stale = [(now, model, key) for key, (_, last_used) in found.items() if now - last_used > _TOUCH_INTERVAL]
+            if stale:
+                conn.executemany("UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?", stale)
+                conn.commit()
+        finally:
+            conn.close()
+        return {
+            i: np.frombuffer(found[key][0], dtype=np.float32).tolist()
+            for i, key in enumerate(keys)
+            if key in found
+        }
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], model: str = DEFAULT_MODEL):
+        """
+        Store embeddings for `texts` in one transaction, then evict least
+        recently used entries if the cache is over its size limit.
+        """
+        now = time.time()
+        rows = [
+            (model, embedding_key(t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        if not rows:
+            return
+        conn = self.get_connection()
+        try:
+            # Content-addressed: an existing key already holds the same vector
+            conn.executemany(
+                "INSERT INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(model, key) DO UPDATE SET last_used = excluded.last_used",
+                rows,
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def total_bytes(self) -> int:
+        conn = self.get_connection()
+        try:
+            return conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Free 10% below the limit so eviction is not triggered on every insert
+        target = int(self.max_bytes * 0.9)
+        row_bytes = conn.execute("SELECT length(vector) FROM embeddings LIMIT 1").fetchone()[0] or 1
+        excess = (total - target) // row_bytes + 1
+        conn.execute(
+            "DELETE FROM embeddings WHERE (model, key) IN (SELECT model, key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        logger.info(f"Evicted {excess} embeddings from cache ({total} bytes > {self.max_bytes})")
+
+    def clear(self):
+        conn = self.get_connection()
+        try:
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Return the process-wide embedding cache.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
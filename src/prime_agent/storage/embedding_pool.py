@@ -0,0 +1,162 @@
+"""
+Multi-process sentence-transformer embedding for large ingestion jobs.
+
+Each worker process loads the model once (pool initializer) and is limited to
+its share of the CPU threads, so workers do not oversubscribe the cores. Texts
+are sorted by length and cut into dynamic batches under a token budget, so
+short chunks go in large batches and padding is minimal. Workers write vectors
+straight into a shared-memory output matrix and return only a row count;
+nothing but the input texts is pickled.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+# Padded tokens (longest text in the batch x batch size) per worker task
+_BATCH_TOKENS = 16384
+_MAX_BATCH = 512
+
+_model = None
+
+
+def load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def _init_worker(loader: Callable, model_name: str, threads: int):
+    global _model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _model = loader(model_name)
+
+
+def _dimension() -> int:
+    return int(_model.get_sentence_embedding_dimension())
+
+
+def _encode_into(shm_name: str, shape, rows: List[int], texts: List[str]) -> int:
+    """
+    Embed `texts` into `rows` of the shared (n, dim) float32 matrix. Runs
+    inside worker processes.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[rows] = _model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+        del out
+    finally:
+        shm.close()
+    return len(rows)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Word-piece tokenizers average about 4 characters per token on English text
+    return len(text) // 4 + 2
+
+
+def length_batches(texts: List[str], budget: int = _BATCH_TOKENS, max_batch: int = _MAX_BATCH) -> List[List[int]]:
+    """
+    Indexes of `texts` sorted by length and grouped so that each batch's
+    padded size (longest text x batch size) stays within `budget` tokens.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches, batch = [], []
+    for i in order:
+        # Sorted ascending, so the newest text is the longest in its batch
+        if batch and ((len(batch) + 1) * _estimate_tokens(texts[i]) > budget or len(batch) >= max_batch):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class EmbeddingPool:
+    """
+    Drop-in for the `embed_documents` / `embed_query` interface of the
+    LangChain embeddings, backed by `workers` model processes.
+    """
+    def __init__(self, model_name: str, workers: int, loader: Callable = load_sentence_transformer, batch_tokens: int = _BATCH_TOKENS):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.batch_tokens = batch_tokens
+        self.last_stats: Dict = {}
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        logger.info(f"Starting {self.workers} embedding workers for {model_name} ({threads} threads each)")
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(loader, model_name, threads),
+        )
+        self._dim: Optional[int] = None
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = self._pool.submit(_dimension).result()
+        return self._dim
+
+    def warm_up(self):
+        """
+        Start every worker and load the model in each.
+        """
+        list(self._pool.map(_estimate_tokens, ["warm up"] * self.workers))
+        return self.dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in input order, as an (n, dim) float32 array.
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        start = time.perf_counter()
+        shape = (len(texts), self.dim)
+        # Enough tasks to keep every worker busy even when the budget allows one big batch
+        max_batch = min(_MAX_BATCH, -(-len(texts) // (2 * self.workers)))
+        batches = length_batches(texts, self.batch_tokens, max_batch)
+
+        shm = SharedMemory(create=True, size=max(1, len(texts) * self.dim * 4))
+        try:
+            futures = [self._pool.submit(_encode_into, shm.name, shape, rows, [texts[i] for i in rows]) for rows in batches]
+            done = sum(f.result() for f in futures)
+            vectors = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "chunks": done,
+            "batches": len(batches),
+            "seconds": elapsed,
+            "chunks_per_second": done / elapsed if elapsed else 0.0,
+        }
+        logger.info(f"Embedded {done} chunks in {len(batches)} batches on {self.workers} workers ({self.last_stats['chunks_per_second']:.0f} chunks/s)")
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
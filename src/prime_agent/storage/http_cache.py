@@ -0,0 +1,349 @@
+"""
+Persistent, content-addressed HTTP response cache.
+
+Entries are keyed by canonical URL and stored in a small SQLite index; bodies
+live on disk under their SHA-256, so mirrored pages share one copy. Extracted
+text is stored next to the raw body, letting a cache hit skip both the network
+round trip and HTML parsing.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from loguru import logger
+from requests.structures import CaseInsensitiveDict
+
+from prime_agent.config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTL
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings share a cache entry:
+    lowercase scheme and host, drop default ports and fragments, sort the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def _ttl_from_headers(headers: Dict, default_ttl: float) -> Optional[float]:
+    """
+    Seconds the response stays fresh. None means the response must not be stored.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return float(match.group(1))
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default_ttl
+
+
+class HttpCache:
+    """
+    On-disk response cache with TTL freshness, validators for conditional
+    revalidation and LRU eviction under a total size cap.
+    """
+    def __init__(
+        self,
+        cache_dir: str = HTTP_CACHE_DIR,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+        default_ttl: float = HTTP_CACHE_TTL,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, "index.sqlite")
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def init_db(self):
+        conn = self.get_connection()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            url TEXT PRIMARY KEY,
+            body_hash TEXT,
+            status INTEGER,
+            headers TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL,
+            expires_at REAL,
+            last_access REAL
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS objects (
+            hash TEXT PRIMARY KEY,
+            size INTEGER
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Object files
+    # ------------------------------------------------------------------
+
+    def _object_path(self, body_hash: str, suffix: str) -> str:
+        return os.path.join(self.objects_dir, body_hash[:2], f"{body_hash}.{suffix}")
+
+    def _write_file(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove_object(self, body_hash: str):
+        directory = os.path.dirname(self._object_path(body_hash, "body"))
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if name.startswith(body_hash):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Look up a cached response. Returns None on a miss; otherwise a dict with
+        url, status, headers, content, body_hash, etag, last_modified and 'fresh'.
+        """
+        key = canonical_url(url)
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT body_hash, status, headers, etag, last_modified, expires_at "
+                "FROM entries WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            body_hash, status, headers, etag, last_modified, expires_at = row
+            try:
+                with open(self._object_path(body_hash, "body"), "rb") as f:
+                    content = f.read()
+            except OSError:
+                conn.execute("DELETE FROM entries WHERE url = ?", (key,))
+                conn.commit()
+                return None
+            now = time.time()
+            conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, key))
+            conn.commit()
+        finally:
+            conn.close()
+
+        return {
+            "url": url,
+            "status": status,
+            "headers": CaseInsensitiveDict(json.loads(headers)),
+            "content": content,
+            "body_hash": body_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": now < expires_at,
+        }
+
+    def put(self, url: str, status: int, headers: Dict, content: bytes) -> Optional[str]:
+        """
+        Store a response. Returns the body hash, or None if the response is not cacheable.
+        """
+        ttl = _ttl_from_headers(headers, self.default_ttl)
+        if status != 200 or ttl is None:
+            return None
+
+        body_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._object_path(body_hash, "body")
+        if not os.path.exists(body_path):
+            self._write_file(body_path, content)
+
+        now = time.time()
+        with self._lock:
+            conn = self.get_connection()
+            try:
+                previous = conn.execute(
+                    "SELECT body_hash FROM entries WHERE url = ?", (canonical_url(url),)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR IGNORE INTO objects (hash, size) VALUES (?, ?)",
+                    (body_hash, len(content)),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(url, body_hash, status, headers, etag, last_modified, fetched_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        canonical_url(url),
+                        body_hash,
+                        status,
+                        json.dumps(dict(headers)),
+                        headers.get("ETag"),
+                        headers.get("Last-Modified"),
+                        now,
+                        now + ttl,
+                        now,
+                    ),
+                )
+                if previous and previous[0] != body_hash:
+                    self._drop_if_unused(conn, previous[0])
+                conn.commit()
+                self._evict(conn)
+            finally:
+                conn.close()
+        return body_hash
+
+    def refresh(self, url: str, headers: Dict):
+        """
+        Extend freshness after a 304 Not Modified revalidation.
+        """
+        ttl = _ttl_from_headers(headers, self.default_ttl) or 0.0
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ?, expires_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (now, now + ttl, now, headers.get("ETag"), headers.get("Last-Modified"), canonical_url(url)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Extracted text
+    # ------------------------------------------------------------------
+
+    def get_text(self, body_hash: str, kind: str = "text") -> Optional[str]:
+        """
+        Return previously extracted text for a body, if any.
+        `kind` distinguishes extractors (e.g. full-page text vs. main content).
+        """
+        try:
+            with open(self._object_path(body_hash, f"{kind}.txt"), "rb") as f:
+                return f.read().decode("utf-8")
+        except OSError:
+            return None
+
+    def put_text(self, body_hash: str, text: str, kind: str = "text"):
+        """
+        Store extracted text next to the raw body.
+        """
+        data = text.encode("utf-8")
+        path = self._object_path(body_hash, f"{kind}.txt")
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._write_file(path, data)
+        conn = self.get_connection()
+        try:
+            conn.execute(
+                "UPDATE objects SET size = size + ? WHERE hash = ?",
+                (len(data) - previous_size, body_hash),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def total_bytes(self) -> int:
+        conn = self.get_connection()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _drop_if_unused(self, conn, body_hash: str) -> int:
+        """
+        Delete a body and its extracted text once no entry references it.
+        Returns the number of bytes freed.
+        """
+        still_used = conn.execute(
+            "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)
+        ).fetchone()
+        if still_used:
+            return 0
+        size_row = conn.execute("SELECT size FROM objects WHERE hash = ?", (body_hash,)).fetchone()
+        conn.execute("DELETE FROM objects WHERE hash = ?", (body_hash,))
+        self._remove_object(body_hash)
+        return size_row[0] if size_row else 0
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = conn.execute("SELECT url, body_hash FROM entries ORDER BY last_access ASC").fetchall()
+        for url, body_hash in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            evicted += 1
+            total -= self._drop_if_unused(conn, body_hash)
+        conn.commit()
+        logger.info(f"HTTP cache evicted {evicted} entries (now {total} bytes)")
+
+    def clear(self):
+        conn = self.get_connection()
+        try:
+            hashes = [row[0] for row in conn.execute("SELECT hash FROM objects")]
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM objects")
+            conn.commit()
+        finally:
+            conn.close()
+        for body_hash in hashes:
+            self._remove_object(body_hash)
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """
+    Return the process-wide HTTP cache.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
@@ -0,0 +1,68 @@
+"""
+Hybrid lexical + dense retrieval.
+
+A HybridRetriever pairs a vector store with a BM25 index over the same chunks
+(built from the store once, then kept in sync through `attach_index`) and
+merges the two rankings with reciprocal rank fusion, so exact-term matches
+such as acronyms and product names surface next to semantic matches.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from prime_agent.config import HYBRID_CANDIDATES, RRF_K
+from prime_agent.storage.bm25 import BM25Index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """
+    Merge ranked id lists: each id scores sum(1 / (k + rank)) over the lists
+    it appears in. Returns ids best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    def __init__(self, store, candidates: int = HYBRID_CANDIDATES, rrf_k: int = RRF_K):
+        self.store = store
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.index = BM25Index()
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _ensure_index(self):
+        # Built on first use from whatever the store already holds (e.g. a persisted corpus)
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            # Attach before the scan so writes made meanwhile are not missed;
+            # re-adding a chunk the scan also returns just replaces it
+            self.store.attach_index(self.index)
+            for ids, texts, metadata in self.store.iter_documents():
+                self.index.add(ids, texts, metadata)
+            self._ready = True
+            logger.info(f"Built BM25 index over {len(self.index)} chunks")
+
+    def search(self, query: str, k: int = 10, filter: Optional[Dict] = None) -> List[Dict]:
+        """
+        Top-k chunks by reciprocal rank fusion of dense and BM25 rankings.
+        Same result dicts as VectorStore.search.
+        """
+        self._ensure_index()
+        dense = self.store.search(query, k=self.candidates, filter=filter)
+        lexical = self.index.search(query, k=self.candidates, filter=filter)
+
+        fused = reciprocal_rank_fusion([[r["id"] for r in dense], [id for id, _ in lexical]], self.rrf_k)[:k]
+        by_id = {r["id"]: r for r in dense}
+        missing = [id for id in fused if id not in by_id]
+        for r in self.store.get(missing):
+            by_id[r["id"]] = r
+        return [by_id[id] for id in fused if id in by_id]
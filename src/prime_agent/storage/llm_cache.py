@@ -0,0 +1,184 @@
+"""
+SQLite cache of LLM responses.
+
+Entries are keyed by a SHA-256 of (model, messages, schema, temperature), so an
+identical request is answered from disk instead of the API. Entries expire
+after LLM_CACHE_TTL seconds, and the least recently used ones are evicted above
+LLM_CACHE_MAX_BYTES (a trigger-maintained running total, as in the embedding
+cache). Hits and misses are counted per process for `stats`.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from prime_agent.config import LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH, LLM_CACHE_TTL
+
+
+def llm_cache_key(model: str, messages: List[Tuple[str, str]], schema: Optional[Dict] = None, temperature: Optional[float] = None) -> str:
+    """
+    Hash of everything that determines a response; `messages` are (role, content) pairs.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "schema": schema, "temperature": temperature},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, db_path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES, ttl: float = LLM_CACHE_TTL):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_db(self):
+        conn = self.get_connection()
+        try:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+            CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_stats (id, total_bytes) VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN
+                UPDATE cache_stats SET total_bytes = total_bytes + length(NEW.response) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_replaced AFTER UPDATE OF response ON responses BEGIN
+                UPDATE cache_stats SET total_bytes = total_bytes - length(OLD.response) + length(NEW.response) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN
+                UPDATE cache_stats SET total_bytes = total_bytes - length(OLD.response) WHERE id = 0;
+            END;
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Cached response for `key`, or None if missing or expired.
+        """
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and row[1] <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            elif row:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+        finally:
+            conn.close()
+        self._count(row is not None)
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, response: str, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        conn = self.get_connection()
+        try:
+            conn.execute(
+                "INSERT INTO responses (key, model, response, created_at, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET response = excluded.response, created_at = excluded.created_at, "
+                "expires_at = excluded.expires_at, last_used = excluded.last_used",
+                (key, model, response, now, expires_at, now),
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def total_bytes(self) -> int:
+        conn = self.get_connection()
+        try:
+            return conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        expired = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+        # Free 10% below the limit so eviction is not triggered on every insert
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0] > target:
+            deleted = conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT 32)"
+            ).rowcount
+            if not deleted:
+                break
+            evicted += deleted
+        conn.commit()
+        logger.info(f"Evicted {expired} expired and {evicted} least recently used LLM responses ({total} bytes > {self.max_bytes})")
+
+    def stats(self) -> Dict:
+        conn = self.get_connection()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            total = conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+        finally:
+            conn.close()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def clear(self):
+        conn = self.get_connection()
+        try:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Return the process-wide LLM response cache.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,74 @@
+"""
+Chroma-style metadata filters evaluated as NumPy boolean masks.
+
+Used by the in-process indexes (numpy vector index, BM25) so that both accept
+the same `filter` dicts as the Chroma-backed VectorStore.
+"""
+import json
+from typing import Dict, List
+
+import numpy as np
+
+
+class MetadataMasks:
+    """
+    Boolean row masks over a list of metadata dicts. Equality masks are cached
+    per (key, value); call `invalidate` after the list changes.
+    """
+    def __init__(self, metadata: List[Dict]):
+        self.metadata = metadata
+        self._cache: Dict = {}
+
+    def invalidate(self):
+        self._cache = {}
+
+    def _value_mask(self, key: str, value) -> np.ndarray:
+        cache_key = (key, json.dumps(value))
+        mask = self._cache.get(cache_key)
+        if mask is None or len(mask) != len(self.metadata):
+            mask = np.fromiter(((m or {}).get(key) == value for m in self.metadata), dtype=bool, count=len(self.metadata))
+            self._cache[cache_key] = mask
+        return mask
+
+    def mask(self, where: Dict) -> np.ndarray:
+        """
+        Mask for {"key": value}, {"key": {"$op": value}} with
+        $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, and $and/$or of those.
+        """
+        n = len(self.metadata)
+        mask = np.ones(n, dtype=bool)
+        for key, cond in where.items():
+            if key == "$and":
+                for sub in cond:
+                    mask &= self.mask(sub)
+                continue
+            if key == "$or":
+                any_mask = np.zeros(n, dtype=bool)
+                for sub in cond:
+                    any_mask |= self.mask(sub)
+                mask &= any_mask
+                continue
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            for op, value in cond.items():
+                if op == "$eq":
+                    mask &= self._value_mask(key, value)
+                elif op == "$ne":
+                    mask &= ~self._value_mask(key, value)
+                elif op in ("$in", "$nin"):
+                    hit = np.zeros(n, dtype=bool)
+                    for v in value:
+                        hit |= self._value_mask(key, v)
+                    mask &= hit if op == "$in" else ~hit
+                elif op in ("$gt", "$gte", "$lt", "$lte"):
+                    compare = {
+                        "$gt": lambda x: x > value, "$gte": lambda x: x >= value,
+                        "$lt": lambda x: x < value, "$lte": lambda x: x <= value,
+                    }[op]
+                    mask &= np.fromiter(
+                        (isinstance((m or {}).get(key), (int, float)) and compare(m[key]) for m in self.metadata),
+                        dtype=bool, count=n,
+                    )
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
@@ -0,0 +1,566 @@
+"""
+Memory-mapped NumPy vector index.
+
+A drop-in alternative to the Chroma-backed VectorStore (same methods, same
+result dicts). Embeddings are L2-normalised and appended to a flat on-disk
+matrix that is memory-mapped for search, optionally quantised to float16 or
+int8 (per-row scale). Search is a blocked matrix-vector product followed by
+`argpartition`; metadata filters are evaluated as cached boolean masks (see
+metadata_filter). Documents and metadata live in an append-only JSON-lines
+log, so upserts and deletes never rewrite the matrix until `compact`.
+
+Layout of an index directory:
+    manifest.json   dim, dtype and generation
+    vectors.bin     rows of `dim` values in the storage dtype
+    scales.bin      float32 per-row scales (int8 only)
+    log.jsonl       {"op": "put", "id", "row", "document", "metadata"} / {"op": "del", "id"}
+
+`compact` writes the next generation of the data files (vectors.<n>.bin etc.)
+beside the current one and switches to it by replacing the manifest, so a
+crash leaves either the old files or the new ones in use, never a mix.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from prime_agent.config import EMBED_POOL_MIN_TEXTS, NUMPY_INDEX_DIR, NUMPY_INDEX_DTYPE, VECTOR_COMPACT_THRESHOLD
+from prime_agent.storage.metadata_filter import MetadataMasks
+from prime_agent.storage.registry import DEFAULT_COLLECTION, embed_bulk, get_embeddings
+from prime_agent.storage.source_index import SourceIndex
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Rows scored per block. Small enough that the float32 copy of a quantised
+# block stays in cache (~3 MB at 384 dims), which is faster than converting the whole matrix.
+_BLOCK_ROWS = 2048
+# Queries scored together; bounds the (queries x rows) score matrix
+_QUERY_BATCH = 64
+
+_DATA_FILES = ("vectors.bin", "scales.bin", "log.jsonl")
+# Any generation of a data file: vectors.bin, vectors.3.bin, log.3.jsonl, ...
+_DATA_FILE = re.compile(r"(vectors|scales)(\.\d+)?\.bin|log(\.\d+)?\.jsonl")
+
+
+def _complete_length(f) -> int:
+    """
+    Bytes of the open binary file `f` up to and including its last newline.
+    """
+    pos = f.seek(0, os.SEEK_END)
+    while pos > 0:
+        step = min(pos, 4096)
+        f.seek(pos - step)
+        newline = f.read(step).rfind(b"\n")
+        if newline >= 0:
+            return pos - step + newline + 1
+        pos -= step
+    return 0
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class NumpyVectorStore:
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, embeddings=None, directory: Optional[str] = None, dtype: Optional[str] = None):
+        self.embeddings = embeddings or get_embeddings()
+        self.directory = directory or os.path.join(NUMPY_INDEX_DIR, collection_name)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.RLock()
+        # Secondary indexes (e.g. BM25) kept in sync with writes; see attach_index
+        self._indexes = []
+        self._sources: Optional[SourceIndex] = None
+
+        manifest = self._read_manifest()
+        self.dtype = manifest.get("dtype") or dtype or NUMPY_INDEX_DTYPE
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Unknown index dtype: {self.dtype}")
+        if dtype and dtype != self.dtype:
+            logger.warning(f"Index at {self.directory} is {self.dtype}; ignoring requested dtype {dtype}")
+        self.dim = manifest.get("dim")
+        self.generation = manifest.get("generation", 0)
+
+        self._remove_stale_files()
+        self._load()
+        logger.info(f"Opened numpy index '{collection_name}' ({self.dtype}) with {self.count()} chunks")
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _data_path(self, name: str, generation: Optional[int] = None) -> str:
+        """
+        Path of a data file (see _DATA_FILES) in the current or given generation.
+        """
+        generation = self.generation if generation is None else generation
+        if generation:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}.{generation}{ext}"
+        return self._path(name)
+
+    def _remove_stale_files(self):
+        # Leftovers of a compaction interrupted before or after the manifest switch
+        current = {os.path.basename(self._data_path(name)) for name in _DATA_FILES}
+        for entry in os.listdir(self.directory):
+            if entry == "manifest.json.tmp" or (entry not in current and _DATA_FILE.fullmatch(entry)):
+                try:
+                    os.remove(self._path(entry))
+                except FileNotFoundError:
+                    pass
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self._path("manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_manifest(self):
+        # Replaced in one rename: this is also the commit point of `compact`
+        with open(self._path("manifest.json.tmp"), "w") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype, "generation": self.generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._path("manifest.json.tmp"), self._path("manifest.json"))
+
+    def _load(self):
+        """
+        Replay the log into in-memory row tables and map the matrix.
+        """
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadata: List[Dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._text_bytes = 0
+        alive: List[bool] = []
+        self._dead = 0
+
+        if os.path.exists(self._data_path("log.jsonl")):
+            with open(self._data_path("log.jsonl"), "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn line from an interrupted write
+                        continue
+                    if entry["op"] != "put":
+                        self._kill(entry["id"], alive)
+                        continue
+                    row = entry.get("row", len(self._ids))
+                    if row < len(self._ids):
+                        logger.warning(f"Log of {self.directory} reuses row {row}; ignoring the rest of it")
+                        break
+                    # Rows written without a surviving log entry hold no live chunk
+                    while len(self._ids) < row:
+                        alive.append(False)
+                        self._append_row(None, "", {}, alive)
+                    alive.append(False)
+                    self._append_row(entry["id"], entry["document"], entry["metadata"], alive)
+
+        self._alive = np.array(alive, dtype=bool)
+        self._masks = MetadataMasks(self._metadata)
+        self._map()
+
+    def _append_row(self, id: Optional[str], document: str, metadata: Dict, alive):
+        # `alive` already has a slot for the new row; a None id fills a dead row
+        if id is None:
+            self._dead += 1
+        else:
+            self._kill(id, alive)
+            self._row_of[id] = len(self._ids)
+            alive[len(self._ids)] = True
+        self._ids.append(id)
+        self._documents.append(document)
+        self._metadata.append(metadata)
+        self._text_bytes += len(document)
+
+    def _kill(self, id: str, alive) -> bool:
+        row = self._row_of.pop(id, None)
+        if row is None:
+            return False
+        alive[row] = False
+        self._dead += 1
+        return True
+
+    def _append_log(self, entries: List[Dict]):
+        """
+        Append entries to the log. A torn final line left by an interrupted
+        write is cut off first, so it cannot swallow the first new entry.
+        """
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        with open(self._data_path("log.jsonl"), "a+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            complete = _complete_length(f)
+            if complete < end:
+                logger.warning(f"Dropping {end - complete} bytes of a torn log entry in {self.directory}")
+                f.truncate(complete)
+            f.write(data)
+
+    def _map(self):
+        """
+        (Re)map the matrix over the rows recorded in the log. Vectors written
+        without a matching log entry (interrupted append) are ignored.
+        """
+        n = len(self._ids)
+        if n == 0 or not self.dim:
+            self._vectors = np.zeros((0, self.dim or 0), dtype=DTYPES[self.dtype])
+            self._scales = np.ones(0, dtype=np.float32)
+            return
+        self._vectors = np.memmap(self._data_path("vectors.bin"), dtype=DTYPES[self.dtype], mode="r", shape=(n, self.dim))
+        if self.dtype == "int8":
+            self._scales = np.memmap(self._data_path("scales.bin"), dtype=np.float32, mode="r", shape=(n,))
+        else:
+            self._scales = None
+
+    def _encode(self, vectors: np.ndarray):
+        if self.dtype == "int8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(DTYPES[self.dtype]), None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_documents(self, documents, metadata, ids):
+        if len(documents) >= EMBED_POOL_MIN_TEXTS:
+            # Large jobs are embedded up front (across worker processes, see registry.embed_bulk)
+            self.add_embeddings(documents, embed_bulk(self.embeddings, documents), metadata, ids)
+            return
+        batch = 32
+        for i in range(0, len(documents), batch):
+            chunk = documents[i:i+batch]
+            self.add_embeddings(chunk, self.embeddings.embed_documents(chunk), metadata[i:i+batch], ids[i:i+batch])
+
+    def embed_documents(self, documents):
+        """
+        Embed texts without storing them (see `add_embeddings`).
+        """
+        return embed_bulk(self.embeddings, documents)
+
+    def add_embeddings(self, documents, embeddings, metadata, ids):
+        """
+        Append (or replace) chunks whose embeddings were computed separately.
+        """
+        if not documents:
+            return
+        vectors = _normalize(embeddings)
+        with self._lock:
+            if not self.dim:
+                self.dim = int(vectors.shape[1])
+                self._write_manifest()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            data, scales = self._encode(vectors)
+            start = len(self._ids)
+            # Vectors first, log second: a crash in between leaves unreferenced rows, never dangling ones
+            with open(self._data_path("vectors.bin"), "r+b" if start else "wb") as f:
+                f.seek(start * self.dim * data.itemsize)
+                f.write(data.tobytes())
+            if scales is not None:
+                with open(self._data_path("scales.bin"), "r+b" if start else "wb") as f:
+                    f.seek(start * 4)
+                    f.write(scales.tobytes())
+
+            self._append_log([
+                {"op": "put", "id": id, "row": start + i, "document": document, "metadata": meta}
+                for i, (id, document, meta) in enumerate(zip(ids, documents, metadata))
+            ])
+            alive = np.concatenate([self._alive, np.zeros(len(ids), dtype=bool)])
+            for id, document, meta in zip(ids, documents, metadata):
+                self._append_row(id, document, meta, alive)
+            self._alive = alive
+            self._masks.invalidate()
+            self._map()
+        for index in self._indexes:
+            index.add(ids, documents, metadata)
+
+    def attach_index(self, index):
+        """
+        Keep a secondary index in sync: it receives add(ids, texts, metadata),
+        remove(ids) and clear() for every write to this store.
+        """
+        self._indexes.append(index)
+
+    def get(self, ids: List[str]) -> List[Dict]:
+        """
+        Live chunks by id, as search-style result dicts (missing ids are skipped).
+        """
+        with self._lock:
+            rows = [self._row_of[id] for id in ids if id in self._row_of]
+            return [{"content": self._documents[r], "metadata": self._metadata[r], "id": self._ids[r]} for r in rows]
+
+    def _source_index(self) -> SourceIndex:
+        """
+        Source -> chunk ids index, built from the stored chunks on first use
+        and kept in sync with writes afterwards.
+        """
+        with self._lock:
+            if self._sources is None:
+                index = SourceIndex()
+                for ids, texts, metadata in self.iter_documents():
+                    index.add(ids, texts, metadata)
+                self.attach_index(index)
+                self._sources = index
+            return self._sources
+
+    def get_by_metadata(self, where: Dict, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Live chunks matching a metadata filter, without embedding or similarity
+        search. {"source": ...} lookups go through the source index and come
+        back in chunk order.
+        """
+        if set(where) == {"source"} and not isinstance(where["source"], dict):
+            return self.get(self._source_index().ids(where["source"], limit))
+        with self._lock:
+            rows = np.flatnonzero(self._alive & self._filter_mask(where))[:limit]
+            return [{"content": self._documents[r], "metadata": self._metadata[r], "id": self._ids[r]} for r in rows]
+
+    def sample_by_source(self, sources: List[str], n: int = 1, spread: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Up to `n` chunks per source, as {source: results}: the first `n`, or
+        with `spread` `n` chunks evenly spaced through the source. Nothing is
+        embedded.
+        """
+        index = self._source_index()
+        return {source: self.get(index.ids(source, n, spread)) for source in sources}
+
+    def embeddings_for(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Stored (normalised, dequantised) embeddings of live chunks, as {id: vector}.
+        """
+        with self._lock:
+            found = [(id, self._row_of[id]) for id in ids if id in self._row_of]
+            if not found:
+                return {}
+            rows = [r for _, r in found]
+            vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+            if self._scales is not None:
+                vectors *= np.asarray(self._scales[rows])[:, None]
+            return {id: v for (id, _), v in zip(found, vectors)}
+
+    def iter_documents(self, batch_size: int = 1000):
+        """
+        Yield (ids, texts, metadata) batches of all live chunks.
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            ids, documents, metadata = self._ids, self._documents, self._metadata
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            yield [ids[r] for r in batch], [documents[r] for r in batch], [metadata[r] for r in batch]
+
+    def existing(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Live chunks among `ids`, as {id: text}.
+        """
+        with self._lock:
+            return {id: self._documents[self._row_of[id]] for id in ids if id in self._row_of}
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> int:
+        """
+        Delete chunks by id or metadata filter. Rows are only masked out;
+        `compact` rewrites the files once VECTOR_COMPACT_THRESHOLD accumulate.
+        Returns the number of chunks deleted.
+        """
+        if ids is None and where is None:
+            return 0
+        with self._lock:
+            mask = self._alive.copy()
+            if where is not None:
+                mask &= self._filter_mask(where)
+            if ids is not None:
+                selected = np.zeros(len(self._ids), dtype=bool)
+                selected[[self._row_of[id] for id in ids if id in self._row_of]] = True
+                mask &= selected
+            victims = [self._ids[row] for row in np.flatnonzero(mask)]
+            if not victims:
+                return 0
+
+            self._append_log([{"op": "del", "id": id} for id in victims])
+            for id in victims:
+                self._kill(id, self._alive)
+            for index in self._indexes:
+                index.remove(victims)
+            if self._dead >= VECTOR_COMPACT_THRESHOLD:
+                self.compact()
+            return len(victims)
+
+    def compact(self) -> int:
+        """
+        Rewrite the matrix and log without dead rows. Returns how many were dropped.
+        """
+        with self._lock:
+            dropped = self._dead
+            if not dropped:
+                return 0
+            rows = np.flatnonzero(self._alive)
+            data = np.ascontiguousarray(self._vectors[rows])
+            scales = np.ascontiguousarray(self._scales[rows]) if self._scales is not None else None
+            entries = [
+                {"op": "put", "id": self._ids[row], "row": i, "document": self._documents[row], "metadata": self._metadata[row]}
+                for i, row in enumerate(rows)
+            ]
+
+            # Write the next generation beside the current one, then switch to it
+            # with the manifest; the old files stay valid until that rename
+            old, new = self.generation, self.generation + 1
+            files = {"vectors.bin": data.tobytes(), "log.jsonl": "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")}
+            if scales is not None:
+                files["scales.bin"] = scales.tobytes()
+            for name, content in files.items():
+                with open(self._data_path(name, new), "wb") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._vectors = self._scales = None
+            self.generation = new
+            try:
+                self._write_manifest()
+            except BaseException:
+                self.generation = old
+                self._load()
+                raise
+            for name in _DATA_FILES:
+                try:
+                    os.remove(self._data_path(name, old))
+                except FileNotFoundError:
+                    pass
+            self._load()
+            logger.info(f"Compacted numpy index: dropped {dropped} rows")
+            return dropped
+
+    def count(self) -> int:
+        """
+        Number of live chunks.
+        """
+        return len(self._row_of)
+
+    def clear(self):
+        with self._lock:
+            self._vectors = self._scales = None
+            for path in [self._data_path(name) for name in _DATA_FILES] + [self._path("manifest.json")]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.dim = None
+            self.generation = 0
+            self._load()
+            for index in self._indexes:
+                index.clear()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _filter_mask(self, where: Dict) -> np.ndarray:
+        return self._masks.mask(where)
+
+    def search_many_by_vector(self, embeddings, k=5, filters=None) -> List[List[Dict]]:
+        """
+        Top-k for several query vectors in one pass over the matrix: each block
+        is read (and dequantised) once and scored against all queries with a
+        matrix product. `filters` is one filter for all queries or a list with
+        one per query.
+        """
+        queries = _normalize(embeddings).reshape(-1, self.dim or np.shape(embeddings)[-1])
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+        if len(queries) > _QUERY_BATCH:
+            results = []
+            for i in range(0, len(queries), _QUERY_BATCH):
+                results += self.search_many_by_vector(queries[i:i + _QUERY_BATCH], k, filters[i:i + _QUERY_BATCH])
+            return results
+        with self._lock:
+            vectors, scales, alive = self._vectors, self._scales, self._alive
+            masks = {}
+            for f in filters:
+                key = json.dumps(f, sort_keys=True)
+                if key not in masks:
+                    masks[key] = alive & self._filter_mask(f) if f else alive
+            ids, documents, metadata = self._ids, self._documents, self._metadata
+
+        n = len(alive)
+        if n == 0 or k <= 0:
+            return [[] for _ in queries]
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, _BLOCK_ROWS):
+            block = vectors[start:start + _BLOCK_ROWS]
+            if block.dtype != np.float32:
+                block = block.astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if scales is not None:
+            scores *= scales
+
+        results = []
+        for row_scores, f in zip(scores, filters):
+            mask = masks[json.dumps(f, sort_keys=True)]
+            row_scores[~mask] = -np.inf
+            top_k = min(k, int(mask.sum()))
+            if top_k == 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row_scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-row_scores[top])]
+            results.append([
+                {
+                    "content": documents[row],
+                    "metadata": metadata[row],
+                    "id": ids[row],
+                    "score": float(row_scores[row]),
+                }
+                for row in top
+            ])
+        return results
+
+    def search_by_vector(self, embedding, k=5, filter=None):
+        return self.search_many_by_vector([embedding], k=k, filters=[filter])[0]
+
+    def search(self, query, k=5, filter=None):
+        return self.search_by_vector(self.embeddings.embed_query(query), k=k, filter=filter)
+
+    def search_many(self, queries: List[str], k=5, filters=None) -> List[List[Dict]]:
+        """
+        Search several queries with one embedding batch and one scoring pass.
+        """
+        if not queries:
+            return []
+        return self.search_many_by_vector(self.embeddings.embed_documents(list(queries)), k=k, filters=filters)
+
+    def memory_bytes(self) -> int:
+        """
+        Memory held by this index: the mapped matrix plus documents kept in
+        RAM and the secondary indexes attached to it.
+        """
+        attached = sum(index.memory_bytes() for index in self._indexes if hasattr(index, "memory_bytes"))
+        return self.nbytes() + self._text_bytes + attached
+
+    def close(self):
+        """
+        Release the memory map; the data stays on disk for the next handle.
+        """
+        with self._lock:
+            self._vectors = self._scales = None
+
+    def nbytes(self) -> int:
+        """
+        Size of the vector matrix (and scales) in bytes.
+        """
+        size = self._vectors.nbytes if self._vectors is not None else 0
+        if self._scales is not None:
+            size += self._scales.nbytes
+        return size
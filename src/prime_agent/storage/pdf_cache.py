@@ -0,0 +1,84 @@
+"""
+SQLite cache of extracted PDF page text, keyed by (file SHA-256, page number).
+"""
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from prime_agent.config import PDF_CACHE_PATH
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfPageCache:
+    """
+    Stores the text of each extracted page so re-uploaded files skip extraction.
+    """
+    def __init__(self, db_path: str = PDF_CACHE_PATH):
+        self.db_path = db_path
+        self.init_db()
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def init_db(self):
+        conn = self.get_connection()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_pages (
+            file_hash TEXT,
+            page_number INTEGER,
+            text TEXT,
+            PRIMARY KEY (file_hash, page_number)
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def get_pages(self, file_hash: str) -> Dict[int, str]:
+        """
+        Return {page_number: text} for every cached page of a file.
+        """
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT page_number, text FROM pdf_pages WHERE file_hash = ?", (file_hash,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def put_pages(self, file_hash: str, pages: Iterable[Tuple[int, str]]):
+        conn = self.get_connection()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pdf_pages (file_hash, page_number, text) VALUES (?, ?, ?)",
+                [(file_hash, number, text) for number, text in pages],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_cache: Optional[PdfPageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PdfPageCache:
+    """
+    Return the process-wide PDF page cache.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PdfPageCache()
+    return _cache
@@ -0,0 +1,315 @@
+"""
+Process-wide registry of heavy storage resources.
+
+The sentence-transformer embedding model and the Chroma client are created
+lazily, once per process, and shared by every agent; large embedding jobs go
+to a pool of model worker processes (`embed_bulk`). VectorStore handles are
+cached per collection (one collection per session, see `session_collection`)
+with last-access times; idle or least recently used collections are evicted to
+stay under VECTOR_RAM_BUDGET, and `status` reports current index memory.
+Callers hold a collection with `pinned` while they use it, so it is never
+evicted from under them.
+`warm_up` preloads everything (e.g. at Streamlit start) and `shutdown`
+releases it.
+"""
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import chromadb
+from chromadb.config import Settings
+from langchain_huggingface import HuggingFaceEmbeddings
+from loguru import logger
+
+from prime_agent.config import (
+    CHROMA_PATH, CHROMA_PERSIST, EMBED_POOL_MIN_TEXTS, EMBED_WORKERS, VECTOR_BACKEND,
+    VECTOR_RAM_BUDGET, VECTOR_SESSION_IDLE_SECONDS, VECTOR_SPILL_DIR,
+)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_COLLECTION = "prime_docs"
+
+_lock = threading.RLock()
+_embeddings = None
+_embedding_pool = None
+_client = None
+_stores: Dict[str, object] = {}
+_retrievers: Dict[str, object] = {}
+_last_access: Dict[str, float] = {}
+_pins: Dict[str, int] = {}
+_spill_client = None
+
+
+def get_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Shared embedding model (CPU only); weights are loaded on first use.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                logger.info(f"Loading embedding model {EMBEDDING_MODEL}")
+                _embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    return _embeddings
+
+
+def get_embedding_pool():
+    """
+    Shared pool of EMBED_WORKERS embedding processes, started on first use.
+    """
+    global _embedding_pool
+    if _embedding_pool is None:
+        with _lock:
+            if _embedding_pool is None:
+                from prime_agent.storage.embedding_pool import EmbeddingPool
+                _embedding_pool = EmbeddingPool(EMBEDDING_MODEL, EMBED_WORKERS)
+    return _embedding_pool
+
+
+def embed_bulk(embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed with `embeddings`, or with the worker pool when `embeddings` is the
+    shared model and the job is large enough to pay for the extra processes.
+    """
+    if embeddings is _embeddings and EMBED_WORKERS > 1 and len(texts) >= EMBED_POOL_MIN_TEXTS:
+        return get_embedding_pool().embed_documents(texts)
+    return embeddings.embed_documents(texts)
+
+
+def _make_client():
+    if CHROMA_PERSIST:
+        logger.info(f"🟩 Starting Chroma in PERSISTENT MODE at {CHROMA_PATH}")
+        return chromadb.PersistentClient(path=CHROMA_PATH, settings=Settings(
+            allow_reset=True,
+            anonymized_telemetry=False,
+            # Let Chroma unload cold collection segments under the same budget
+            chroma_segment_cache_policy="LRU",
+            chroma_memory_limit_bytes=VECTOR_RAM_BUDGET
+        ))
+
+    logger.info("🟦 Starting Chroma in EPHEMERAL MODE (RAM Only)")
+    # We REMOVED 'chroma_api_impl' because it causes crashes.
+    # is_persistent=False tells Chroma to run in RAM.
+    return chromadb.EphemeralClient(settings=Settings(
+        is_persistent=False,
+        allow_reset=True,
+        anonymized_telemetry=False
+    ))
+
+
+def get_chroma_client():
+    """
+    Shared Chroma client: on disk at CHROMA_PATH when CHROMA_PERSIST is set,
+    in memory otherwise.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _make_client()
+    return _client
+
+
+def _get_spill_client():
+    global _spill_client
+    if _spill_client is None:
+        _spill_client = chromadb.PersistentClient(path=VECTOR_SPILL_DIR, settings=Settings(
+            allow_reset=True,
+            anonymized_telemetry=False
+        ))
+    return _spill_client
+
+
+def session_collection(session_id: Optional[str]) -> str:
+    """
+    Collection holding one session's chunks (the shared default without a session).
+    """
+    if not session_id:
+        return DEFAULT_COLLECTION
+    return "session_" + re.sub(r"[^A-Za-z0-9_-]", "", session_id)[:48]
+
+
+def _open_store(collection_name: str):
+    if VECTOR_BACKEND == "numpy":
+        from prime_agent.storage.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(collection_name=collection_name)
+
+    from prime_agent.storage.vector_store import VectorStore
+    store = VectorStore(collection_name=collection_name)
+    if not store.persistent and store.count() == 0 and os.path.isdir(VECTOR_SPILL_DIR):
+        # Restore a collection spilled to disk by an earlier eviction
+        try:
+            _get_spill_client().get_collection(collection_name)
+        except Exception:
+            return store
+        saved = VectorStore(collection_name=collection_name, client=_get_spill_client())
+        restored = saved.copy_to(get_chroma_client())
+        saved.drop()
+        logger.info(f"Restored {restored} chunks of '{collection_name}' from spill")
+    return store
+
+
+def get_vector_store(collection_name: str = DEFAULT_COLLECTION):
+    """
+    Shared VectorStore handle for a collection, on the configured VECTOR_BACKEND.
+    Opening a new collection may evict others (see `enforce_budget`).
+    """
+    store = _stores.get(collection_name)
+    opened = False
+    if store is None:
+        with _lock:
+            store = _stores.get(collection_name)
+            if store is None:
+                store = _open_store(collection_name)
+                _stores[collection_name] = store
+                opened = True
+    _last_access[collection_name] = time.time()
+    if opened:
+        enforce_budget(keep=collection_name)
+    return store
+
+
+@contextmanager
+def pinned(collection_name: str = DEFAULT_COLLECTION) -> Iterator[object]:
+    """
+    Shared VectorStore handle for a collection that is not evicted until the
+    block exits. Pins nest and count per caller; leaving the block counts as
+    an access for the idle timeout.
+    """
+    with _lock:
+        _pins[collection_name] = _pins.get(collection_name, 0) + 1
+    try:
+        yield get_vector_store(collection_name)
+    finally:
+        with _lock:
+            count = _pins.pop(collection_name, 0) - 1
+            if count > 0:
+                _pins[collection_name] = count
+            if collection_name in _stores:
+                _last_access[collection_name] = time.time()
+
+
+def _evict(collection_name: str):
+    """
+    Drop a cached collection. In-memory Chroma collections are copied to the
+    spill directory first; on-disk ones are simply closed. Caller holds _lock.
+    """
+    store = _stores.pop(collection_name, None)
+    _retrievers.pop(collection_name, None)
+    _last_access.pop(collection_name, None)
+    if store is None:
+        return
+    if getattr(store, "persistent", True):
+        if hasattr(store, "close"):
+            store.close()
+        logger.info(f"Evicted collection '{collection_name}' (kept on disk)")
+        return
+    spilled = store.copy_to(_get_spill_client())
+    store.drop()
+    logger.info(f"Evicted collection '{collection_name}' (spilled {spilled} chunks to disk)")
+
+
+def enforce_budget(keep: Optional[str] = None) -> int:
+    """
+    Evict collections idle for longer than VECTOR_SESSION_IDLE_SECONDS, then
+    least recently used ones until estimated index memory fits
+    VECTOR_RAM_BUDGET. `keep` and pinned collections are never evicted.
+    Returns the number evicted.
+    """
+    evicted = 0
+    with _lock:
+        now = time.time()
+        for name in list(_stores):
+            if name == keep or name in _pins:
+                continue
+            if now - _last_access.get(name, 0) > VECTOR_SESSION_IDLE_SECONDS:
+                _evict(name)
+                evicted += 1
+
+        usage = {name: store.memory_bytes() for name, store in _stores.items()}
+        total = sum(usage.values())
+        for name in sorted(usage, key=lambda n: _last_access.get(n, 0)):
+            if total <= VECTOR_RAM_BUDGET:
+                break
+            if name == keep or name in _pins:
+                continue
+            _evict(name)
+            total -= usage[name]
+            evicted += 1
+    return evicted
+
+
+def status() -> Dict:
+    """
+    Open collections with their chunk counts, estimated memory and idle time.
+    """
+    now = time.time()
+    with _lock:
+        collections: List[Dict] = [
+            {
+                "collection": name,
+                "chunks": store.count(),
+                "memory_bytes": store.memory_bytes(),
+                "idle_seconds": round(now - _last_access.get(name, now), 1),
+                "pinned": name in _pins,
+            }
+            for name, store in _stores.items()
+        ]
+    return {
+        "backend": VECTOR_BACKEND,
+        "collections": sorted(collections, key=lambda c: c["idle_seconds"]),
+        "total_memory_bytes": sum(c["memory_bytes"] for c in collections),
+        "budget_bytes": VECTOR_RAM_BUDGET,
+    }
+
+
+def get_retriever(collection_name: str = DEFAULT_COLLECTION):
+    """
+    Shared hybrid (BM25 + dense) retriever over a collection's VectorStore.
+    """
+    retriever = _retrievers.get(collection_name)
+    if retriever is None:
+        with _lock:
+            retriever = _retrievers.get(collection_name)
+            if retriever is None:
+                from prime_agent.storage.hybrid import HybridRetriever
+                retriever = HybridRetriever(get_vector_store(collection_name))
+                _retrievers[collection_name] = retriever
+    _last_access[collection_name] = time.time()
+    return retriever
+
+
+def warm_up():
+    """
+    Load the embedding model and Chroma client ahead of the first request.
+    Runs one dummy embedding so the model is fully initialised.
+    """
+    get_embeddings().embed_query("warm up")
+    get_vector_store()
+    logger.info("Storage registry warmed up")
+
+
+def shutdown():
+    """
+    Drop shared handles so the model and client can be garbage collected.
+    """
+    global _embeddings, _embedding_pool, _client
+    with _lock:
+        _stores.clear()
+        _retrievers.clear()
+        _last_access.clear()
+        _pins.clear()
+        _embeddings = None
+        if _embedding_pool is not None:
+            _embedding_pool.close()
+            _embedding_pool = None
+        if _client is not None:
+            try:
+                _client.clear_system_cache()
+            except Exception as e:
+                logger.warning(f"Failed to release Chroma client: {e}")
+        _client = None
+    logger.info("Storage registry shut down")
@@ -0,0 +1,87 @@
+"""
+Source -> chunk id index, kept in sync with a vector store as a secondary
+index (see `attach_index`).
+
+Lets callers read a source's chunks by metadata directly, without embedding a
+query or running a similarity search. Chunks are ordered by their
+`chunk_index` metadata (insertion order when it is missing).
+"""
+import threading
+from typing import Dict, List, Optional
+
+# Rough per-chunk overhead: id string plus its slots in the two maps
+_ENTRY_BYTES = 240
+
+
+class SourceIndex:
+    def __init__(self, key: str = "source"):
+        self.key = key
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._chunks: Dict[str, Dict[str, int]] = {}  # source -> {id: position}
+            self._source_of: Dict[str, str] = {}
+            self._ordered: Dict[str, List[str]] = {}  # sorted id lists, rebuilt lazily
+            self._added = 0
+
+    def __len__(self) -> int:
+        return len(self._source_of)
+
+    def memory_bytes(self) -> int:
+        return len(self._source_of) * _ENTRY_BYTES
+
+    def add(self, ids: List[str], texts: List[str], metadata: Optional[List[Dict]] = None):
+        metadata = metadata or [{}] * len(ids)
+        with self._lock:
+            for id, meta in zip(ids, metadata):
+                self._discard(id)
+                source = (meta or {}).get(self.key)
+                if source is None:
+                    continue
+                position = meta.get("chunk_index")
+                if not isinstance(position, int):
+                    position = self._added
+                self._added += 1
+                self._chunks.setdefault(source, {})[id] = position
+                self._source_of[id] = source
+                self._ordered.pop(source, None)
+
+    def remove(self, ids: List[str]) -> int:
+        with self._lock:
+            return sum(self._discard(id) for id in ids)
+
+    def _discard(self, id: str) -> bool:
+        source = self._source_of.pop(id, None)
+        if source is None:
+            return False
+        chunks = self._chunks[source]
+        del chunks[id]
+        if not chunks:
+            del self._chunks[source]
+        self._ordered.pop(source, None)
+        return True
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return list(self._chunks)
+
+    def ids(self, source: str, n: Optional[int] = None, spread: bool = False) -> List[str]:
+        """
+        Chunk ids of `source` in chunk order: all of them, the first `n`, or
+        with `spread` `n` ids evenly spaced from first to last chunk.
+        """
+        with self._lock:
+            ordered = self._ordered.get(source)
+            if ordered is None:
+                chunks = self._chunks.get(source, {})
+                ordered = self._ordered[source] = sorted(chunks, key=chunks.get)
+        if n is None or n >= len(ordered):
+            return list(ordered)
+        if n <= 0:
+            return []
+        if spread and n > 1:
+            step = (len(ordered) - 1) / (n - 1)
+            return [ordered[round(i * step)] for i in range(n)]
+        return ordered[:n]
@@ -1,62 +1,327 @@
+import json
 import logging
+import threading
 from typing import List, Dict, Optional
 
 import chromadb
 from chromadb.config import Settings
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from prime_agent.config import CHUNK_TOKENS, EMBED_POOL_MIN_TEXTS, VECTOR_COMPACT_THRESHOLD
+from prime_agent.storage.registry import DEFAULT_COLLECTION, embed_bulk, get_chroma_client, get_embeddings
+from prime_agent.storage.source_index import SourceIndex
 
 logger = logging.getLogger(__name__)
 
-class VectorStore:
-    def __init__(self):
-        logger.info("🟦 Starting Chroma in EPHEMERAL MODE (RAM Only)")
+# Metadata flag for soft-deleted chunks; they are hidden from reads until compaction removes them
+TOMBSTONE = "deleted"
 
-        # 1. Load embeddings (CPU only)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2"
-        )
+# Rough per-chunk memory besides the float32 vector: HNSW links (M=16, two layers'
+# worth of int32 neighbours) plus the chunk text at ~4 characters per token
+_HNSW_LINK_BYTES = 2 * 16 * 4
+_TEXT_BYTES = CHUNK_TOKENS * 4
 
-        # 2. Define Settings for In-Memory Mode
-        # We REMOVED 'chroma_api_impl' because it causes crashes.
-        # is_persistent=False tells Chroma to run in RAM.
-        client_settings = Settings(
-            is_persistent=False,
-            allow_reset=True,
-            anonymized_telemetry=False
-        )
+def _live(where: Optional[Dict]) -> Dict:
+    """
+    Combine a metadata filter with "not tombstoned".
+    """
+    alive = {TOMBSTONE: {"$ne": 1}}
+    return {"$and": [where, alive]} if where else alive
+
+def _strip(metadata: Optional[Dict]) -> Dict:
+    return {k: v for k, v in (metadata or {}).items() if k != TOMBSTONE}
+
+class VectorStore:
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, embeddings=None, client=None, persist_directory: Optional[str] = None):
+        # Embedding model and Chroma client are shared process-wide (see registry);
+        # use registry.get_vector_store() to share the handle itself as well.
+        self.embeddings = embeddings or get_embeddings()
+
+        if client is None and persist_directory:
+            client = chromadb.PersistentClient(path=persist_directory, settings=Settings(
+                allow_reset=True,
+                anonymized_telemetry=False
+            ))
 
-        # 3. Initialize Chroma
-        # We do NOT pass a persist_directory, forcing it to stay in memory.
         self.vector_store = Chroma(
-            collection_name="prime_docs",
+            collection_name=collection_name,
             embedding_function=self.embeddings,
-            client_settings=client_settings
+            client=client or get_chroma_client()
         )
 
+        # Secondary indexes (e.g. BM25) kept in sync with writes; see attach_index
+        self._indexes = []
+        self._sources: Optional[SourceIndex] = None
+        self._sources_lock = threading.Lock()
+        self._dim = None
+
+        # An existing on-disk index is opened as is; nothing is re-embedded
+        self._tombstones = self._tombstoned()
+        logger.info(f"Opened collection '{collection_name}' with {self.count()} chunks ({self._tombstones} tombstoned)")
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.vector_store._client.get_settings().is_persistent)
+
+    @property
+    def _collection(self):
+        return self.vector_store._collection
+
+    def _tombstoned(self) -> int:
+        # Bounded by VECTOR_COMPACT_THRESHOLD, so cheap to count exactly
+        return len(self._collection.get(where={TOMBSTONE: 1}, include=[])["ids"])
+
     def add_documents(self, documents, metadata, ids):
+        if len(documents) >= EMBED_POOL_MIN_TEXTS:
+            # Large jobs are embedded up front (across worker processes, see registry.embed_bulk)
+            embeddings = embed_bulk(self.embeddings, documents)
+            for i in range(0, len(documents), 1000):
+                self.add_embeddings(documents[i:i+1000], embeddings[i:i+1000], metadata[i:i+1000], ids[i:i+1000])
+            return
         batch = 32
         for i in range(0, len(documents), batch):
+            # add_texts upserts; the explicit flag revives previously deleted ids
             self.vector_store.add_texts(
                 texts=documents[i:i+batch],
-                metadatas=metadata[i:i+batch],
+                metadatas=[{**m, TOMBSTONE: 0} for m in metadata[i:i+batch]],
                 ids=ids[i:i+batch]
             )
+        for index in self._indexes:
+            index.add(ids, documents, metadata)
 
-    def search(self, query, k=5, filter=None):
-        results = self.vector_store.similarity_search(query, k=k, filter=filter)
+    def embed_documents(self, documents):
+        """
+        Embed texts without storing them (see `add_embeddings`).
+        """
+        return embed_bulk(self.embeddings, documents)
+
+    def add_embeddings(self, documents, embeddings, metadata, ids):
+        """
+        Store texts whose embeddings were computed separately.
+        """
+        self._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            metadatas=[{**m, TOMBSTONE: 0} for m in metadata],
+            documents=documents
+        )
+        for index in self._indexes:
+            index.add(ids, documents, metadata)
+
+    def attach_index(self, index):
+        """
+        Keep a secondary index in sync: it receives add(ids, texts, metadata),
+        remove(ids) and clear() for every write to this store.
+        """
+        self._indexes.append(index)
+
+    def get(self, ids: List[str]) -> List[Dict]:
+        """
+        Live chunks by id, as search-style result dicts (missing ids are skipped).
+        """
+        if not ids:
+            return []
+        found = self._collection.get(ids=ids, where=_live(None), include=["documents", "metadatas"])
+        by_id = {
+            id: {"content": doc, "metadata": _strip(meta), "id": id}
+            for id, doc, meta in zip(found["ids"], found["documents"], found["metadatas"])
+        }
+        return [by_id[id] for id in ids if id in by_id]
+
+    def _source_index(self) -> SourceIndex:
+        """
+        Source -> chunk ids index, built from the stored chunks on first use
+        and kept in sync with writes afterwards.
+        """
+        with self._sources_lock:
+            if self._sources is None:
+                index = SourceIndex()
+                # Attach before the scan so writes made meanwhile are not missed
+                self.attach_index(index)
+                for ids, texts, metadata in self.iter_documents():
+                    index.add(ids, texts, metadata)
+                self._sources = index
+        return self._sources
+
+    def get_by_metadata(self, where: Dict, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Live chunks matching a metadata filter, without embedding or similarity
+        search. {"source": ...} lookups go through the source index and come
+        back in chunk order.
+        """
+        if set(where) == {"source"} and not isinstance(where["source"], dict):
+            return self.get(self._source_index().ids(where["source"], limit))
+        found = self._collection.get(where=_live(where), include=["documents", "metadatas"], limit=limit)
         return [
-            {
-                "content": r.page_content,
-                "metadata": r.metadata,
-                "id": r.metadata.get("id", "")
-            }
-            for r in results
+            {"content": doc, "metadata": _strip(meta), "id": id}
+            for id, doc, meta in zip(found["ids"], found["documents"], found["metadatas"])
         ]
 
+    def sample_by_source(self, sources: List[str], n: int = 1, spread: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Up to `n` chunks per source, as {source: results}: the first `n`, or
+        with `spread` `n` chunks evenly spaced through the source. One id
+        lookup for all sources; nothing is embedded.
+        """
+        index = self._source_index()
+        picked = {source: index.ids(source, n, spread) for source in sources}
+        by_id = {r["id"]: r for r in self.get([id for ids in picked.values() for id in ids])}
+        return {source: [by_id[id] for id in ids if id in by_id] for source, ids in picked.items()}
+
+    def embeddings_for(self, ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Stored embeddings of live chunks, as {id: vector}.
+        """
+        if not ids:
+            return {}
+        found = self._collection.get(ids=ids, where=_live(None), include=["embeddings"])
+        return dict(zip(found["ids"], found["embeddings"]))
+
+    def iter_documents(self, batch_size: int = 1000):
+        """
+        Yield (ids, texts, metadata) batches of all live chunks.
+        """
+        offset = 0
+        while True:
+            found = self._collection.get(where=_live(None), include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not found["ids"]:
+                return
+            yield found["ids"], found["documents"], [_strip(m) for m in found["metadatas"]]
+            offset += len(found["ids"])
+
+    def existing(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Live chunks among `ids`, as {id: text}. Lets callers skip re-embedding
+        chunks that are already stored unchanged.
+        """
+        if not ids:
+            return {}
+        found = self._collection.get(ids=ids, where=_live(None), include=["documents"])
+        return dict(zip(found["ids"], found["documents"]))
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> int:
+        """
+        Tombstone chunks by id or metadata filter. This only flips a metadata
+        flag; the chunks are removed from the index by `compact`, which runs
+        automatically once VECTOR_COMPACT_THRESHOLD tombstones accumulate.
+        Returns the number of chunks deleted.
+        """
+        if ids is None and where is None:
+            return 0
+        ids = self._collection.get(ids=ids, where=_live(where), include=[])["ids"]
+        if not ids:
+            return 0
+        self._collection.update(ids=ids, metadatas=[{TOMBSTONE: 1}] * len(ids))
+        for index in self._indexes:
+            index.remove(ids)
+        self._tombstones += len(ids)
+        if self._tombstones >= VECTOR_COMPACT_THRESHOLD:
+            self.compact()
+        return len(ids)
+
+    def compact(self) -> int:
+        """
+        Physically remove tombstoned chunks. Returns how many were removed.
+        """
+        ids = self._collection.get(where={TOMBSTONE: 1}, include=[])["ids"]
+        if ids:
+            self._collection.delete(ids=ids)
+            logger.info(f"Compacted {len(ids)} tombstoned chunks")
+        self._tombstones = 0
+        return len(ids)
+
+    def count(self) -> int:
+        """
+        Number of live (not tombstoned) chunks.
+        """
+        return self._collection.count() - self._tombstoned()
+
+    def _query(self, embeddings: List[List[float]], k: int, where: Optional[Dict]) -> List[List[Dict]]:
+        found = self._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            where=_live(where),
+            include=["documents", "metadatas"]
+        )
+        return [
+            [
+                {
+                    "content": doc,
+                    "metadata": _strip(meta),
+                    "id": id
+                }
+                for id, doc, meta in zip(ids, docs, metas)
+            ]
+            for ids, docs, metas in zip(found["ids"], found["documents"], found["metadatas"])
+        ]
+
+    def search(self, query, k=5, filter=None):
+        return self._query([self.embeddings.embed_query(query)], k, filter)[0]
+
+    def search_many(self, queries: List[str], k=5, filters=None) -> List[List[Dict]]:
+        """
+        Search several queries at once. All queries are embedded in one model
+        batch; queries sharing a filter go to Chroma in a single query call.
+        `filters` is one filter for all queries or a list with one per query.
+        Returns one result list per query, in order.
+        """
+        if not queries:
+            return []
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+        embeddings = self.embeddings.embed_documents(list(queries))
+
+        groups: Dict[str, List[int]] = {}
+        for i, f in enumerate(filters):
+            groups.setdefault(json.dumps(f, sort_keys=True), []).append(i)
+
+        results: List[List[Dict]] = [[] for _ in queries]
+        for indexes in groups.values():
+            found = self._query([embeddings[i] for i in indexes], k, filters[indexes[0]])
+            for i, hits in zip(indexes, found):
+                results[i] = hits
+        return results
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated memory held by this collection's index and the secondary
+        indexes attached to it.
+        """
+        attached = sum(index.memory_bytes() for index in self._indexes if hasattr(index, "memory_bytes"))
+        n = self._collection.count()
+        if not n:
+            return attached
+        if self._dim is None:
+            self._dim = len(self._collection.peek(1)["embeddings"][0])
+        return n * (self._dim * 4 + _HNSW_LINK_BYTES + _TEXT_BYTES) + attached
+
+    def copy_to(self, client, batch_size: int = 1000) -> int:
+        """
+        Copy every chunk (with its stored embedding) into a collection of the
+        same name on another Chroma client. Returns the number copied.
+        """
+        target = client.get_or_create_collection(self._collection.name, metadata=self._collection.metadata)
+        copied, offset = 0, 0
+        while True:
+            found = self._collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+            if not len(found["ids"]):
+                return copied
+            target.upsert(ids=found["ids"], embeddings=found["embeddings"], documents=found["documents"], metadatas=found["metadatas"])
+            copied += len(found["ids"])
+            offset += len(found["ids"])
+
+    def drop(self):
+        """
+        Delete the collection; the handle must not be used afterwards.
+        """
+        self.vector_store.delete_collection()
+
     def clear(self):
         try:
-            # For ephemeral clients, this just wipes the memory
-            self.vector_store.delete_collection()
+            # Drop and recreate, so this (possibly shared) handle stays usable
+            self.vector_store.reset_collection()
+            self._tombstones = 0
+            for index in self._indexes:
+                index.clear()
         except Exception as e:
-            pass
+            logger.warning(f"Failed to clear collection: {e}")
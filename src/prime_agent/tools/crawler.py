@@ -0,0 +1,143 @@
+"""
+Bounded-concurrency, same-domain crawler.
+
+Pages are fetched by a small worker pool over the shared HTTP session (and the
+response cache), with a politeness delay per domain, and parsed once by
+html_extract for both text and links. The frontier is a deque and
+seen URLs are tracked in a set, so each step is O(1). Extracted page text is
+streamed to the caller as pages finish.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Set
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from prime_agent.config import CRAWL_CONCURRENCY, CRAWL_DELAY, HTTP_CACHE_ENABLED
+from prime_agent.tools.html_extract import extract_response
+from prime_agent.tools.http_client import fetch_cached, fetch_url
+
+# ---------------------------------------------------------------------------
+# 1. PAGE PROCESSING
+# ---------------------------------------------------------------------------
+
+def _process_page(url: str, timeout: float) -> Optional[Dict]:
+    """
+    Fetch one page and return its title, main text and outbound links,
+    or None if it is not a reachable HTML page.
+    """
+    fetch = fetch_cached if HTTP_CACHE_ENABLED else fetch_url
+    resp = fetch(url, timeout=timeout)
+    if resp["error"]:
+        logger.warning(f"Failed to fetch {url}")
+        return None
+
+    content_type = resp["headers"].get("Content-Type", "")
+    if resp["status"] != 200 or "text/html" not in content_type:
+        return None
+
+    page = extract_response(resp)
+    return {"url": url, "title": page["title"], "text": page["text"], "links": page["links"]}
+
+
+# ---------------------------------------------------------------------------
+# 2. CRAWLER ENGINE
+# ---------------------------------------------------------------------------
+
+class _DomainThrottle:
+    """
+    Spaces out request starts to the same domain by at least `delay` seconds.
+    """
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        if self.delay <= 0:
+            return
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def crawl(
+    root_url: str,
+    max_pages: int = 15,
+    same_domain: bool = True,
+    timeout: int = 10,
+    concurrency: int = CRAWL_CONCURRENCY,
+    delay: float = CRAWL_DELAY,
+) -> Iterator[Dict]:
+    """
+    Crawls starting from root_url and yields {'url', 'title', 'text'} for each HTML page
+    with non-empty text, in completion order. Stops once `max_pages` HTML pages
+    have been visited; in-flight requests beyond that are discarded.
+    """
+    domain = urlparse(root_url).netloc
+    throttle = _DomainThrottle(delay)
+
+    frontier = deque([root_url])
+    seen: Set[str] = {root_url}
+    visited = 0
+    in_flight: Dict[Future, str] = {}
+
+    def _task(url: str) -> Optional[Dict]:
+        throttle.wait(url)
+        return _process_page(url, timeout)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="crawl")
+    try:
+        while (frontier or in_flight) and visited < max_pages:
+            # Keep the pool busy, but never schedule more than could still count
+            while frontier and len(in_flight) < concurrency and visited + len(in_flight) < max_pages:
+                url = frontier.popleft()
+                in_flight[pool.submit(_task, url)] = url
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = in_flight.pop(future)
+                try:
+                    page = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to process {url}: {e}")
+                    continue
+                if page is None or visited >= max_pages:
+                    continue
+
+                visited += 1
+                if page["text"].strip():
+                    yield {"url": url, "title": page["title"], "text": page["text"]}
+
+                # Discover more links
+                for link in page["links"]:
+                    parsed = urlparse(link)
+
+                    # Skip non-http(s), fragments, mailto, etc.
+                    if parsed.scheme not in ("http", "https"):
+                        continue
+                    if parsed.fragment:
+                        continue
+                    if same_domain and parsed.netloc != domain:
+                        continue
+                    if link in seen:
+                        continue
+
+                    seen.add(link)
+                    frontier.append(link)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Crawl of {root_url} finished: {visited} pages visited, {len(seen)} URLs discovered")
@@ -1,30 +1,131 @@
 """
 Tool for assessing source credibility.
+
+`assess_credibility_batch` scores many sources in one structured call and
+retries whatever it could not map back in smaller batches.
 """
-from typing import Dict
-from prime_agent.llm.client import LLMClient
-from prime_agent.config import DEFAULT_MODEL
+from typing import Dict, List, Tuple
+from loguru import logger
+from prime_agent.llm.client import get_llm_client
+from prime_agent.config import CREDIBILITY_BATCH_SIZE, DEFAULT_MODEL
+
+ASSESSMENT_PROPERTIES = {
+    "score": {"type": "number", "description": "Credibility score between 0.0 and 1.0"},
+    "label": {"type": "string", "enum": ["High", "Medium", "Low"], "description": "Credibility label"},
+    "bias": {"type": "string", "description": "Potential bias (e.g., Commercial, Political, Neutral)"},
+    "explanation": {"type": "string", "description": "Brief explanation for the rating"}
+}
+ASSESSMENT_FIELDS = ["score", "label", "bias", "explanation"]
+
+# Text per source in a batched prompt (single assessments send 2000 characters)
+_BATCH_SAMPLE_CHARS = 1500
 
 def assess_credibility(text: str, source: str) -> Dict:
     """
     Assess the credibility of a source.
     Returns dict with score (0-1), label, bias, explanation.
     """
-    client = LLMClient(model_name=DEFAULT_MODEL)
+    client = get_llm_client(DEFAULT_MODEL)
     
     schema = {
         "title": "CredibilityAssessment",
         "description": "Assessment of source credibility and bias.",
         "type": "object",
-        "properties": {
-            "score": {"type": "number", "description": "Credibility score between 0.0 and 1.0"},
-            "label": {"type": "string", "enum": ["High", "Medium", "Low"], "description": "Credibility label"},
-            "bias": {"type": "string", "description": "Potential bias (e.g., Commercial, Political, Neutral)"},
-            "explanation": {"type": "string", "description": "Brief explanation for the rating"}
-        },
-        "required": ["score", "label", "bias", "explanation"]
+        "properties": ASSESSMENT_PROPERTIES,
+        "required": ASSESSMENT_FIELDS
     }
     
     prompt = f"Assess the credibility and bias of the following text from source '{source}':\n\n{text[:2000]}"
     
     return client.generate_structured(prompt, schema)
+
+
+def _assess_batch(samples: List[Tuple[str, str]]) -> Dict[str, Dict]:
+    """
+    One structured call for several (source, text) samples. Returns the
+    assessments that came back complete, keyed by source.
+    """
+    client = get_llm_client(DEFAULT_MODEL)
+
+    schema = {
+        "title": "CredibilityAssessments",
+        "description": "One credibility and bias assessment per numbered source.",
+        "type": "object",
+        "properties": {
+            "assessments": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer", "description": "Number of the source being assessed"},
+                        "source": {"type": "string", "description": "The source exactly as given"},
+                        **ASSESSMENT_PROPERTIES
+                    },
+                    "required": ["id", "source", *ASSESSMENT_FIELDS]
+                }
+            }
+        },
+        "required": ["assessments"]
+    }
+
+    parts = [
+        f"[{i}] Source: {source}\n{text[:_BATCH_SAMPLE_CHARS]}"
+        for i, (source, text) in enumerate(samples, start=1)
+    ]
+    prompt = (
+        f"Assess the credibility and bias of each of the following {len(samples)} sources independently, "
+        "based on the text sampled from it. Return exactly one assessment per source.\n\n"
+        + "\n\n".join(parts)
+    )
+
+    result = client.generate_structured(prompt, schema)
+    items = result.get("assessments") if isinstance(result, dict) else None
+    if not isinstance(items, list):
+        return {}
+
+    by_source = dict(samples)
+    assessments = {}
+    for item in items:
+        if not isinstance(item, dict) or any(field not in item for field in ASSESSMENT_FIELDS):
+            continue
+        source = item.get("source")
+        if source not in by_source:
+            # Fall back to the number when the model rewrote the source string
+            index = item.get("id")
+            if not isinstance(index, int) or not 1 <= index <= len(samples):
+                continue
+            source = samples[index - 1][0]
+        assessments.setdefault(source, {field: item[field] for field in ASSESSMENT_FIELDS})
+    return assessments
+
+
+def assess_credibility_batch(samples: Dict[str, str], batch_size: int = CREDIBILITY_BATCH_SIZE) -> Dict[str, Dict]:
+    """
+    Assess many sources, `batch_size` per LLM call. `samples` maps each
+    source to a text sample; returns {source: assessment} with the same fields
+    as `assess_credibility`. Sources missing from a batch's response (parse
+    failure, truncated array) are retried in batches of half the size, down to
+    single `assess_credibility` calls.
+    """
+    results: Dict[str, Dict] = {}
+    pending = list(samples.items())
+    size = max(1, batch_size)
+    while pending:
+        if size == 1:
+            for source, text in pending:
+                assessment = assess_credibility(text, source)
+                if assessment:
+                    results[source] = assessment
+            break
+
+        failed = []
+        for i in range(0, len(pending), size):
+            batch = pending[i:i + size]
+            found = _assess_batch(batch)
+            results.update(found)
+            failed.extend((source, text) for source, text in batch if source not in found)
+        if failed:
+            logger.warning(f"{len(failed)} credibility assessments missing from batches of {size}; retrying in batches of {size // 2}")
+        pending = failed
+        size //= 2
+    return results
@@ -0,0 +1,262 @@
+"""
+Single-pass HTML extraction shared by load_html and the crawler.
+
+One parse yields the page title, its main readable text and its outbound links.
+The parser backend is pluggable: selectolax or lxml when installed, with
+BeautifulSoup's pure-Python html.parser as the fallback. Byte input is decoded
+once, before any backend sees it (`decode_html`), so every backend reads the
+same text whatever the page's charset.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from loguru import logger
+
+from prime_agent.config import HTML_PARSER
+from prime_agent.storage.http_cache import get_http_cache
+
+CLUTTER_TAGS = [
+    "script",
+    "style",
+    "nav",
+    "footer",
+    "header",
+    "noscript",
+    "svg",
+    "img",
+    "form",
+    "button",
+    "input",
+    "aside",
+]
+
+# Containers that usually hold the main content, in order of preference
+CONTENT_SELECTORS = ["article", "main", "div#content", "div.post", "div.entry-content", "section"]
+
+TEXT_TAGS = ["h1", "h2", "h3", "h4", "p", "li", "pre", "code", "table"]
+
+# Bump when extraction output changes so cached results are recomputed
+# (v2: bodies are decoded with their declared charset)
+_CACHE_KIND = "extract-v2"
+
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# XHTML prolog; lxml refuses str input that still declares an encoding
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def header_charset(headers: Optional[Dict]) -> Optional[str]:
+    """
+    Charset declared in a Content-Type header, if it names a known codec.
+    """
+    match = _CHARSET.search((headers or {}).get("Content-Type", "") or "")
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return None
+
+
+def decode_html(html: str | bytes, encoding: Optional[str] = None) -> str:
+    """
+    Decode a response body: with `encoding` (e.g. the Content-Type charset)
+    when given, else by sniffing (BOM, <meta charset>, then content), so
+    backends never guess on raw bytes.
+    """
+    if isinstance(html, str):
+        return html
+    from bs4 import UnicodeDammit
+
+    dammit = UnicodeDammit(html, known_definite_encodings=[encoding] if encoding else [], is_html=True)
+    if dammit.unicode_markup is None:
+        return html.decode("utf-8", errors="replace")
+    return dammit.unicode_markup
+
+
+def _result(title: str, parts: List[str], hrefs: List[str], base_url: str) -> Dict:
+    return {
+        "title": title.strip(),
+        "text": "\n".join(parts),
+        "links": [urljoin(base_url, href) for href in hrefs] if base_url else hrefs,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+def _extract_html_parser(html: str | bytes, base_url: str) -> Dict:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    # Links come from the whole page, before nav/footer are dropped
+    hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+
+    for tag in soup(CLUTTER_TAGS):
+        tag.decompose()
+
+    node = None
+    for selector in CONTENT_SELECTORS:
+        node = soup.select_one(selector)
+        if node:
+            break
+    node = node or soup.body or soup
+
+    parts = [tag.get_text(" ", strip=True) for tag in node.find_all(TEXT_TAGS)]
+    return _result(title, [p for p in parts if p], hrefs, base_url)
+
+
+def _lxml_selector_xpath(selector: str) -> str:
+    if "#" in selector:
+        tag, element_id = selector.split("#", 1)
+        return f".//{tag}[@id='{element_id}']"
+    if "." in selector:
+        tag, cls = selector.split(".", 1)
+        return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+    return f".//{selector}"
+
+
+def _extract_lxml(html: str | bytes, base_url: str) -> Dict:
+    import lxml.html
+    from lxml.etree import ParserError
+
+    if isinstance(html, str):
+        html = _XML_DECLARATION.sub("", html, count=1)
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (ParserError, ValueError):
+        return _result("", [], [], base_url)
+
+    def _text(el) -> str:
+        return " ".join(s.strip() for s in el.itertext() if s.strip())
+
+    title_el = root.find(".//title")
+    title = _text(title_el) if title_el is not None else ""
+    hrefs = [a.get("href") for a in root.iter("a") if a.get("href") is not None]
+
+    for el in list(root.iter(*CLUTTER_TAGS)):
+        if el is not root:
+            el.drop_tree()
+
+    node = None
+    for selector in CONTENT_SELECTORS:
+        found = root.xpath(_lxml_selector_xpath(selector))
+        if found:
+            node = found[0]
+            break
+    if node is None:
+        node = root.find(".//body")
+    if node is None:
+        node = root
+
+    parts = [_text(el) for el in node.iter(*TEXT_TAGS) if el is not node]
+    return _result(title, [p for p in parts if p], hrefs, base_url)
+
+
+def _extract_selectolax(html: str | bytes, base_url: str) -> Dict:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text(separator=" ", strip=True) if title_node else ""
+    hrefs = [a.attributes.get("href") for a in tree.css("a[href]")]
+    hrefs = [h for h in hrefs if h is not None]
+
+    for node in tree.css(", ".join(CLUTTER_TAGS)):
+        node.decompose()
+
+    node = None
+    for selector in CONTENT_SELECTORS:
+        node = tree.css_first(selector)
+        if node:
+            break
+    node = node or tree.body or tree.root
+    if node is None:
+        return _result(title, [], hrefs, base_url)
+
+    parts = [el.text(separator=" ", strip=True) for el in node.css(", ".join(TEXT_TAGS))]
+    return _result(title, [p for p in parts if p], hrefs, base_url)
+
+
+BACKENDS: Dict[str, Callable[[str | bytes, str], Dict]] = {
+    "selectolax": _extract_selectolax,
+    "lxml": _extract_lxml,
+    "html.parser": _extract_html_parser,
+}
+
+_REQUIRED_MODULE = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "html.parser": "bs4"}
+
+
+def available_backends() -> List[str]:
+    """
+    Installed backends, fastest first.
+    """
+    names = []
+    for name, module in _REQUIRED_MODULE.items():
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+def _default_backend() -> str:
+    installed = available_backends()
+    if HTML_PARSER != "auto":
+        if HTML_PARSER in installed:
+            return HTML_PARSER
+        logger.warning(f"HTML parser '{HTML_PARSER}' is not available, falling back to auto selection")
+    return installed[0]
+
+
+_backend: Optional[str] = None
+
+
+def extract_html(html: str | bytes, base_url: str = "", backend: Optional[str] = None, encoding: Optional[str] = None) -> Dict:
+    """
+    Parse HTML once and return {'title', 'text', 'links'}. Bytes are decoded
+    with `encoding` if given, else sniffed (see decode_html).
+    - text: main readable content (headings, paragraphs, list items, code,
+      tables) from the best content container, with clutter removed.
+    - links: every <a href> on the page, resolved against base_url if given.
+    """
+    global _backend
+    if backend is None:
+        if _backend is None:
+            _backend = _default_backend()
+        backend = _backend
+    return BACKENDS[backend](decode_html(html, encoding), base_url)
+
+
+def extract_response(resp: Dict) -> Dict:
+    """
+    Extract a fetched response (see http_client.fetch_url), reusing the
+    extraction stored next to a cached body when there is one.
+    """
+    # Only an explicit charset counts: requests reports ISO-8859-1 for any
+    # text/* response without one, which would override a <meta charset>
+    encoding = header_charset(resp.get("headers"))
+    body_hash = resp.get("body_hash")
+    if not body_hash:
+        return extract_html(resp["content"], resp["url"], encoding=encoding)
+
+    cache = get_http_cache()
+    stored = cache.get_text(body_hash, kind=_CACHE_KIND)
+    if stored is not None:
+        extracted = json.loads(stored)
+        # Links are stored relative to the page they came from
+        extracted["links"] = [urljoin(resp["url"], link) for link in extracted["links"]]
+        return extracted
+
+    extracted = extract_html(resp["content"], encoding=encoding)
+    cache.put_text(body_hash, json.dumps(extracted), kind=_CACHE_KIND)
+    extracted["links"] = [urljoin(resp["url"], link) for link in extracted["links"]]
+    return extracted
@@ -1,38 +1,50 @@
 """
 Tool for loading and extracting text from HTML.
 """
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, List
 import logging
 
+from prime_agent.config import HTTP_CACHE_ENABLED
+from prime_agent.tools.html_extract import extract_response
+from prime_agent.tools.http_client import fetch_url, fetch_cached, fetch_limited, fetch_many
+
 logger = logging.getLogger(__name__)
 
+def _text_from_result(result: Dict) -> str | None:
+    url = result["url"]
+    if result["error"]:
+        logger.warning(f"Skipping {url} due to error: {result['error']}")
+        return None
+    # HTTP errors (like 403 Forbidden or 404 Not Found)
+    if result["status"] >= 400:
+        logger.warning(f"Skipping {url} due to error: HTTP {result['status']}")
+        return None
+
+    return extract_response(result)["text"]
+
 def load_html(url: str) -> str | None:
     """
-    Fetches and parses text from a URL. Returns None if the request fails.
+    Fetches a URL and returns its main readable text. Returns None if the request fails.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-        "DNT": "1",
-    }
-    
-    try:
-        # 1. Attempt the request
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        # 2. Check for HTTP errors (like 403 Forbidden or 404 Not Found)
-        response.raise_for_status() 
+    fetch = fetch_cached if HTTP_CACHE_ENABLED else fetch_url
+    return _text_from_result(fetch(url))
 
-        # 3. Parse the content if successful
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-            
-        return soup.get_text(separator=' ', strip=True)
+def load_page(url: str) -> Dict:
+    """
+    Fetches one URL under the shared per-host limit, for callers that run their
+    own worker threads. Returns the same dict shape as `load_html_many` items.
+    """
+    result = fetch_limited(url)
+    return {"url": url, "content": _text_from_result(result), "elapsed": result["elapsed"]}
 
-    except requests.exceptions.RequestException as e:
-        # 4. Gracefully handle failure
-        logger.warning(f"Skipping {url} due to error: {e}")
-        return None
+def load_html_many(urls: List[str]) -> List[Dict]:
+    """
+    Fetches many URLs concurrently over the shared connection pool.
+    Returns one dict per input URL, in input order, with 'url', 'content'
+    (None if the request failed) and 'elapsed' (seconds spent on the request).
+    """
+    results = fetch_many(urls)
+    return [
+        {"url": r["url"], "content": _text_from_result(r), "elapsed": r["elapsed"]}
+        for r in results
+    ]
@@ -0,0 +1,193 @@
+"""
+Shared HTTP client: one keep-alive connection pool for the whole process and a
+bounded-concurrency fetch stage with per-host limits.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from loguru import logger
+
+from prime_agent.config import FETCH_CONCURRENCY, FETCH_PER_HOST, FETCH_TIMEOUT, HTTP_CACHE_ENABLED
+from prime_agent.storage.http_cache import get_http_cache
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "DNT": "1",
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_host_limits: Dict[tuple, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide requests session.
+    Connections are kept alive and reused across calls and threads; gzip is
+    always negotiated, brotli too when the `brotli` package is installed.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                pool_size = max(FETCH_CONCURRENCY, FETCH_PER_HOST)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _host_semaphore(url: str, per_host: int) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        sem = _host_limits.get((host, per_host))
+        if sem is None:
+            sem = threading.BoundedSemaphore(per_host)
+            _host_limits[(host, per_host)] = sem
+        return sem
+
+
+def fetch_url(url: str, timeout: float = FETCH_TIMEOUT, headers: Optional[Dict] = None) -> Dict:
+    """
+    GET a single URL through the shared session.
+    Never raises; failures are reported in the 'error' field.
+    Returns dict with url, status, headers, content, encoding, elapsed, error.
+    """
+    result = {
+        "url": url,
+        "status": None,
+        "headers": CaseInsensitiveDict(),
+        "content": b"",
+        "encoding": None,
+        "elapsed": 0.0,
+        "error": None,
+        "body_hash": None,
+        "from_cache": False,
+    }
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=timeout, headers=headers)
+        result["status"] = response.status_code
+        result["headers"] = response.headers
+        result["content"] = response.content
+        result["encoding"] = response.encoding
+    except requests.exceptions.RequestException as e:
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def fetch_cached(url: str, timeout: float = FETCH_TIMEOUT) -> Dict:
+    """
+    GET a URL through the persistent response cache.
+    Fresh entries are served without touching the network; stale entries are
+    revalidated with If-None-Match / If-Modified-Since and reused on a 304.
+    Same result shape as `fetch_url`, with 'body_hash' set for cached bodies.
+    """
+    cache = get_http_cache()
+    start = time.perf_counter()
+    cached = cache.get(url)
+
+    if cached and cached["fresh"]:
+        return {
+            "url": url,
+            "status": cached["status"],
+            "headers": cached["headers"],
+            "content": cached["content"],
+            "encoding": None,
+            "elapsed": time.perf_counter() - start,
+            "error": None,
+            "body_hash": cached["body_hash"],
+            "from_cache": True,
+        }
+
+    conditional = {}
+    if cached:
+        if cached["etag"]:
+            conditional["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            conditional["If-Modified-Since"] = cached["last_modified"]
+
+    result = fetch_url(url, timeout=timeout, headers=conditional or None)
+
+    if cached and result["status"] == 304:
+        cache.refresh(url, result["headers"])
+        result.update(
+            status=cached["status"],
+            headers=cached["headers"],
+            content=cached["content"],
+            body_hash=cached["body_hash"],
+            from_cache=True,
+        )
+    elif result["status"] == 200:
+        try:
+            result["body_hash"] = cache.put(url, result["status"], result["headers"], result["content"])
+        except Exception as e:
+            logger.warning(f"Failed to cache {url}: {e}")
+
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def fetch_limited(
+    url: str,
+    per_host: int = FETCH_PER_HOST,
+    timeout: float = FETCH_TIMEOUT,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+) -> Dict:
+    """
+    Fetch one URL while holding a per-host slot, so callers running their own
+    worker threads still keep at most `per_host` requests on any one host.
+    """
+    fetch = fetch_cached if use_cache else fetch_url
+    with _host_semaphore(url, per_host):
+        return fetch(url, timeout=timeout)
+
+
+def fetch_many(
+    urls: List[str],
+    max_workers: int = FETCH_CONCURRENCY,
+    per_host: int = FETCH_PER_HOST,
+    timeout: float = FETCH_TIMEOUT,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+) -> List[Dict]:
+    """
+    Fetch many URLs concurrently.
+    At most `max_workers` requests are in flight, and at most `per_host` of
+    them target the same host. Duplicate URLs are fetched once. Results are
+    returned in input order, each carrying its own 'elapsed' timing.
+    With `use_cache`, requests go through the persistent response cache.
+    """
+    if not urls:
+        return []
+
+    unique_urls = list(dict.fromkeys(urls))
+
+    def _fetch(url: str) -> Dict:
+        return fetch_limited(url, per_host=per_host, timeout=timeout, use_cache=use_cache)
+
+    start = time.perf_counter()
+    workers = max(1, min(max_workers, len(unique_urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        fetched = dict(zip(unique_urls, pool.map(_fetch, unique_urls)))
+    wall = time.perf_counter() - start
+
+    hits = sum(1 for r in fetched.values() if r["from_cache"])
+    total = sum(r["elapsed"] for r in fetched.values())
+    slowest = max(r["elapsed"] for r in fetched.values())
+    logger.info(
+        f"Fetched {len(unique_urls)} URLs ({hits} from cache) in {wall:.2f}s "
+        f"(sum of page times {total:.2f}s, slowest {slowest:.2f}s)"
+    )
+    return [fetched[url] for url in urls]
@@ -2,7 +2,7 @@
 Tool for extracting knowledge graph entities and relations.
 """
 from typing import List, Dict
-from prime_agent.llm.client import LLMClient
+from prime_agent.llm.client import get_llm_client
 from prime_agent.config import DEFAULT_MODEL
 
 def extract_graph(text: str) -> Dict[str, List]:
@@ -10,7 +10,7 @@ def extract_graph(text: str) -> Dict[str, List]:
     Extract nodes and edges from text.
     Returns dict with 'nodes' and 'edges'.
     """
-    client = LLMClient(model_name=DEFAULT_MODEL)
+    client = get_llm_client(DEFAULT_MODEL)
     
     schema = {
         "title": "KnowledgeGraph",
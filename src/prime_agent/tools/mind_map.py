@@ -1,7 +1,7 @@
 """
 Tool for generating Mermaid.js mind maps.
 """
-from prime_agent.llm.client import LLMClient
+from prime_agent.llm.client import get_llm_client
 from prime_agent.config import DEFAULT_MODEL
 
 def generate_mind_map(text: str) -> str:
@@ -9,7 +9,7 @@ def generate_mind_map(text: str) -> str:
     Generate a Mermaid.js mind map from the text.
     Returns the Mermaid code string.
     """
-    client = LLMClient(model_name=DEFAULT_MODEL)
+    client = get_llm_client(DEFAULT_MODEL)
     
     prompt = f"""Generate a hierarchical mind map of these concepts using Mermaid.js syntax. 
 Focus on how X connects to Y.
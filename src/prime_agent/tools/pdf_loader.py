@@ -1,19 +1,110 @@
 """
 Tool for loading and extracting text from PDFs.
+
+Pages are streamed one at a time and cached per (file SHA-256, page number).
+Large or multiple files are extracted across a process pool.
 """
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
 from pypdf import PdfReader
 from loguru import logger
 
-def load_pdf(file_path: str) -> str:
+from prime_agent.config import PDF_PARALLEL_MIN_PAGES, PDF_WORKERS
+from prime_agent.storage.pdf_cache import file_sha256, get_pdf_cache
+
+# Pages handed to a worker process per task
+_RANGE_SIZE = 16
+
+
+def _extract_range(file_path: str, start: int, end: int) -> List[str]:
     """
-    Extract text from a PDF file.
+    Extract pages [start, end) of a PDF. Runs inside worker processes.
     """
+    reader = PdfReader(file_path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _open(file_path: str) -> Optional[Tuple[PdfReader, str]]:
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return PdfReader(file_path), file_sha256(file_path)
     except Exception as e:
         logger.error(f"Failed to load PDF {file_path}: {e}")
-        return ""
+        return None
+
+
+def iter_pdfs_pages(file_paths: List[str], workers: int = PDF_WORKERS) -> Iterator[Tuple[str, int, str]]:
+    """
+    Stream (file_path, page_number, text) for every page of every PDF, in
+    file and page order. Cached pages are served from the page cache. When the
+    uncached pages add up to at least PDF_PARALLEL_MIN_PAGES, they are all
+    scheduled on a process pool up front and collected in order.
+    """
+    cache = get_pdf_cache()
+    files = []
+    # One page dict per distinct file, shared by every path it appears under,
+    # so a copy is served from the pages its first path extracted
+    pages_of: Dict[str, Dict[int, str]] = {}
+    for file_path in file_paths:
+        opened = _open(file_path)
+        if opened:
+            reader, file_hash = opened
+            if file_hash not in pages_of:
+                pages_of[file_hash] = cache.get_pages(file_hash)
+            files.append((file_path, reader, file_hash, pages_of[file_hash]))
+
+    unique = {file_hash: (reader, cached) for _, reader, file_hash, cached in files}
+    missing = sum(len(reader.pages) - len(cached) for reader, cached in unique.values())
+    use_pool = workers > 1 and missing >= PDF_PARALLEL_MIN_PAGES
+
+    pool = None
+    futures: Dict[Tuple[str, int], Future] = {}
+    if use_pool:
+        logger.info(f"Extracting {missing} PDF pages across {workers} processes")
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        for file_path, reader, file_hash, cached in files:
+            for start in range(0, len(reader.pages), _RANGE_SIZE):
+                end = min(start + _RANGE_SIZE, len(reader.pages))
+                if (file_hash, start) not in futures and any(i not in cached for i in range(start, end)):
+                    futures[(file_hash, start)] = pool.submit(_extract_range, file_path, start, end)
+
+    try:
+        for file_path, reader, file_hash, cached in files:
+            try:
+                for i in range(len(reader.pages)):
+                    if i in cached:
+                        yield file_path, i, cached[i]
+                        continue
+
+                    if pool:
+                        start = i - i % _RANGE_SIZE
+                        texts = futures.pop((file_hash, start)).result()
+                        new_pages = list(enumerate(texts, start))
+                        cache.put_pages(file_hash, new_pages)
+                        cached.update(new_pages)
+                        yield file_path, i, cached[i]
+                    else:
+                        text = cached[i] = reader.pages[i].extract_text() or ""
+                        cache.put_pages(file_hash, [(i, text)])
+                        yield file_path, i, text
+            except Exception as e:
+                logger.error(f"Failed to load PDF {file_path}: {e}")
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_pages(file_path: str, workers: int = PDF_WORKERS) -> Iterator[str]:
+    """
+    Stream the text of a PDF page by page.
+    """
+    for _, _, text in iter_pdfs_pages([file_path], workers=workers):
+        yield text
+
+
+def load_pdf(file_path: str) -> str:
+    """
+    Extract text from a PDF file.
+    """
+    return "".join(f"{text}\n" for text in iter_pdf_pages(file_path))
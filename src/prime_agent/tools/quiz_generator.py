@@ -2,7 +2,7 @@
 Tool for generating quizzes.
 """
 from typing import List, Dict
-from prime_agent.llm.client import LLMClient
+from prime_agent.llm.client import get_llm_client
 from prime_agent.config import DEFAULT_MODEL
 
 def generate_quiz(text: str, num_questions: int = 5, difficulty: str = "intermediate") -> List[Dict]:
@@ -10,7 +10,7 @@ def generate_quiz(text: str, num_questions: int = 5, difficulty: str = "intermed
     Generate a quiz from text.
     Returns list of dicts with question, options, correct_index, explanation.
     """
-    client = LLMClient(model_name=DEFAULT_MODEL)
+    client = get_llm_client(DEFAULT_MODEL)
     
     schema = {
         "title": "Quiz",
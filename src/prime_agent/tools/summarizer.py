@@ -14,68 +14,13 @@ Requires:
 
 from __future__ import annotations
 
-from typing import List, Set
-import logging
-from urllib.parse import urljoin, urlparse
-
-import requests
-from bs4 import BeautifulSoup
-
-from prime_agent.llm.client import LLMClient
+from prime_agent.llm.client import get_llm_client
 from prime_agent.config import DEFAULT_MODEL
+from prime_agent.tools.crawler import crawl
 
 
 # ---------------------------------------------------------------------------
-# 1. HTML TEXT EXTRACTION
-# ---------------------------------------------------------------------------
-
-def _extract_main_text(html: str) -> str:
-    """
-    Extracts the main readable text from HTML:
-    - Drops scripts, styles, nav, footer, etc.
-    - Keeps headings, paragraphs, list items, code, and preformatted text.
-    """
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Remove clutter
-    for tag in soup(
-        [
-            "script",
-            "style",
-            "nav",
-            "footer",
-            "header",
-            "noscript",
-            "svg",
-            "img",
-            "form",
-            "button",
-            "input",
-            "aside",
-        ]
-    ):
-        tag.decompose()
-
-    # Prefer article/main/content-like containers if present
-    candidates = []
-    for selector in ["article", "main", "div#content", "div.post", "div.entry-content", "section"]:
-        el = soup.select_one(selector)
-        if el:
-            candidates.append(el)
-
-    node = candidates[0] if candidates else (soup.body or soup)
-
-    parts: List[str] = []
-    for tag in node.find_all(["h1", "h2", "h3", "h4", "p", "li", "pre", "code", "table"]):
-        text = tag.get_text(" ", strip=True)
-        if text:
-            parts.append(text)
-
-    return "\n".join(parts)
-
-
-# ---------------------------------------------------------------------------
-# 2. SIMPLE SAME-DOMAIN CRAWLER
+# 1. SAME-DOMAIN CRAWL
 # ---------------------------------------------------------------------------
 
 def crawl_and_merge(
@@ -87,61 +32,14 @@ def crawl_and_merge(
     """
     Crawls starting from root_url, visits up to max_pages HTML pages on the
     same domain, extracts main text from each page and returns one big string.
+    Use `crawler.crawl` directly to consume pages as they finish.
     """
-
-    parsed_root = urlparse(root_url)
-    domain = parsed_root.netloc
-
-    to_visit: List[str] = [root_url]
-    visited: Set[str] = set()
-    collected_texts: List[str] = []
-
-    while to_visit and len(visited) < max_pages:
-        url = to_visit.pop(0)
-
-        if url in visited:
-            continue
-
-        try:
-            resp = requests.get(url, timeout=timeout)
-        except requests.RequestException:
-            logging.warning("Failed to fetch %s", url)
-            continue
-
-        content_type = resp.headers.get("Content-Type", "")
-        if resp.status_code != 200 or "text/html" not in content_type:
-            continue
-
-        visited.add(url)
-
-        html = resp.text
-        text = _extract_main_text(html)
-        if text.strip():
-            collected_texts.append(text)
-
-        # Discover more links
-        soup = BeautifulSoup(html, "html.parser")
-        for a in soup.find_all("a", href=True):
-            link = urljoin(url, a["href"])
-            parsed = urlparse(link)
-
-            # Skip non-http(s), fragments, mailto, etc.
-            if parsed.scheme not in ("http", "https"):
-                continue
-            if parsed.fragment:
-                continue
-            if same_domain and parsed.netloc != domain:
-                continue
-            if link in visited or link in to_visit:
-                continue
-
-            to_visit.append(link)
-
-    return "\n\n".join(collected_texts)
+    pages = crawl(root_url, max_pages=max_pages, same_domain=same_domain, timeout=timeout)
+    return "\n\n".join(page["text"] for page in pages)
 
 
 # ---------------------------------------------------------------------------
-# 3. LLM STUDY-GUIDE GENERATION
+# 2. LLM STUDY-GUIDE GENERATION
 # ---------------------------------------------------------------------------
 
 def generate_learning_content(context: str, topic: str, mode: str = "study_guide") -> str:
@@ -149,7 +47,7 @@ def generate_learning_content(context: str, topic: str, mode: str = "study_guide
     Core function that turns a big text context into a Master Study Guide
     using the configured LLM model.
     """
-    client = LLMClient(model_name=DEFAULT_MODEL)
+    client = get_llm_client(DEFAULT_MODEL)
     # Keep context within safe limit for tokens
     safe_context = context[:40000]
 
@@ -274,7 +172,7 @@ Now generate the complete Master Study Guide.
 
 
 # ---------------------------------------------------------------------------
-# 4. HIGH-LEVEL HELPERS
+# 3. HIGH-LEVEL HELPERS
 # ---------------------------------------------------------------------------
 
 def generate_study_guide_from_url(url: str, topic: str, max_pages: int = 15) -> str:
@@ -1,11 +1,37 @@
 """
 Tool for web search.
+
+Results are cached per normalised query with a TTL. Concurrent identical
+searches are coalesced into a single request, and a cached search answers any
+request that is not deeper than it.
 """
-from typing import List, Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
 from ddgs import DDGS
 from loguru import logger
 
-def web_search(query: str, num_results: int = 5) -> List[Dict]:
+from prime_agent.config import SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES
+
+class _Flight:
+    """
+    A search in progress that other callers can wait on.
+    """
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.event = threading.Event()
+        self.results: Optional[List[Dict]] = None
+
+# normalised query -> (fetched_at, depth, results); least recently used first
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_in_flight: Dict[str, _Flight] = {}
+_lock = threading.Lock()
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def _ddgs_search(query: str, num_results: int) -> List[Dict]:
     """
     Perform a web search using DuckDuckGo.
     Returns a list of dicts with 'title', 'link', 'snippet'.
@@ -13,7 +39,7 @@ def web_search(query: str, num_results: int = 5) -> List[Dict]:
     try:
         with DDGS() as ddgs:
             results = list(ddgs.text(query, max_results=num_results))
-        
+
         # DDGS returns list of dicts: {'title': ..., 'href': ..., 'body': ...}
         # We map 'href' to 'link' and 'body' to 'snippet' to match expected format
         formatted_results = []
@@ -28,3 +54,76 @@ def web_search(query: str, num_results: int = 5) -> List[Dict]:
     except Exception as e:
         logger.error(f"Web search failed: {e}")
         return []
+
+def _cached(key: str, num_results: int) -> Optional[List[Dict]]:
+    """
+    Cached results for a query if they are fresh and deep enough. Caller holds _lock.
+    """
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    fetched_at, depth, results = entry
+    if time.time() - fetched_at > SEARCH_CACHE_TTL:
+        del _cache[key]
+        return None
+    if depth < num_results:
+        return None
+    _cache.move_to_end(key)
+    return [dict(r) for r in results[:num_results]]
+
+def _store(key: str, num_results: int, results: List[Dict]):
+    """
+    Cache results, merging them after a shallower cached list for the same
+    query so earlier results keep their positions. Caller holds _lock.
+    """
+    entry = _cache.get(key)
+    if entry and time.time() - entry[0] <= SEARCH_CACHE_TTL and entry[1] < num_results:
+        known = {r["link"] for r in entry[2]}
+        results = entry[2] + [r for r in results if r["link"] not in known]
+    _cache[key] = (time.time(), num_results, results[:num_results])
+    _cache.move_to_end(key)
+    while len(_cache) > SEARCH_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+def web_search(query: str, num_results: int = 5) -> List[Dict]:
+    """
+    Perform a web search using DuckDuckGo.
+    Returns a list of dicts with 'title', 'link', 'snippet'.
+    """
+    key = _normalize(query)
+    while True:
+        with _lock:
+            cached = _cached(key, num_results)
+            if cached is not None:
+                logger.info(f"Web search cache hit for: {query}")
+                return cached
+            flight = _in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(num_results)
+                _in_flight[key] = flight
+
+        if not leader:
+            # Someone is already searching this query; share their result
+            flight.event.wait()
+            if flight.results is not None and flight.depth >= num_results:
+                return [dict(r) for r in flight.results[:num_results]]
+            continue
+
+        results = []
+        try:
+            results = _ddgs_search(query, num_results)
+        finally:
+            with _lock:
+                # Failed searches (no results) are not cached, so they are retried next time
+                if results:
+                    _store(key, num_results, results)
+                    results = [dict(r) for r in _cache[key][2]]
+                flight.results = results
+                del _in_flight[key]
+            flight.event.set()
+        return [dict(r) for r in results[:num_results]]
+
+def clear_search_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,103 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+Used between chunking and embedding so mirrored articles, syndicated copies and
+boilerplate-heavy pages do not cost an embedding each.
+"""
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from prime_agent.config import DEDUP_THRESHOLD
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(2**32 - 1)
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands) ** (1/rows) is the highest one not above `threshold`, so that
+    pairs at the threshold are very likely to share a bucket.
+    """
+    best = (num_perm, 1)
+    best_t = 0.0
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        t = (1 / bands) ** (1 / rows)
+        if best_t < t <= threshold:
+            best, best_t = (bands, rows), t
+    return best
+
+
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate filter. Feed texts to `is_duplicate`; a text is
+    reported as a duplicate when its estimated Jaccard similarity to any text
+    seen before reaches `threshold`. Non-duplicates are remembered.
+    """
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=(num_perm, 1), dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._exact: Set[str] = set()
+        self.seen = 0
+        self.dropped = 0
+
+    def _shingles(self, text: str) -> np.ndarray:
+        tokens = _TOKEN_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(tokens) <= k:
+            grams = [" ".join(tokens)]
+        else:
+            grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature: for each permutation, the minimum hash over all shingles.
+        """
+        shingles = self._shingles(text)
+        hashed = (self._a * shingles + self._b) % _PRIME
+        return np.minimum(hashed, _MAX_HASH).min(axis=1)
+
+    def is_duplicate(self, text: str) -> bool:
+        self.seen += 1
+
+        exact_key = hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+        if exact_key in self._exact:
+            self.dropped += 1
+            return True
+
+        sig = self.signature(text)
+        band_keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        candidates: Set[int] = set()
+        for band, key in zip(self._buckets, band_keys):
+            candidates.update(band.get(key, ()))
+        for idx in candidates:
+            if np.mean(self._signatures[idx] == sig) >= self.threshold:
+                self.dropped += 1
+                return True
+
+        idx = len(self._signatures)
+        self._signatures.append(sig)
+        self._exact.add(exact_key)
+        for band, key in zip(self._buckets, band_keys):
+            band[key].append(idx)
+        return False
@@ -0,0 +1,192 @@
+"""
+Small threaded streaming pipeline.
+
+Stages run in their own worker threads and are connected by bounded queues, so
+slow stages apply back-pressure, memory stays flat, and I/O-bound stages (fetch)
+overlap with CPU-bound ones (chunk, embed). Every stage keeps throughput counters.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from prime_agent.config import PIPELINE_QUEUE_SIZE
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline stage. `fn` maps an item (or a list of items when
+    `batch_size` is set) to an iterable of output items.
+    """
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable]], workers: int = 1, batch_size: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items_in: int, items_out: int, seconds: float):
+        with self._lock:
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += seconds
+
+
+class Pipeline:
+    """
+    Usage:
+        pipeline = Pipeline()
+        pipeline.add_stage("fetch", fetch_fn, workers=8)
+        pipeline.add_stage("embed", embed_fn, batch_size=32)
+        pipeline.run(source_items)
+        pipeline.stats()
+    """
+    def __init__(self, queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.stages: List[Stage] = []
+        self.wall_seconds = 0.0
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def add_stage(self, name: str, fn: Callable, workers: int = 1, batch_size: Optional[int] = None) -> "Pipeline":
+        self.stages.append(Stage(name, fn, workers, batch_size))
+        return self
+
+    # ------------------------------------------------------------------
+    # Queue helpers that give up once the pipeline is aborted
+    # ------------------------------------------------------------------
+
+    def _put(self, q: queue.Queue, item):
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue):
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, e: BaseException):
+        self._errors.append(e)
+        self._abort.set()
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _feed(self, source: Iterable, out_q: queue.Queue):
+        try:
+            for item in source:
+                if self._abort.is_set():
+                    return
+                self._put(out_q, item)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _work(self, stage: Stage, in_q: queue.Queue, out_q: Optional[queue.Queue], remaining: List[int], lock: threading.Lock):
+        try:
+            while not self._abort.is_set():
+                item = self._get(in_q)
+                if item is _DONE:
+                    # Let sibling workers see the end of input as well
+                    self._put(in_q, _DONE)
+                    break
+
+                if stage.batch_size:
+                    batch = [item]
+                    finished = False
+                    while len(batch) < stage.batch_size:
+                        try:
+                            nxt = in_q.get_nowait()
+                        except queue.Empty:
+                            break
+                        if nxt is _DONE:
+                            self._put(in_q, _DONE)
+                            finished = True
+                            break
+                        batch.append(nxt)
+                    payload, count = batch, len(batch)
+                else:
+                    payload, count, finished = item, 1, False
+
+                start = time.perf_counter()
+                outputs = stage.fn(payload) or ()
+                produced = 0
+                for out in outputs:
+                    produced += 1
+                    if out_q is not None:
+                        self._put(out_q, out)
+                stage.record(count, produced, time.perf_counter() - start)
+
+                if finished:
+                    break
+        except BaseException as e:
+            logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+            self._fail(e)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and out_q is not None:
+                self._put(out_q, _DONE)
+
+    def run(self, source: Iterable) -> Dict[str, Dict]:
+        """
+        Push every source item through all stages and block until done.
+        Re-raises the first stage error. Returns `stats()`.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0]), name="pipeline-source", daemon=True)]
+
+        for i, stage in enumerate(self.stages):
+            out_q = queues[i + 1] if i + 1 < len(self.stages) else None
+            remaining, lock = [stage.workers], threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[i], out_q, remaining, lock),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                ))
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.wall_seconds = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Per-stage counters: items in/out, busy seconds (summed over workers)
+        and output throughput over the pipeline's wall time.
+        """
+        wall = self.wall_seconds or 1e-9
+        return {
+            stage.name: {
+                "items_in": stage.items_in,
+                "items_out": stage.items_out,
+                "busy_seconds": round(stage.busy_seconds, 3),
+                "items_per_second": round(stage.items_out / wall, 2),
+            }
+            for stage in self.stages
+        }
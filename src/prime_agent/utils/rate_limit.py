@@ -0,0 +1,466 @@
+"""
+Rate limiting for quota-bound APIs.
+
+`TokenBucket` meters requests or tokens per minute. `AdaptiveLimiter` combines
+a requests-per-minute and a tokens-per-minute bucket with AIMD control: every
+success raises the request rate, batch size and concurrency a step, every
+rate-limit response halves the request rate and concurrency and pauses all
+callers until the server's Retry-After (or an exponential backoff) has passed.
+The goal is to run at the quota instead of idling below it or bursting past it.
+
+Every Gemini call goes through `call_with_retry` / `acall_with_retry` with the
+process-wide limiter for its endpoint (`get_limiter("llm")`,
+`get_limiter("embeddings")`): rate limits and transient errors are retried with
+jittered exponential backoff (Retry-After when the server gives one), and a
+per-endpoint `CircuitBreaker` fails calls fast while the endpoint is down.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from prime_agent.config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS,
+    EMBED_MAX_BATCH, EMBED_MAX_CONCURRENCY, EMBED_RPM, EMBED_TPM,
+    LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_RPM, LLM_TPM,
+)
+
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute / 60` per second, up to `capacity`
+    (default: one minute's worth).
+    """
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, amount: float) -> float:
+        """
+        Take `amount` if available and return 0, else return the seconds to
+        wait before trying again.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self.available >= amount:
+                self.available -= amount
+                return 0.0
+            return min((amount - self.available) / self.rate, 1.0)
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Block until `amount` is available, then take it. Requests larger than
+        the capacity are allowed once the bucket is full.
+        """
+        while True:
+            wait = self._take(amount)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1.0):
+        """
+        `acquire` from a coroutine, sleeping on the event loop.
+        """
+        while True:
+            wait = self._take(amount)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_RATE_LIMIT_MARKERS = ("429", "rate limit", "quota", "resource exhausted", "resourceexhausted", "too many requests")
+# Server-side or network failures worth retrying (anything else, e.g. a bad request, is not)
+_TRANSIENT_STATUS = {500, 502, 503, 504}
+_TRANSIENT_MARKERS = ("unavailable", "deadline", "timed out", "timeout", "internal error", "connection", "503", "502")
+_RETRY_IN = re.compile(r"retry(?:_delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*(ms|s)?", re.IGNORECASE)
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    status = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "status_code", None) or getattr(e, "code", None)
+    if status == 429:
+        return True
+    message = f"{type(e).__name__} {e}".lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+def is_transient_error(e: BaseException) -> bool:
+    if isinstance(e, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    status = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "status_code", None) or getattr(e, "code", None)
+    if status in _TRANSIENT_STATUS:
+        return True
+    message = f"{type(e).__name__} {e}".lower()
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's
+    Retry-After plus up to 10% jitter, or "full jitter" exponential backoff,
+    a random wait up to base * 2**attempt (capped), so retries do not arrive
+    in lockstep.
+    """
+    if retry_after is not None:
+        return retry_after * (1 + random.uniform(0, 0.1))
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after_seconds(e: BaseException) -> Optional[float]:
+    """
+    Server-suggested wait: a Retry-After header on the error's response, or a
+    "retry in 12s" / "retry_delay { seconds: 12 }" hint in its message.
+    """
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    match = _RETRY_IN.search(str(e))
+    if match:
+        seconds = float(match.group(1))
+        return seconds / 1000 if (match.group(2) or "").lower() == "ms" else seconds
+    return None
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an endpoint whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    fail immediately. After `reset_timeout` seconds one trial call is let
+    through (half-open): success closes the circuit, a transient failure
+    re-opens it. Any other outcome (a rate limit, a bad request, cancellation)
+    must hand the trial back with `release_trial` so another call can try.
+    """
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_SECONDS, name: str = "api"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial: Optional[object] = None  # token of the caller holding the half-open trial
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def before_call(self, trial: Optional[object] = None) -> Optional[object]:
+        """
+        Raise CircuitOpenError unless a call may proceed. Returns a trial token
+        when this call is the half-open trial (pass it back in on retries of
+        the same call, and to `release_trial` when done), else None.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return None
+            if trial is not None and self._trial is trial:
+                return trial
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial is not None:
+                raise CircuitOpenError(f"{self.name}: circuit open after {self.failures} consecutive failures")
+            self._trial = object()
+            return self._trial
+
+    def release_trial(self, trial: Optional[object]):
+        """
+        Give back a trial that ended without success or transient failure;
+        the circuit stays half-open for the next call. No-op if `trial` was
+        already resolved.
+        """
+        with self._lock:
+            if trial is not None and self._trial is trial:
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name}: circuit closed")
+            self.failures = 0
+            self._opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial is not None or (self._opened_at is None and self.failures >= self.failure_threshold):
+                logger.warning(f"{self.name}: circuit opened after {self.failures} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial = None
+
+
+# How often async waiters re-check for a free concurrency slot
+_ASYNC_POLL_SECONDS = 0.05
+
+
+class AdaptiveLimiter:
+    """
+    Usage:
+        limiter = AdaptiveLimiter(rpm=1500, tpm=1_000_000)
+        with limiter.slot(tokens=estimate):
+            response = call()
+        limiter.on_success()            # or limiter.on_rate_limit(retry_after)
+
+    `batch_size` and `concurrency` are the current AIMD targets; callers read
+    them to size their next request. The batch size is not cut on a 429:
+    splitting a batch spends more requests, and the token bucket already keeps
+    large batches within the tokens-per-minute budget.
+    """
+    def __init__(
+        self,
+        rpm: float,
+        tpm: Optional[float] = None,
+        batch_size: int = 8,
+        max_batch_size: int = 100,
+        concurrency: int = 2,
+        max_concurrency: int = 8,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        name: str = "api",
+    ):
+        self.name = name
+        self.rpm = rpm
+        # One second of burst, so a lowered rate takes effect immediately
+        self.requests = TokenBucket(rpm, capacity=max(1.0, rpm / 60))
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.breaker = CircuitBreaker(name=name)
+
+        self.successes = 0
+        self.rate_limited = 0
+        self._streak = 0  # consecutive rate limits, for exponential backoff
+        self._active = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _try_enter(self) -> float:
+        """
+        Take a concurrency slot and return 0, or return how long to wait (the
+        rest of a rate-limit pause, or a poll interval while all slots are busy).
+        """
+        with self._cond:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                return pause
+            if self._active >= self.concurrency:
+                return _ASYNC_POLL_SECONDS
+            self._active += 1
+            return 0.0
+
+    def acquire(self, tokens: float = 0):
+        """
+        Wait for a concurrency slot, any rate-limit pause, and budget in both
+        buckets. Every acquire must be paired with a `release`.
+        """
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._active < self.concurrency:
+                    break
+                self._cond.wait(timeout=pause if pause > 0 else None)
+            self._active += 1
+        try:
+            self.requests.acquire(1)
+            if self.tokens and tokens:
+                self.tokens.acquire(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: float = 0):
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def aacquire(self, tokens: float = 0):
+        """
+        `acquire` from a coroutine. Waiters sleep on the event loop and poll,
+        since slots are shared with threads, so no thread is held per waiter.
+        Every aacquire must be paired with a `release`.
+        """
+        while True:
+            wait = self._try_enter()
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        try:
+            await self.requests.aacquire(1)
+            if self.tokens and tokens:
+                await self.tokens.aacquire(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def on_success(self):
+        """
+        Additive increase: grow the request rate (by 1% of the configured RPM)
+        and the batch each success, and add a concurrent request after each
+        full round at the current concurrency.
+        """
+        with self._cond:
+            self.successes += 1
+            self._streak = 0
+            self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 4))
+            with self.requests._lock:
+                self.requests.rate = min(self.rpm / 60.0, self.requests.rate + self.rpm / 6000.0)
+            if self.successes % max(1, self.concurrency) == 0 and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._cond.notify_all()
+
+    def on_rate_limit(self, retry_after: Optional[float] = None) -> float:
+        """
+        Multiplicative decrease, and pause every caller for `retry_after`
+        seconds (or a jittered exponential backoff). Returns the pause length.
+        """
+        with self._cond:
+            self.rate_limited += 1
+            self._streak += 1
+            self.concurrency = max(1, self.concurrency // 2)
+            with self.requests._lock:
+                self.requests.rate = max(1 / 60.0, self.requests.rate / 2)
+                self.requests.available = 0.0
+            retry_after = backoff_delay(self._streak - 1, self.base_backoff, self.max_backoff, retry_after)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            logger.warning(f"{self.name}: rate limited; pausing {retry_after:.2f}s, rate={self.requests.rate * 60:.0f}/min, concurrency={self.concurrency}")
+            return retry_after
+
+
+_LIMITER_SETTINGS = {
+    # Text generation: one prompt per request, so only the rate and concurrency adapt
+    "llm": dict(rpm=LLM_RPM, tpm=LLM_TPM, batch_size=1, max_batch_size=1,
+                concurrency=min(2, LLM_MAX_CONCURRENCY), max_concurrency=LLM_MAX_CONCURRENCY),
+    "embeddings": dict(rpm=EMBED_RPM, tpm=EMBED_TPM, batch_size=min(16, EMBED_MAX_BATCH), max_batch_size=EMBED_MAX_BATCH,
+                       concurrency=min(2, EMBED_MAX_CONCURRENCY), max_concurrency=EMBED_MAX_CONCURRENCY),
+}
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """
+    Process-wide limiter for an endpoint ("llm" or "embeddings"), so quota,
+    AIMD and circuit-breaker state is shared by every caller.
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = AdaptiveLimiter(name=name, **_LIMITER_SETTINGS[name])
+    return limiter
+
+
+def _should_retry(limiter: AdaptiveLimiter, e: Exception, attempt: int, max_retries: int) -> Optional[float]:
+    """
+    Record a failed call; returns how long to sleep before retrying, or None
+    to give up. Rate-limit pauses are applied inside the limiter itself.
+    """
+    if is_rate_limit_error(e):
+        limiter.on_rate_limit(retry_after_seconds(e))
+        return 0.0 if attempt < max_retries else None
+    if is_transient_error(e):
+        limiter.breaker.record_failure()
+        if attempt >= max_retries or limiter.breaker.state != "closed":
+            return None
+        return backoff_delay(attempt, limiter.base_backoff, limiter.max_backoff)
+    return None
+
+
+def call_with_retry(fn: Callable, limiter: AdaptiveLimiter, tokens: float = 0, max_retries: int = LLM_MAX_RETRIES):
+    """
+    Call `fn()` under `limiter`, retrying rate limits and transient errors up
+    to `max_retries` times. Raises the last error, or CircuitOpenError while
+    the endpoint's breaker is open.
+    """
+    attempt = 0
+    trial = None
+    try:
+        while True:
+            trial = limiter.breaker.before_call(trial)
+            try:
+                with limiter.slot(tokens):
+                    result = fn()
+            except Exception as e:
+                delay = _should_retry(limiter, e, attempt, max_retries)
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning(f"{limiter.name}: attempt {attempt} failed ({type(e).__name__}); retrying")
+                time.sleep(delay)
+                continue
+            limiter.breaker.record_success()
+            limiter.on_success()
+            return result
+    finally:
+        # A half-open trial that ended any other way must not block the endpoint
+        limiter.breaker.release_trial(trial)
+
+
+async def acall_with_retry(fn: Callable, limiter: AdaptiveLimiter, tokens: float = 0, max_retries: int = LLM_MAX_RETRIES):
+    """
+    Async `call_with_retry`; `fn()` returns an awaitable.
+    """
+    attempt = 0
+    trial = None
+    try:
+        while True:
+            trial = limiter.breaker.before_call(trial)
+            await limiter.aacquire(tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                limiter.release()
+
+            if error is None:
+                limiter.breaker.record_success()
+                limiter.on_success()
+                return result
+            delay = _should_retry(limiter, error, attempt, max_retries)
+            if delay is None:
+                raise error
+            attempt += 1
+            logger.warning(f"{limiter.name}: attempt {attempt} failed ({type(error).__name__}); retrying")
+            await asyncio.sleep(delay)
+    finally:
+        # Includes cancellation (e.g. a wait_for timeout) during the trial
+        limiter.breaker.release_trial(trial)
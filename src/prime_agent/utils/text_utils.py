@@ -2,8 +2,21 @@
 Utilities for text cleaning, chunking, and formatting.
 """
 import re
-from typing import List
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import threading
+from typing import Callable, List, Tuple
+
+from loguru import logger
+
+# Sentence ends (punctuation plus closing quotes/brackets, before whitespace) and paragraph breaks
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)|\n(?=[ \t]*\n)")
+# Words with their leading whitespace, so token counts match in-context encoding
+_WORD = re.compile(r"\s*\S+")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_ENCODING_NAME = "cl100k_base"
+_CHARS_PER_TOKEN = 4
+
 
 def clean_text(text: str) -> str:
     """
@@ -13,13 +26,130 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
+
+def _get_encoding():
+    """
+    Load the tiktoken encoding once. Returns None if it is unavailable
+    (e.g. offline without a cached BPE file); lengths are then estimated.
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+                except Exception as e:
+                    logger.warning(f"tiktoken encoding unavailable, estimating tokens as chars/{_CHARS_PER_TOKEN}: {e}")
+                    _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Number of tokens in text.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode_ordinary(text))
+
+
+def _length_function(unit: str) -> Callable[[List[str]], List[int]]:
+    if unit == "chars":
+        return lambda pieces: [len(p) for p in pieces]
+    if unit == "tokens":
+        encoding = _get_encoding()
+        if encoding is None:
+            return lambda pieces: [-(-len(p) // _CHARS_PER_TOKEN) for p in pieces]
+        return lambda pieces: [len(t) for t in encoding.encode_ordinary_batch(pieces)]
+    raise ValueError(f"Unknown chunk unit: {unit}")
+
+
+def _pieces(text: str, chunk_size: int, measure: Callable[[List[str]], List[int]]) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    Split text into contiguous (start, end) pieces no longer than chunk_size:
+    sentences where possible, words for over-long sentences, and hard
+    character cuts for over-long words.
+    """
+    bounds = [0] + [m.end() for m in _SENTENCE_END.finditer(text)] + [len(text)]
+    spans = [(s, e) for s, e in zip(bounds, bounds[1:]) if e > s]
+    lengths = measure([text[s:e] for s, e in spans])
+
+    pieces: List[Tuple[int, int]] = []
+    piece_lengths: List[int] = []
+    for (start, end), length in zip(spans, lengths):
+        if length <= chunk_size:
+            pieces.append((start, end))
+            piece_lengths.append(length)
+            continue
+
+        words = [(m.start(), m.end()) for m in _WORD.finditer(text, start, end)]
+        if words:
+            # Trailing whitespace after the last word belongs to the last word
+            words[-1] = (words[-1][0], end)
+        word_lengths = measure([text[s:e] for s, e in words])
+        for (ws, we), wlength in zip(words, word_lengths):
+            if wlength <= chunk_size:
+                pieces.append((ws, we))
+                piece_lengths.append(wlength)
+                continue
+            # A single "word" longer than a chunk: cut it proportionally
+            step = max(1, (we - ws) * chunk_size // wlength)
+            for cs in range(ws, we, step):
+                ce = min(cs + step, we)
+                pieces.append((cs, ce))
+                piece_lengths.append(measure([text[cs:ce]])[0])
+    return pieces, piece_lengths
+
+
+def chunk_spans(text: str, chunk_size: int = 1000, overlap: int = 100, unit: str = "chars") -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping chunks and return (start, end) offsets into
+    the original string rather than copies.
+
+    Chunks are packed from whole sentences, falling back to words (and then
+    character cuts) only for sentences longer than a chunk. `chunk_size` and
+    `overlap` are measured in `unit`: "chars" or "tokens" (tiktoken cl100k_base).
+    Each chunk repeats up to `overlap` of trailing pieces from the previous one.
+    """
+    if not text or not text.strip():
+        return []
+
+    pieces, lengths = _pieces(text, chunk_size, _length_function(unit))
+
+    spans: List[Tuple[int, int]] = []
+    i, n = 0, len(pieces)
+    while i < n:
+        total, j = 0, i
+        while j < n and (j == i or total + lengths[j] <= chunk_size):
+            total += lengths[j]
+            j += 1
+
+        start, end = pieces[i][0], pieces[j - 1][1]
+        # Trim surrounding whitespace without copying
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((start, end))
+
+        if j >= n:
+            break
+
+        # Step back over trailing pieces that fit in the overlap, always moving forward
+        back, k = 0, j
+        while k - 1 > i and back + lengths[k - 1] <= overlap:
+            k -= 1
+            back += lengths[k]
+        i = k
+
+    return spans
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100, unit: str = "chars") -> List[str]:
     """
-    Split text into chunks using LangChain's splitter.
+    Split text into chunks. See `chunk_spans` for how chunks are formed.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=overlap,
-        separators=["\n\n", "\n", ".", " ", ""]
-    )
-    return splitter.split_text(text)
+    return [text[s:e] for s, e in chunk_spans(text, chunk_size, overlap, unit)]
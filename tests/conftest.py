@@ -0,0 +1,40 @@
+"""
+Shared test fixtures.
+"""
+import pytest
+
+from prime_agent.storage import embedding_cache, http_cache, llm_cache, pdf_cache
+
+
+class HashEmbeddings:
+    """
+    Offline stand-in for the sentence-transformer: bag of hashed words.
+    """
+    def _embed(self, text):
+        vec = [0.0] * 64
+        for word in text.lower().split():
+            vec[hash(word.strip(".,")) % 64] += 1.0
+        return vec
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+@pytest.fixture
+def hash_embeddings():
+    return HashEmbeddings()
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """
+    Point the process-wide caches at the test's tmp_path instead of the
+    user's home directory.
+    """
+    monkeypatch.setattr(pdf_cache, "_cache", pdf_cache.PdfPageCache(str(tmp_path / "pdf_cache.sqlite")))
+    monkeypatch.setattr(http_cache, "_cache", http_cache.HttpCache(cache_dir=str(tmp_path / "http_cache")))
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMResponseCache(str(tmp_path / "llm_cache.sqlite")))
+    monkeypatch.setattr(embedding_cache, "_cache", embedding_cache.EmbeddingCache(str(tmp_path / "embedding_cache.sqlite")))
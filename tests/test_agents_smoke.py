@@ -29,3 +29,54 @@ def test_end_to_end_flow():
     # Since it calls LLMs, we might just check if it compiles and starts
     # For a real test, we'd mock the tools.
     pass
+
+
+class RecordingStore:
+    def __init__(self):
+        self.added = []
+
+    def existing(self, ids):
+        return {}
+
+    def embed_documents(self, texts):
+        return [[0.0] for _ in texts]
+
+    def add_embeddings(self, texts, embeddings, metadata, ids):
+        self.added.extend(zip(texts, metadata))
+
+    def delete(self, where=None):
+        return 0
+
+
+def test_research_chunks_pdf_pages_in_order(monkeypatch):
+    import contextlib
+    import time
+
+    from prime_agent.agents import research_agent
+    from prime_agent.utils.pipeline import Pipeline
+
+    store = RecordingStore()
+    pages = [f"page{i} " + " ".join(f"word{i}x{j}" for j in range(20)) for i in range(12)]
+
+    class SlowEarlyPages(Pipeline):
+        def add_stage(self, name, fn, **kwargs):
+            if name == "fetch":
+                inner = fn
+
+                def fn(item):
+                    # Earlier pages take longer, so parallel fetch workers finish them last
+                    time.sleep(0.005 * (12 - item.get("page", 0)))
+                    return inner(item)
+            return super().add_stage(name, fn, **kwargs)
+
+    monkeypatch.setattr(research_agent, "iter_pdfs_pages", lambda paths: ((paths[0], i, text) for i, text in enumerate(pages)))
+    monkeypatch.setattr(research_agent, "pinned", lambda name: contextlib.nullcontext(store))
+    monkeypatch.setattr(research_agent, "enforce_budget", lambda keep=None: 0)
+    monkeypatch.setattr(research_agent, "Pipeline", SlowEarlyPages)
+    monkeypatch.setattr(research_agent, "FETCH_CONCURRENCY", 4)
+
+    state = research_agent.research_node({"topic": "t", "depth": 0, "urls": [], "pdf_files": ["doc.pdf"]})
+
+    texts = [text for text, meta in sorted(store.added, key=lambda a: a[1]["chunk_index"])]
+    assert [text.split()[0] for text in texts] == [f"page{i}" for i in range(12)]
+    assert state["documents"] == [{"source": "doc.pdf", "title": "doc.pdf"}]
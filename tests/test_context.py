@@ -0,0 +1,44 @@
+"""
+Tests for retrieved-context pruning.
+"""
+import numpy as np
+
+from prime_agent.storage.context import mmr_select, overlap_length, prune_context, strip_overlaps
+from prime_agent.storage.numpy_store import NumpyVectorStore
+from prime_agent.utils.text_utils import chunk_text
+
+
+def test_mmr_skips_near_duplicates():
+    query = [1.0, 0.0, 0.0]
+    vectors = [[0.9, 0.1, 0.0], [0.9, 0.1, 0.0001], [0.6, 0.0, 0.8]]
+    assert mmr_select(query, vectors, 2) == [0, 2]
+    assert mmr_select(query, vectors, 2, lambda_mult=1.0) == [0, 1]
+
+
+def test_overlap_length():
+    assert overlap_length("alpha beta gamma delta epsilon zeta eta", "delta epsilon zeta eta theta iota kappa") == len("delta epsilon zeta eta")
+    assert overlap_length("completely different text here", "nothing in common with the other one") == 0
+
+
+def test_strip_overlaps_between_adjacent_chunks():
+    text = " ".join(f"Sentence {i} explains one more detail." for i in range(40))
+    chunks = chunk_text(text, chunk_size=200, overlap=60)
+    results = [{"id": str(i), "content": c, "metadata": {"source": "s", "chunk_index": i}} for i, c in enumerate(chunks)]
+
+    stripped = strip_overlaps(results)
+    assert stripped[0]["content"] == chunks[0]
+    assert " ".join(r["content"] for r in stripped) == text
+    # A chunk whose predecessor was not retrieved keeps its overlap
+    assert strip_overlaps(results[2:3])[0]["content"] == chunks[2]
+
+
+def test_prune_context_reports_removed_tokens(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    docs = ["scrum roles and events", "scrum roles and events", "kanban boards limit work", "scrum sprint review"]
+    store.add_documents(docs, [{"source": f"s{i}"} for i in range(4)], [str(i) for i in range(4)])
+    results = store.search("scrum roles", k=4)
+
+    pruned, stats = prune_context(store, "scrum roles", results, k=2)
+    assert len(pruned) == 2
+    assert len({r["content"] for r in pruned}) == 2
+    assert stats["tokens_removed"] == stats["tokens_before"] - stats["tokens_after"] > 0
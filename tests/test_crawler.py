@@ -0,0 +1,40 @@
+"""
+Tests for the crawler engine.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prime_agent.tools import crawler
+from prime_agent.tools.crawler import crawl
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """
+    Every page /N links to /N+1 .. /N+3, so the site is effectively unbounded.
+    """
+    def do_GET(self):
+        n = int(self.path.strip("/") or 0)
+        links = "".join(f'<a href="/{n + i}">next</a>' for i in range(1, 4))
+        body = f"<html><body><article><p>Page {n}</p>{links}<a href='mailto:x@y.z'>m</a></article></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_crawl_streams_pages_and_stops_at_max(monkeypatch):
+    monkeypatch.setattr(crawler, "HTTP_CACHE_ENABLED", False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        root = f"http://127.0.0.1:{server.server_port}/0"
+        pages = list(crawl(root, max_pages=7, concurrency=3, delay=0))
+        urls = [p["url"] for p in pages]
+        assert len(pages) == 7
+        assert len(set(urls)) == 7
+        assert urls[0] == root
+        assert all(p["text"].startswith("Page ") for p in pages)
+    finally:
+        server.shutdown()
@@ -0,0 +1,55 @@
+"""
+Tests for batched credibility scoring, with a fake LLM client.
+"""
+import re
+
+from prime_agent.tools import credibility
+
+
+class FakeClient:
+    """
+    Answers batched prompts with one assessment per numbered source, except
+    that batches larger than `max_ok` come back unparseable ({}).
+    """
+    def __init__(self, max_ok=100):
+        self.max_ok = max_ok
+        self.batch_sizes = []
+
+    def generate_structured(self, prompt, schema):
+        if "assessments" not in schema["properties"]:
+            self.batch_sizes.append(1)
+            return {"score": 0.5, "label": "Medium", "bias": "Neutral", "explanation": "single"}
+        sources = re.findall(r"^\[(\d+)\] Source: (.+)$", prompt, flags=re.MULTILINE)
+        self.batch_sizes.append(len(sources))
+        if len(sources) > self.max_ok:
+            return {}
+        return {"assessments": [
+            {"id": int(i), "source": s, "score": 0.9, "label": "High", "bias": "Neutral", "explanation": "batched"}
+            for i, s in sources
+        ]}
+
+
+def test_batches_map_back_by_source(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(credibility, "get_llm_client", lambda model: client)
+    samples = {f"https://site{i}.org/page": f"text {i}" for i in range(10)}
+
+    results = credibility.assess_credibility_batch(samples, batch_size=4)
+    assert set(results) == set(samples)
+    assert all(r["label"] == "High" for r in results.values())
+    assert client.batch_sizes == [4, 4, 2]
+
+
+def test_parse_failures_fall_back_to_smaller_batches(monkeypatch):
+    client = FakeClient(max_ok=2)
+    monkeypatch.setattr(credibility, "get_llm_client", lambda model: client)
+    samples = {f"s{i}": f"text {i}" for i in range(8)}
+
+    results = credibility.assess_credibility_batch(samples, batch_size=8)
+    assert set(results) == set(samples)
+    assert client.batch_sizes == [8, 4, 4, 2, 2, 2, 2]
+
+    client = FakeClient(max_ok=0)
+    monkeypatch.setattr(credibility, "get_llm_client", lambda model: client)
+    results = credibility.assess_credibility_batch({"a": "x", "b": "y"}, batch_size=2)
+    assert [r["explanation"] for r in results.values()] == ["single", "single"]
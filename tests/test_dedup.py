@@ -0,0 +1,19 @@
+"""
+Tests for near-duplicate detection.
+"""
+from prime_agent.utils.dedup import NearDuplicateFilter
+
+BASE = " ".join(f"word{i} alpha beta gamma" for i in range(60))
+
+def test_near_duplicates_are_dropped():
+    dedup = NearDuplicateFilter(threshold=0.8)
+    assert not dedup.is_duplicate(BASE)
+    assert dedup.is_duplicate(BASE.upper())
+    assert dedup.is_duplicate(BASE + " trailing footer")
+    assert not dedup.is_duplicate(" ".join(f"other{i} delta epsilon" for i in range(60)))
+    assert dedup.dropped == 2 and dedup.seen == 4
+
+def test_lsh_threshold_not_above_requested():
+    dedup = NearDuplicateFilter(threshold=0.85)
+    assert dedup.bands * dedup.rows == dedup.num_perm
+    assert (1 / dedup.bands) ** (1 / dedup.rows) <= 0.85
@@ -0,0 +1,73 @@
+"""
+Tests for the SQLite embedding cache.
+"""
+import multiprocessing
+
+import numpy as np
+
+from prime_agent.storage import embed_utils, embedding_cache
+from prime_agent.storage.embedding_cache import EmbeddingCache
+
+
+def test_bulk_round_trip_as_float32(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    cache.put_many(["a", "b"], [[0.1, 0.2, 0.3], [1.0, 2.0, 3.0]])
+
+    found = cache.get_many(["b", "missing", "a", "b"])
+    assert sorted(found) == [0, 2, 3]
+    assert found[0] == [1.0, 2.0, 3.0]
+    assert np.allclose(found[2], [0.1, 0.2, 0.3])
+    assert cache.get_many(["a"], model="other-model") == {}
+    assert cache.total_bytes() == 2 * 3 * 4
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), max_bytes=10 * 16)
+    clock = iter(range(1000))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock) * 10000.0)
+
+    cache.put_many([f"t{i}" for i in range(10)], [[float(i)] * 4 for i in range(10)])
+    cache.get_many(["t0"])  # refreshes t0
+    cache.put_many(["new"], [[9.0] * 4])
+
+    assert cache.total_bytes() <= 10 * 16
+    assert 0 in cache.get_many(["t0"])
+    assert cache.get_many(["t1"]) == {}
+
+
+def _writer(path, worker):
+    cache = EmbeddingCache(path)
+    for batch in range(5):
+        texts = [f"w{worker}-{batch}-{i}" for i in range(50)]
+        cache.put_many(texts, [[float(worker)] * 8] * 50)
+
+
+def test_concurrent_writers_do_not_corrupt(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    EmbeddingCache(path)
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    assert all(p.exitcode == 0 for p in workers)
+
+    cache = EmbeddingCache(path)
+    texts = [f"w{w}-{b}-{i}" for w in range(4) for b in range(5) for i in range(50)]
+    assert len(cache.get_many(texts)) == len(texts)
+    assert cache.total_bytes() == len(texts) * 8 * 4
+
+
+def test_embed_texts_uses_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_cache", EmbeddingCache(str(tmp_path / "emb.sqlite")))
+    calls = []
+
+    def fake_api(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] * 3 for t in texts]
+
+    monkeypatch.setattr(embed_utils, "call_embedding_api", fake_api)
+    assert embed_utils.embed_texts_with_retry(["aa", "bbb"]) == [[2.0] * 3, [3.0] * 3]
+    assert embed_utils.embed_texts_with_retry(["bbb", "c"]) == [[3.0] * 3, [1.0] * 3]
+    assert calls == [["aa", "bbb"], ["c"]]
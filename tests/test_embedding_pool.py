@@ -0,0 +1,43 @@
+"""
+Tests for the multi-process embedding pool, using a small deterministic model
+so no weights are downloaded.
+"""
+import numpy as np
+
+from prime_agent.storage.embedding_pool import EmbeddingPool, length_batches
+
+
+class CharModel:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        return np.array([[len(t), t.count("a"), t.count(" "), 1.0] for t in texts], dtype=np.float32)
+
+
+def load_char_model(model_name):
+    return CharModel(model_name)
+
+
+def test_length_batches_sort_and_respect_budget():
+    texts = ["x" * n for n in (400, 8, 4000, 40, 8, 400)]
+    batches = length_batches(texts, budget=1000)
+    order = [i for batch in batches for i in batch]
+    assert sorted(order) == list(range(len(texts)))
+    assert [len(texts[i]) for i in order] == sorted(len(t) for t in texts)
+    for batch in batches:
+        longest = max(len(texts[i]) for i in batch)
+        assert len(batch) == 1 or len(batch) * (longest // 4 + 2) <= 1000
+
+
+def test_pool_embeds_in_input_order():
+    texts = [("a " * (i % 37)) + f"chunk {i}" for i in range(300)]
+    with EmbeddingPool("fake", workers=2, loader=load_char_model, batch_tokens=256) as pool:
+        vectors = pool.embed(texts)
+        assert vectors.shape == (300, 4)
+        assert np.array_equal(vectors, CharModel("fake").encode(texts))
+        assert pool.last_stats["chunks"] == 300 and pool.last_stats["batches"] > 2
+        assert pool.embed_query("banana") == [6.0, 3.0, 0.0, 1.0]
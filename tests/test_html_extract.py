@@ -0,0 +1,65 @@
+"""
+Tests for HTML extraction.
+"""
+import codecs
+
+import pytest
+
+from prime_agent.tools.html_extract import available_backends, extract_html, extract_response, header_charset
+
+PAGE = """<html><head><title>Guide</title></head><body>
+<header><a href="/home">Home</a></header>
+<nav><ul><li><a href="/docs">Docs</a></li></ul></nav>
+<div class="post"><h1>Intro</h1><p>First <b>point</b>.</p><script>var x = 1;</script>
+<ul><li>Item</li></ul><a href="https://other.org/x">Other</a></div>
+<footer>Footer text</footer></body></html>"""
+
+def test_extract_html():
+    result = extract_html(PAGE, "https://example.com/guide/", backend="html.parser")
+    assert result["title"] == "Guide"
+    assert result["text"] == "Intro\nFirst point .\nItem"
+    assert "Footer" not in result["text"] and "Docs" not in result["text"]
+    assert result["links"] == ["https://example.com/home", "https://example.com/docs", "https://other.org/x"]
+
+def test_backends_agree():
+    expected = extract_html(PAGE, "https://example.com/", backend="html.parser")
+    for backend in available_backends():
+        assert extract_html(PAGE, "https://example.com/", backend=backend) == expected
+
+NON_ASCII_PAGE = "<html><head><title>Résumé</title></head><body><article><p>Café à Zürich — naïve</p></article></body></html>"
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("charset", ["utf-8", "iso-8859-1"])
+def test_header_only_charset_is_honoured(backend, charset):
+    body = NON_ASCII_PAGE.replace("—", "-").encode(charset)
+    resp = {"url": "https://example.com/", "content": body, "headers": {"Content-Type": f"text/html; charset={charset.upper()}"}}
+    assert header_charset(resp["headers"]) == codecs.lookup(charset).name
+    result = extract_html(body, resp["url"], backend=backend, encoding=header_charset(resp["headers"]))
+    assert result["title"] == "Résumé"
+    assert result["text"] == "Café à Zürich - naïve"
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_meta_charset_is_sniffed_from_bytes(backend):
+    body = NON_ASCII_PAGE.replace("<head>", '<head><meta charset="utf-8">').encode("utf-8")
+    result = extract_html(body, backend=backend)
+    assert result["title"] == "Résumé"
+    assert result["text"] == "Café à Zürich — naïve"
+
+def test_extract_response_uses_header_charset():
+    body = NON_ASCII_PAGE.encode("utf-8")
+    resp = {"url": "https://example.com/", "content": body, "headers": {"Content-Type": "text/html; charset=utf-8"}, "encoding": "utf-8"}
+    assert extract_response(resp)["text"] == "Café à Zürich — naïve"
+
+XHTML_PAGE = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Résumé</title></head>'
+    '<body><article><p>Café à Zürich — naïve</p></article></body></html>'
+)
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", [XHTML_PAGE, XHTML_PAGE.encode("utf-8")], ids=["str", "bytes"])
+def test_xhtml_with_xml_declaration(backend, page):
+    result = extract_html(page, backend=backend)
+    assert result["title"] == "Résumé"
+    assert result["text"] == "Café à Zürich — naïve"
@@ -0,0 +1,68 @@
+"""
+Tests for the HTTP response cache.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prime_agent.storage import http_cache
+from prime_agent.storage.http_cache import HttpCache, canonical_url
+from prime_agent.tools.http_client import fetch_cached
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = b"<html><body><p>cached page</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.send_header("Cache-Control", "max-age=0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_canonical_url():
+    assert canonical_url("HTTP://Example.COM:80/a?b=2&a=1#frag") == "http://example.com/a?a=1&b=2"
+
+def test_put_get_and_text(tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path), default_ttl=60)
+    body_hash = cache.put("https://example.com/x", 200, {"Content-Type": "text/html"}, b"<p>hi</p>")
+    entry = cache.get("https://example.com/x#top")
+    assert entry["fresh"] and entry["content"] == b"<p>hi</p>"
+    assert cache.get_text(body_hash) is None
+    cache.put_text(body_hash, "hi")
+    assert cache.get_text(body_hash) == "hi"
+    assert cache.put("https://example.com/y", 200, {"Cache-Control": "no-store"}, b"x") is None
+
+def test_lru_eviction(tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path), max_bytes=250, default_ttl=60)
+    for i in range(3):
+        cache.put(f"https://example.com/{i}", 200, {}, bytes([i]) * 100)
+        cache.get("https://example.com/0")
+    assert cache.get("https://example.com/0") is not None
+    assert cache.get("https://example.com/1") is None
+    assert cache.total_bytes() <= 250
+
+def test_revalidation_with_etag(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "_cache", HttpCache(cache_dir=str(tmp_path)))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/page"
+        first = fetch_cached(url)
+        second = fetch_cached(url)
+        assert not first["from_cache"]
+        assert second["from_cache"] and second["status"] == 200
+        assert second["content"] == first["content"]
+        assert _ETagHandler.hits == 2
+    finally:
+        server.shutdown()
@@ -0,0 +1,43 @@
+"""
+Tests for the shared HTTP client.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prime_agent.tools.http_client import fetch_many
+
+DELAY = 0.3
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(DELAY)
+        body = f"<html><body><p>{self.path}</p></body></html>".encode()
+        self.send_response(200 if self.path != "/missing" else 404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_fetch_many_is_concurrent_and_ordered():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        urls = [f"{base}/page{i}" for i in range(6)] + [f"{base}/missing"]
+
+        start = time.perf_counter()
+        results = fetch_many(urls, max_workers=8, per_host=8, use_cache=False)
+        wall = time.perf_counter() - start
+
+        assert [r["url"] for r in results] == urls
+        assert b"/page3" in results[3]["content"]
+        assert results[-1]["status"] == 404
+        assert all(r["elapsed"] >= DELAY for r in results)
+        assert wall < DELAY * len(urls) / 2
+    finally:
+        server.shutdown()
@@ -0,0 +1,85 @@
+"""
+Tests for the BM25 index and hybrid retrieval.
+"""
+from prime_agent.storage.bm25 import BM25Index, tokenize
+from prime_agent.storage.hybrid import HybridRetriever, reciprocal_rank_fusion
+from prime_agent.storage.numpy_store import NumpyVectorStore
+
+
+def test_tokenize_keeps_product_names():
+    assert tokenize("GPT-4 beats v1.2 on RAG") == ["gpt-4", "beats", "v1.2", "on", "rag"]
+
+
+def test_bm25_ranking_updates_and_filters():
+    index = BM25Index()
+    index.add(
+        ["1", "2", "3"],
+        ["the cat sat on the mat", "dogs and cats", "LoRA fine-tuning of LLMs with LoRA adapters"],
+        [{"source": "a"}, {"source": "b"}, {"source": "a"}],
+    )
+    assert [id for id, _ in index.search("lora")] == ["3"]
+    assert [id for id, _ in index.search("cat mat")][0] == "1"
+    assert index.search("cat", filter={"source": "b"}) == []
+
+    index.add(["3"], ["nothing relevant"])
+    assert index.search("lora") == []
+    index.remove(["1"])
+    assert index.search("mat") == []
+    assert len(index) == 2
+
+
+def test_bm25_compact_keeps_results():
+    index = BM25Index()
+    index.add([str(i) for i in range(3000)], [f"doc number{i} shared" for i in range(3000)])
+    index.remove([str(i) for i in range(2000)])  # triggers compaction
+    assert len(index) == 1000
+    assert [id for id, _ in index.search("number2500")] == ["2500"]
+    assert len(index.search("shared", k=5000)) == 1000
+
+
+def test_rrf_prefers_items_in_both_rankings():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]])[0] == "c"
+
+
+def test_hybrid_finds_exact_terms_and_tracks_writes(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_documents(
+        ["Scrum sprint planning basics.", "The RACI matrix assigns roles.", "Sprint reviews and retrospectives."],
+        [{"source": "a"}, {"source": "b"}, {"source": "a"}],
+        ["1", "2", "3"],
+    )
+    retriever = HybridRetriever(store, candidates=3)
+    assert retriever.search("raci", k=1)[0]["id"] == "2"
+
+    # Writes after the index is built are picked up
+    store.add_documents(["Kanban WIP limits."], [{"source": "c"}], ["4"])
+    assert retriever.search("kanban wip", k=1)[0]["content"] == "Kanban WIP limits."
+    store.delete(ids=["2"])
+    assert "2" not in [r["id"] for r in retriever.search("raci", k=4)]
+
+
+def test_attached_indexes_count_towards_store_memory(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_documents([f"chunk number {i} about retrieval" for i in range(50)], [{"source": "s"}] * 50, [str(i) for i in range(50)])
+    base = store.memory_bytes()
+
+    retriever = HybridRetriever(store)
+    retriever.search("retrieval", k=3)
+    assert retriever.index.memory_bytes() > 0
+    assert store.memory_bytes() == base + retriever.index.memory_bytes()
+
+
+def test_writes_during_index_build_are_indexed(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_documents(["existing chunk about caching"], [{"source": "a"}], ["1"])
+    scan = store.iter_documents
+
+    def scan_with_concurrent_write(*args, **kwargs):
+        for batch in scan(*args, **kwargs):
+            store.add_documents(["chunk written mid-scan about lora"], [{"source": "b"}], ["2"])
+            yield batch
+
+    store.iter_documents = scan_with_concurrent_write
+    retriever = HybridRetriever(store)
+    assert [r["id"] for r in retriever.search("lora", k=1)] == ["2"]
+    assert len(retriever.index) == 2
@@ -0,0 +1,77 @@
+"""
+Tests for the LLM response cache and its use by LLMClient.
+"""
+import time
+
+from prime_agent.llm.client import LLMClient
+from prime_agent.storage import llm_cache
+from prime_agent.storage.llm_cache import LLMResponseCache, llm_cache_key
+from prime_agent.utils.rate_limit import AdaptiveLimiter
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChatModel:
+    temperature = 0.3
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if "JSON" in messages[0].content:
+            return FakeResponse('```json\n{"answer": %d}\n```' % self.calls)
+        return FakeResponse(f"reply {self.calls}")
+
+
+def _client(tmp_path, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_cache, "_cache", LLMResponseCache(str(tmp_path / "llm.sqlite")))
+    client = LLMClient(limiter=AdaptiveLimiter(rpm=60000))
+    client.llm = FakeChatModel()
+    return client
+
+
+def test_key_covers_model_messages_schema_and_temperature():
+    base = llm_cache_key("m", [("human", "hi")], {"a": 1}, 0.3)
+    assert base == llm_cache_key("m", [("human", "hi")], {"a": 1}, 0.3)
+    assert len({
+        base,
+        llm_cache_key("m2", [("human", "hi")], {"a": 1}, 0.3),
+        llm_cache_key("m", [("system", "hi")], {"a": 1}, 0.3),
+        llm_cache_key("m", [("human", "hi")], {"a": 2}, 0.3),
+        llm_cache_key("m", [("human", "hi")], {"a": 1}, 0.7),
+    }) == 5
+
+
+def test_ttl_and_size_cap(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_bytes=1000, ttl=60)
+    cache.put("short", "m", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+    for i in range(20):
+        cache.put(f"k{i}", "m", "y" * 100)
+    assert cache.total_bytes() <= 1000
+    assert cache.get("k19") == "y" * 100
+    assert cache.get("k0") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_client_serves_repeats_from_cache(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+
+    assert client.generate_text("Summarise X", system_prompt="Be brief") == "reply 1"
+    assert client.generate_text("Summarise X", system_prompt="Be brief") == "reply 1"
+    assert client.generate_text("Summarise X", system_prompt="Be brief", use_cache=False) == "reply 2"
+    assert client.generate_structured("Quiz on X", {"answer": "int"}) == {"answer": 3}
+    assert client.generate_structured("Quiz on X", {"answer": "int"}) == {"answer": 3}
+    assert client.llm.calls == 3
+
+    stats = llm_cache.get_llm_cache().stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+
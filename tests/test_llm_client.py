@@ -0,0 +1,112 @@
+"""
+Tests for the shared per-model LLM clients and the async API.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from prime_agent.llm import client as client_module
+from prime_agent.utils.rate_limit import AdaptiveLimiter
+
+
+def test_shared_client_per_model(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(client_module, "_clients", {})
+    created = []
+    monkeypatch.setattr(client_module, "LLMClient", lambda model_name: created.append(model_name) or object())
+
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(client_module.get_llm_client("m1"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in seen}) == 1
+    assert client_module.get_llm_client("m2") is not seen[0]
+    assert created == ["m1", "m2"]
+
+
+class LatencyChatModel:
+    """
+    Fake chat model: every call takes `latency` seconds and the peak number
+    of calls in flight is recorded.
+    """
+    temperature = 0.0
+
+    def __init__(self, latency=0.05, content='{"ok": true}'):
+        self.latency = latency
+        self.content = content
+        self.in_flight = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, messages):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(content=self.content)
+
+
+def test_async_calls_overlap_up_to_the_limit():
+    model = LatencyChatModel(latency=0.05, content="done")
+    client = client_module.LLMClient(llm=model, max_concurrency=3, limiter=AdaptiveLimiter(rpm=60000, concurrency=8))
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.agenerate_text(f"q{i}", use_cache=False) for i in range(9)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == ["done"] * 9
+    assert model.peak == 3
+    assert 0.15 <= elapsed < 0.45  # three waves, not nine sequential calls
+
+
+def test_async_structured_timeout_and_cancellation():
+    model = LatencyChatModel(latency=0.05)
+    client = client_module.LLMClient(llm=model, limiter=AdaptiveLimiter(rpm=60000))
+
+    assert asyncio.run(client.agenerate_structured("q", {"ok": "bool"}, use_cache=False)) == {"ok": True}
+
+    model.latency = 1.0
+    assert asyncio.run(client.agenerate_structured("q", {"ok": "bool"}, use_cache=False, timeout=0.05)) == {}
+    assert model.cancelled == 1
+
+    async def cancel_midway():
+        task = asyncio.create_task(client.agenerate_text("q", use_cache=False))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    assert model.cancelled == 2 and model.in_flight == 0
+
+
+def test_rate_limited_call_is_retried():
+    class QuotaError(Exception):
+        pass
+
+    class FlakyModel:
+        temperature = 0.0
+        calls = 0
+
+        def invoke(self, messages):
+            self.calls += 1
+            if self.calls == 1:
+                raise QuotaError("429 Resource has been exhausted, retry in 10ms")
+            return SimpleNamespace(content="answer")
+
+    limiter = AdaptiveLimiter(rpm=60000)
+    client = client_module.LLMClient(llm=FlakyModel(), limiter=limiter)
+    assert client.generate_text("q", use_cache=False) == "answer"
+    assert limiter.rate_limited == 1
@@ -0,0 +1,143 @@
+"""
+Tests for the memory-mapped numpy vector index.
+"""
+import numpy as np
+import pytest
+
+from prime_agent.storage.numpy_store import NumpyVectorStore
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_matches_exact_ranking(tmp_path, dtype, hash_embeddings):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 32)).astype(np.float32)
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path), dtype=dtype)
+    store.add_embeddings(
+        [f"doc {i}" for i in range(500)],
+        vectors.tolist(),
+        [{"source": f"s{i % 5}"} for i in range(500)],
+        [str(i) for i in range(500)],
+    )
+
+    query = vectors[42] + 0.01
+    results = store.search_by_vector(query.tolist(), k=5)
+    assert results[0]["id"] == "42"
+    assert len(results) == 5
+
+    filtered = store.search_by_vector(query.tolist(), k=5, filter={"source": "s1"})
+    assert all(r["metadata"]["source"] == "s1" for r in filtered)
+
+
+def test_upsert_delete_compact_and_reopen(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_documents(
+        ["Graph neural networks.", "Rust ownership rules.", "Transformer attention."],
+        [{"source": "a", "chunk_index": 0}, {"source": "b", "chunk_index": 0}, {"source": "a", "chunk_index": 1}],
+        ["1", "2", "3"],
+    )
+    store.add_documents(["Rust borrow checker."], [{"source": "b", "chunk_index": 0}], ["2"])
+    assert store.count() == 3
+    assert store.existing(["2"]) == {"2": "Rust borrow checker."}
+
+    assert store.delete(where={"$and": [{"source": "a"}, {"chunk_index": {"$gte": 1}}]}) == 1
+    assert sorted(r["id"] for r in store.search("attention", k=5)) == ["1", "2"]
+
+    reopened = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    assert reopened.count() == 2
+    assert reopened.compact() == 2
+    assert sorted(r["id"] for r in reopened.search("rust", k=5)) == ["1", "2"]
+
+    reopened.clear()
+    assert reopened.count() == 0
+    assert reopened.search("rust") == []
+
+
+def test_search_many_matches_single_queries(tmp_path, hash_embeddings):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path), dtype="int8")
+    store.add_embeddings([f"doc {i}" for i in range(300)], vectors.tolist(), [{"source": f"s{i % 3}"} for i in range(300)], [str(i) for i in range(300)])
+
+    queries = rng.normal(size=(100, 16)).astype(np.float32)
+    filters = [{"source": f"s{i % 4}"} if i % 4 < 3 else None for i in range(100)]
+    batched = store.search_many_by_vector(queries, k=3, filters=filters)
+    single = [store.search_by_vector(q, k=3, filter=f) for q, f in zip(queries, filters)]
+    assert [[r["id"] for r in rs] for rs in batched] == [[r["id"] for r in rs] for rs in single]
+
+
+def test_sample_by_source(tmp_path, hash_embeddings):
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_documents(
+        [f"part {i}" for i in range(4)] + ["other"],
+        [{"source": "a", "chunk_index": i} for i in (2, 0, 3, 1)] + [{"source": "b", "chunk_index": 0}],
+        ["a2", "a0", "a3", "a1", "b0"],
+    )
+    assert [r["id"] for r in store.sample_by_source(["a", "b"], n=2)["a"]] == ["a0", "a1"]
+    assert [r["id"] for r in store.sample_by_source(["a"], n=2, spread=True)["a"]] == ["a0", "a3"]
+
+    store.delete(ids=["a0"])
+    assert [r["id"] for r in store.get_by_metadata({"source": "a"}, limit=2)] == ["a1", "a2"]
+    assert [r["id"] for r in store.get_by_metadata({"chunk_index": 0})] == ["b0"]
+
+
+def test_torn_log_line_then_append_keeps_rows_aligned(tmp_path, hash_embeddings):
+    vectors = np.eye(4, dtype=np.float32)
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_embeddings(["a", "b"], vectors[:2].tolist(), [{}, {}], ["a", "b"])
+    store.close()
+
+    # Crash while b's log entry was being written
+    log = tmp_path / "log.jsonl"
+    log.write_bytes(log.read_bytes()[:-10])
+
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    assert store.count() == 1
+    store.add_embeddings(["c", "d"], vectors[2:].tolist(), [{}, {}], ["c", "d"])
+
+    reopened = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    assert sorted(id for ids, _, _ in reopened.iter_documents() for id in ids) == ["a", "c", "d"]
+    for i, id in ((0, "a"), (2, "c"), (3, "d")):
+        top = reopened.search_by_vector(vectors[i].tolist(), k=1)[0]
+        assert top["id"] == id and top["score"] > 0.99
+
+
+def test_replay_places_puts_at_their_logged_rows(tmp_path, hash_embeddings):
+    vectors = np.eye(4, dtype=np.float32)
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    store.add_embeddings(["a", "b", "c", "d"], vectors.tolist(), [{}] * 4, ["a", "b", "c", "d"])
+    store.close()
+
+    # Log written before torn tails were cut off: b's fragment glued onto c's entry
+    lines = (tmp_path / "log.jsonl").read_text().splitlines(keepends=True)
+    (tmp_path / "log.jsonl").write_text(lines[0] + lines[1][:20] + lines[2] + lines[3])
+
+    reopened = NumpyVectorStore(embeddings=hash_embeddings, directory=str(tmp_path))
+    assert reopened.count() == 2
+    assert reopened.search_by_vector(vectors[3].tolist(), k=1)[0]["id"] == "d"
+    assert reopened.compact() == 2
+    assert reopened.search_by_vector(vectors[3].tolist(), k=1)[0]["id"] == "d"
+
+
+def test_compaction_interrupted_before_switch_keeps_old_generation(tmp_path, hash_embeddings, monkeypatch):
+    vectors = np.eye(4, dtype=np.float32)
+    directory = tmp_path / "index"
+    store = NumpyVectorStore(embeddings=hash_embeddings, directory=str(directory), dtype="int8")
+    store.add_embeddings(["a", "b", "c", "d"], vectors.tolist(), [{}] * 4, ["a", "b", "c", "d"])
+    store.delete(ids=["a", "b"])
+
+    def crash():
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(store, "_write_manifest", crash)
+    with pytest.raises(OSError):
+        store.compact()
+    assert store.search_by_vector(vectors[3].tolist(), k=1)[0]["id"] == "d"
+
+    reopened = NumpyVectorStore(embeddings=hash_embeddings, directory=str(directory))
+    assert sorted(p.name for p in directory.iterdir()) == ["log.jsonl", "manifest.json", "scales.bin", "vectors.bin"]
+    assert reopened.search_by_vector(vectors[3].tolist(), k=1)[0]["id"] == "d"
+
+    assert reopened.compact() == 2
+    assert sorted(p.name for p in directory.iterdir()) == ["log.1.jsonl", "manifest.json", "scales.1.bin", "vectors.1.bin"]
+    again = NumpyVectorStore(embeddings=hash_embeddings, directory=str(directory))
+    assert [again.search_by_vector(vectors[i].tolist(), k=1)[0]["id"] for i in (2, 3)] == ["c", "d"]
@@ -0,0 +1,55 @@
+"""
+Tests for PDF loading.
+"""
+from reportlab.pdfgen import canvas
+
+from prime_agent.storage import pdf_cache
+from prime_agent.storage.pdf_cache import PdfPageCache
+from prime_agent.tools import pdf_loader
+from prime_agent.tools.pdf_loader import iter_pdf_pages, iter_pdfs_pages, load_pdf
+
+def _make_pdf(path, pages):
+    c = canvas.Canvas(str(path))
+    for i in range(pages):
+        c.drawString(72, 720, f"Page number {i}")
+        c.showPage()
+    c.save()
+
+def test_pages_stream_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_cache, "_cache", PdfPageCache(str(tmp_path / "pages.sqlite")))
+    pdf = tmp_path / "doc.pdf"
+    _make_pdf(pdf, 3)
+
+    pages = list(iter_pdf_pages(str(pdf), workers=1))
+    assert [p.strip() for p in pages] == ["Page number 0", "Page number 1", "Page number 2"]
+    assert load_pdf(str(pdf)) == "".join(f"{p}\n" for p in pages)
+
+    # Second pass must come from the cache without touching pypdf page extraction
+    monkeypatch.setattr(pdf_loader.PdfReader, "pages", property(lambda self: [None] * 3))
+    assert list(iter_pdf_pages(str(pdf), workers=1)) == pages
+
+def test_parallel_extraction(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_cache, "_cache", PdfPageCache(str(tmp_path / "pages.sqlite")))
+    monkeypatch.setattr(pdf_loader, "PDF_PARALLEL_MIN_PAGES", 1)
+    paths = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+    _make_pdf(paths[0], 20)
+    _make_pdf(paths[1], 2)
+
+    pages = list(iter_pdfs_pages([str(p) for p in paths], workers=2))
+    assert [(path, n) for path, n, _ in pages] == [(str(paths[0]), i) for i in range(20)] + [(str(paths[1]), 0), (str(paths[1]), 1)]
+    assert pages[17][2].strip() == "Page number 17"
+
+def test_missing_file():
+    assert load_pdf("/nonexistent/file.pdf") == ""
+
+def test_same_pdf_under_two_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_loader, "PDF_PARALLEL_MIN_PAGES", 1)
+    first, copy = tmp_path / "a.pdf", tmp_path / "copy.pdf"
+    _make_pdf(first, 18)
+    copy.write_bytes(first.read_bytes())
+
+    for workers in (2, 1):
+        monkeypatch.setattr(pdf_cache, "_cache", PdfPageCache(str(tmp_path / f"pages{workers}.sqlite")))
+        pages = list(iter_pdfs_pages([str(first), str(copy)], workers=workers))
+        assert [(path, n) for path, n, _ in pages] == [(str(first), i) for i in range(18)] + [(str(copy), i) for i in range(18)]
+        assert pages[18 + 17][2].strip() == "Page number 17"
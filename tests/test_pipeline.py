@@ -0,0 +1,32 @@
+"""
+Tests for the streaming pipeline.
+"""
+import pytest
+
+from prime_agent.utils.pipeline import Pipeline
+
+def test_pipeline_stages_and_counters():
+    seen = []
+    pipeline = (
+        Pipeline(queue_size=2)
+        .add_stage("split", lambda n: range(n), workers=3)
+        .add_stage("square", lambda batch: [x * x for x in batch], batch_size=4)
+        .add_stage("sink", lambda x: seen.append(x) or [x])
+    )
+    stats = pipeline.run(range(1, 11))
+
+    assert sorted(seen) == sorted(x * x for n in range(1, 11) for x in range(n))
+    assert stats["split"]["items_in"] == 10
+    assert stats["split"]["items_out"] == 55
+    assert stats["square"]["items_in"] == 55
+    assert stats["sink"]["items_out"] == 55
+
+def test_pipeline_propagates_errors():
+    def boom(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return [x]
+
+    pipeline = Pipeline(queue_size=1).add_stage("boom", boom).add_stage("sink", lambda x: [x])
+    with pytest.raises(ValueError):
+        pipeline.run(range(100))
@@ -0,0 +1,234 @@
+"""
+Tests for the adaptive rate limiter, including concurrent embedding against a
+fake quota-enforcing endpoint.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from prime_agent.storage import embed_utils, embedding_cache
+from prime_agent.storage.embedding_cache import EmbeddingCache
+from prime_agent.utils import rate_limit
+from prime_agent.utils.rate_limit import (
+    AdaptiveLimiter, CircuitBreaker, CircuitOpenError, TokenBucket,
+    acall_with_retry, call_with_retry, is_rate_limit_error, retry_after_seconds,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("429 Resource has been exhausted (e.g. check quota).")
+        self.response = FakeResponse(429, {"Retry-After": str(retry_after)})
+
+
+class FakeEmbeddingEndpoint:
+    """
+    Allows `quota` requests per `window` seconds and at most `max_batch` texts
+    per request; answers 429 with Retry-After beyond that.
+    """
+    def __init__(self, quota=5, window=0.2, max_batch=100):
+        self.quota = quota
+        self.window = window
+        self.max_batch = max_batch
+        self.calls = []
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            now = time.monotonic()
+            recent = [t for t in self.calls if now - t < self.window]
+            if len(recent) >= self.quota:
+                self.rejected += 1
+                raise FakeRateLimitError(round(max(0.01, self.window - (now - recent[0])), 3))
+            self.calls.append(now)
+        assert len(texts) <= self.max_batch
+        time.sleep(0.01)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(per_minute=1200, capacity=1)  # 20 per second
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_rate_limit_detection_and_retry_after():
+    assert is_rate_limit_error(FakeRateLimitError(1))
+    assert retry_after_seconds(FakeRateLimitError(2.5)) == 2.5
+    assert retry_after_seconds(Exception("Quota exceeded, please retry in 7s")) == 7.0
+    assert retry_after_seconds(Exception("retry_delay { seconds: 30 }")) == 30.0
+    assert not is_rate_limit_error(ValueError("bad input"))
+
+
+def test_aimd_grows_on_success_and_halves_on_429():
+    limiter = AdaptiveLimiter(rpm=6000, batch_size=8, max_batch_size=64, concurrency=2, max_concurrency=4)
+    limiter.on_rate_limit(0.01)
+    assert limiter.requests.rate == 50 and limiter.concurrency == 1
+    assert limiter._paused_until - time.monotonic() <= 0.011  # Retry-After plus at most 10% jitter
+    for _ in range(6):
+        limiter.on_success()
+    assert limiter.batch_size > 8 and limiter.concurrency > 1
+    assert limiter.requests.rate == 56
+
+
+def test_embeddings_saturate_fake_quota(tmp_path, monkeypatch):
+    endpoint = FakeEmbeddingEndpoint(quota=5, window=0.2)
+    monkeypatch.setattr(embed_utils, "call_embedding_api", endpoint)
+    monkeypatch.setattr(embedding_cache, "_cache", EmbeddingCache(str(tmp_path / "emb.sqlite")))
+    monkeypatch.setattr(rate_limit, "_limiters", {"embeddings": AdaptiveLimiter(
+        rpm=60000, batch_size=2, max_batch_size=50, concurrency=2, max_concurrency=8, name="test",
+    )})
+
+    texts = [f"chunk number {i}" for i in range(600)]
+    start = time.monotonic()
+    vectors = embed_utils.embed_texts_with_retry(texts)
+    elapsed = time.monotonic() - start
+
+    assert vectors == [[float(len(t)), 1.0] for t in texts]
+    assert endpoint.rejected > 0  # it pushed up to the quota...
+    assert len(endpoint.calls) < 60  # ...with batches that grew well past the initial 2
+    assert elapsed < 10
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()  # the single half-open trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_call_with_retry_policy():
+    limiter = AdaptiveLimiter(rpm=60000, base_backoff=0.01, max_backoff=0.02)
+    outcomes = [FakeRateLimitError(0.01), ConnectionError("reset"), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retry(flaky, limiter, max_retries=3) == "ok"
+    assert limiter.rate_limited == 1 and limiter.breaker.failures == 0
+
+    calls = []
+    with pytest.raises(ValueError):
+        call_with_retry(lambda: calls.append(1) or int("bad request"), limiter)
+    assert len(calls) == 1  # not retryable
+
+    limiter.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with pytest.raises(ConnectionError):
+        call_with_retry(lambda: calls.append(1) or (_ for _ in ()).throw(ConnectionError("down")), limiter, max_retries=5)
+    assert len(calls) == 3  # gave up when the breaker opened after two failures
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(lambda: "never called", limiter)
+
+
+def _scripted(*outcomes):
+    """
+    A call that raises or returns each outcome in turn.
+    """
+    outcomes = list(outcomes)
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return call
+
+
+def _half_open_limiter():
+    limiter = AdaptiveLimiter(rpm=60000, base_backoff=0.01, max_backoff=0.02)
+    limiter.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02)
+    limiter.breaker.record_failure()
+    time.sleep(0.03)
+    assert limiter.breaker.state == "half-open"
+    return limiter
+
+
+def test_half_open_trial_rate_limited_then_retried():
+    limiter = _half_open_limiter()
+    # The retry after the 429 reuses the trial it already holds
+    assert call_with_retry(_scripted(FakeRateLimitError(0.01), "ok"), limiter) == "ok"
+    assert limiter.breaker.state == "closed"
+
+
+def test_half_open_trial_released_on_other_errors():
+    limiter = _half_open_limiter()
+    with pytest.raises(ValueError):
+        call_with_retry(lambda: int("bad request"), limiter)
+    with pytest.raises(FakeRateLimitError):
+        call_with_retry(_scripted(FakeRateLimitError(0.01)), limiter, max_retries=0)
+    assert limiter.breaker.state == "half-open"
+    assert call_with_retry(lambda: "ok", limiter) == "ok"
+    assert limiter.breaker.state == "closed"
+
+
+def test_half_open_trial_released_on_timeout():
+    limiter = _half_open_limiter()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(acall_with_retry(lambda: asyncio.sleep(1), limiter), 0.05)
+
+        async def ok():
+            return "ok"
+        return await acall_with_retry(ok, limiter)
+
+    assert asyncio.run(run()) == "ok"
+    assert limiter.breaker.state == "closed"
+
+
+def test_async_waiters_do_not_hold_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    limiter = AdaptiveLimiter(rpm=60000, concurrency=1, max_concurrency=1)
+    limiter.acquire()  # every slot taken
+
+    async def waiters_released_one_by_one():
+        # A single executor thread: a waiter parked on it would block to_thread below
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        waiters = [asyncio.create_task(limiter.aacquire()) for _ in range(8)]
+        await asyncio.sleep(0.1)
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: "free"), 1.0) == "free"
+        assert not any(w.done() for w in waiters)
+
+        waiters[0].cancel()
+        limiter.release()
+        for _ in range(7):
+            done, _ = await asyncio.wait([w for w in waiters[1:] if not w.done()], timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+            assert len(done) == 1
+            limiter.release()
+
+    async def main():
+        try:
+            await waiters_released_one_by_one()
+        finally:
+            # Unblock any waiter stuck in a thread, so a failure cannot hang loop shutdown
+            with limiter._cond:
+                limiter.concurrency = 100
+                limiter._cond.notify_all()
+
+    asyncio.run(main())
+    assert limiter._active == 0
@@ -0,0 +1,142 @@
+"""
+Tests for the shared storage registry.
+"""
+import threading
+
+from prime_agent.storage import registry
+
+
+class FakeEmbeddings:
+    instances = 0
+
+    def __init__(self, model_name=None):
+        FakeEmbeddings.instances += 1
+
+    def embed_query(self, text):
+        return [0.0, 1.0]
+
+
+def test_embeddings_created_once_across_threads(monkeypatch):
+    monkeypatch.setattr(registry, "HuggingFaceEmbeddings", FakeEmbeddings)
+    monkeypatch.setattr(registry, "_embeddings", None)
+    FakeEmbeddings.instances = 0
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get_embeddings())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert FakeEmbeddings.instances == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_vector_store_shared_per_collection(monkeypatch):
+    created = []
+
+    def open_store(collection_name):
+        created.append(collection_name)
+        return SizedStore(collection_name)
+
+    monkeypatch.setattr(registry, "_open_store", open_store)
+    monkeypatch.setattr(registry, "_stores", {})
+    monkeypatch.setattr(registry, "_last_access", {})
+
+    a = registry.get_vector_store("a")
+    assert registry.get_vector_store("a") is a
+    assert registry.get_vector_store("b") is not a
+    assert created == ["a", "b"]
+
+
+class SizedStore:
+    def __init__(self, collection_name, size=100):
+        self.name = collection_name
+        self.size = size
+        self.persistent = True
+        self.closed = False
+
+    def count(self):
+        return 1
+
+    def memory_bytes(self):
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+
+def test_session_collections_evict_lru_over_budget(monkeypatch):
+    monkeypatch.setattr(registry, "_stores", {})
+    monkeypatch.setattr(registry, "_retrievers", {})
+    monkeypatch.setattr(registry, "_last_access", {})
+    monkeypatch.setattr(registry, "_open_store", SizedStore)
+    monkeypatch.setattr(registry, "VECTOR_RAM_BUDGET", 250)
+
+    a = registry.get_vector_store(registry.session_collection("a"))
+    registry.get_vector_store(registry.session_collection("b"))
+    registry.get_vector_store(registry.session_collection("a"))  # b is now least recently used
+    registry.get_vector_store(registry.session_collection("c"))
+
+    names = [c["collection"] for c in registry.status()["collections"]]
+    assert sorted(names) == ["session_a", "session_c"]
+    assert registry.status()["total_memory_bytes"] == 200
+    assert not a.closed
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    monkeypatch.setattr(registry, "_stores", {})
+    monkeypatch.setattr(registry, "_retrievers", {})
+    monkeypatch.setattr(registry, "_last_access", {})
+    monkeypatch.setattr(registry, "_open_store", SizedStore)
+
+    old = registry.get_vector_store("session_old")
+    registry._last_access["session_old"] -= registry.VECTOR_SESSION_IDLE_SECONDS + 1
+    registry.get_vector_store("session_new")
+    assert old.closed
+    assert [c["collection"] for c in registry.status()["collections"]] == ["session_new"]
+
+
+def test_pinned_collections_are_not_evicted(monkeypatch):
+    monkeypatch.setattr(registry, "_stores", {})
+    monkeypatch.setattr(registry, "_retrievers", {})
+    monkeypatch.setattr(registry, "_last_access", {})
+    monkeypatch.setattr(registry, "_pins", {})
+    monkeypatch.setattr(registry, "_open_store", SizedStore)
+    monkeypatch.setattr(registry, "VECTOR_RAM_BUDGET", 150)
+
+    with registry.pinned("session_busy") as busy:
+        with registry.pinned("session_busy"):
+            pass
+        registry._last_access["session_busy"] -= registry.VECTOR_SESSION_IDLE_SECONDS + 1
+        # Over budget and long idle, but a caller still holds it
+        registry.get_vector_store("session_other")
+        assert not busy.closed
+        assert registry.get_vector_store("session_busy") is busy
+        assert [c["pinned"] for c in registry.status()["collections"] if c["collection"] == "session_busy"] == [True]
+
+    # Released, so it can go once the budget is exceeded again
+    registry.get_vector_store("session_third")
+    assert busy.closed
+    assert list(registry._stores) == ["session_third"]
+
+
+def test_in_memory_collection_spills_and_restores(monkeypatch, tmp_path, hash_embeddings):
+    from prime_agent.storage.vector_store import VectorStore
+
+    monkeypatch.setattr(registry, "_stores", {})
+    monkeypatch.setattr(registry, "_retrievers", {})
+    monkeypatch.setattr(registry, "_last_access", {})
+    monkeypatch.setattr(registry, "_spill_client", None)
+    monkeypatch.setattr(registry, "VECTOR_SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(registry, "_embeddings", hash_embeddings)
+
+    store = registry.get_vector_store("session_spill")
+    store.add_documents(["kept across eviction"], [{"source": "s"}], ["1"])
+    with registry._lock:
+        registry._evict("session_spill")
+
+    restored = registry.get_vector_store("session_spill")
+    assert restored is not store
+    assert [r["content"] for r in restored.search("eviction", k=1)] == ["kept across eviction"]
+    restored.drop()
@@ -1,7 +1,7 @@
 """
 Tests for text utilities.
 """
-from prime_agent.utils.text_utils import clean_text, chunk_text
+from prime_agent.utils.text_utils import clean_text, chunk_text, chunk_spans, count_tokens
 
 def test_clean_text():
     text = "  Hello   World  \n\n"
@@ -12,3 +12,21 @@ def test_chunk_text():
     chunks = chunk_text(text, chunk_size=100, overlap=10)
     assert len(chunks) > 1
     assert len(chunks[0]) <= 100
+
+def test_chunk_spans_respect_sentences():
+    text = "Alpha beta gamma. Delta epsilon zeta! Eta theta iota? " * 20
+    spans = chunk_spans(text, chunk_size=120, overlap=40)
+    assert spans[0][0] == 0
+    for start, end in spans:
+        assert end - start <= 120
+        assert text[end - 1] in ".!?"
+    # Consecutive chunks overlap and cover the whole text
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        assert start < prev_end
+    assert spans[-1][1] == len(text.rstrip())
+
+def test_chunk_text_tokens():
+    text = "Tokens are counted, not characters. " * 200
+    chunks = chunk_text(text, chunk_size=50, overlap=10, unit="tokens")
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 50 for c in chunks)
@@ -31,3 +31,84 @@ def test_vector_store():
             shutil.rmtree(temp_dir, ignore_errors=True)
         except Exception:
             pass
+
+
+def test_persistent_store_reopens_and_tombstones(hash_embeddings):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        vs = VectorStore(collection_name="persist_test", embeddings=hash_embeddings, persist_directory=temp_dir)
+        vs.add_documents(
+            ["Graph neural networks.", "Rust ownership rules.", "Transformer attention."],
+            [{"source": "a"}, {"source": "b"}, {"source": "a"}],
+            ["1", "2", "3"],
+        )
+
+        # A second handle on the same directory sees the stored corpus without re-adding
+        reopened = VectorStore(collection_name="persist_test", embeddings=hash_embeddings, persist_directory=temp_dir)
+        assert reopened.count() == 3
+        assert reopened.existing(["1", "9"]) == {"1": "Graph neural networks."}
+
+        assert reopened.delete(where={"source": "a"}) == 2
+        assert reopened.count() == 1
+        assert [r["content"] for r in reopened.search("attention", k=3)] == ["Rust ownership rules."]
+        assert reopened.existing(["1", "3"]) == {}
+
+        # Re-adding a tombstoned id revives it
+        reopened.add_documents(["Transformer attention."], [{"source": "a"}], ["3"])
+        assert reopened.count() == 2
+
+        assert reopened.compact() == 1
+        assert reopened.count() == 2
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_search_many_matches_search(hash_embeddings):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        vs = VectorStore(collection_name="search_many_test", embeddings=hash_embeddings, persist_directory=temp_dir)
+        vs.add_documents(
+            ["Graph neural networks.", "Rust ownership rules.", "Transformer attention.", "Rust async runtimes."],
+            [{"source": "a"}, {"source": "b"}, {"source": "a"}, {"source": "c"}],
+            ["1", "2", "3", "4"],
+        )
+        queries = ["rust", "attention", "rust"]
+        filters = [{"source": "c"}, None, {"source": "b"}]
+
+        batched = vs.search_many(queries, k=1, filters=filters)
+        single = [vs.search(q, k=1, filter=f) for q, f in zip(queries, filters)]
+        assert batched == single
+        assert [r[0]["content"] for r in batched] == ["Rust async runtimes.", "Transformer attention.", "Rust ownership rules."]
+        assert vs.search_many([]) == []
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_sample_by_source_reads_chunks_without_embedding(hash_embeddings, monkeypatch):
+    def embed_query(text):
+        raise AssertionError("metadata lookups must not embed")
+
+    monkeypatch.setattr(hash_embeddings, "embed_query", embed_query)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        vs = VectorStore(collection_name="sample_test", embeddings=hash_embeddings, persist_directory=temp_dir)
+        vs.add_documents(
+            [f"Part {i} of a." for i in range(5)] + ["Only part of b."],
+            [{"source": "a", "chunk_index": i} for i in (3, 0, 4, 1, 2)] + [{"source": "b", "chunk_index": 0}],
+            ["a3", "a0", "a4", "a1", "a2", "b0"],
+        )
+        samples = vs.sample_by_source(["a", "b", "missing"], n=1)
+        assert [r["id"] for r in samples["a"]] == ["a0"]
+        assert [r["content"] for r in samples["b"]] == ["Only part of b."]
+        assert samples["missing"] == []
+
+        spread = vs.sample_by_source(["a"], n=3, spread=True)["a"]
+        assert [r["id"] for r in spread] == ["a0", "a2", "a4"]
+
+        # The index follows later writes
+        vs.delete(ids=["a0"])
+        vs.add_documents(["Part 5 of a."], [{"source": "a", "chunk_index": 5}], ["a5"])
+        assert [r["id"] for r in vs.get_by_metadata({"source": "a"})] == ["a1", "a2", "a3", "a4", "a5"]
+        assert [r["id"] for r in vs.get_by_metadata({"chunk_index": {"$gte": 5}})] == ["a5"]
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,50 @@
+"""
+Tests for web search caching.
+"""
+import threading
+import time
+
+from prime_agent.tools import web_search as ws
+
+def _fake_search(calls, delay=0.0):
+    def search(query, num_results):
+        calls.append((query, num_results))
+        time.sleep(delay)
+        return [{"title": f"{query} {i}", "link": f"https://x/{i}", "snippet": ""} for i in range(num_results)]
+    return search
+
+def test_cache_and_deeper_search(monkeypatch):
+    ws.clear_search_cache()
+    calls = []
+    monkeypatch.setattr(ws, "_ddgs_search", _fake_search(calls))
+
+    assert len(ws.web_search("Graph  Theory", 3)) == 3
+    assert len(ws.web_search("graph theory", 2)) == 2
+    assert calls == [("Graph  Theory", 3)]
+
+    deeper = ws.web_search("graph theory", 6)
+    assert [r["link"] for r in deeper] == [f"https://x/{i}" for i in range(6)]
+    assert len(calls) == 2
+
+def test_ttl_expiry(monkeypatch):
+    ws.clear_search_cache()
+    calls = []
+    monkeypatch.setattr(ws, "_ddgs_search", _fake_search(calls))
+    monkeypatch.setattr(ws, "SEARCH_CACHE_TTL", 0.0)
+    ws.web_search("topic", 2)
+    time.sleep(0.01)
+    ws.web_search("topic", 2)
+    assert len(calls) == 2
+
+def test_concurrent_searches_are_coalesced(monkeypatch):
+    ws.clear_search_cache()
+    calls = []
+    monkeypatch.setattr(ws, "_ddgs_search", _fake_search(calls, delay=0.2))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ws.web_search("same query", 3))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 5 and all(len(r) == 3 for r in results)